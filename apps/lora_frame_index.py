@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# Index the LoRa frames of a complex64 IQ recording, then decode selected frames, see gnuradio.lora_sdr.frame_index
+
+import sys
+from gnuradio.lora_sdr.frame_index import main
+
+if __name__ == "__main__":
+    sys.exit(main())
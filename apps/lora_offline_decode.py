@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# Decode the LoRa frames of a complex64 IQ recording on all the cores, see gnuradio.lora_sdr.offline_decoder
+
+import sys
+from gnuradio.lora_sdr.offline_decoder import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# Adaptive-stopping estimation of the frame error rate, and search of the SNR reaching a target FER (sensitivity).
+# Frames are simulated in batches until enough errors are observed, the confidence interval is narrow enough, or it
+# is known on which side of a threshold the FER lies, which is all the search of the sensitivity needs.
+import functools
+import json
+import math
+import sys
+import time
+
+from sweep import point_seed, simulate_point, run_sweep
+
+
+def wilson_interval(n_errors, n_frames, z=1.96):
+    """
+    Wilson score interval of an error rate, z=1.96 for 95% confidence
+    """
+    if n_frames == 0:
+        return 0.0, 1.0
+    p = n_errors / n_frames
+    denom = 1 + z**2 / n_frames
+    center = (p + z**2 / (2 * n_frames)) / denom
+    half = z * math.sqrt(p * (1 - p) / n_frames + z**2 / (4 * n_frames**2)) / denom
+    return max(center - half, 0.0), min(center + half, 1.0)
+
+
+def simulate_adaptive(point, seed, max_frames, target_errors=100, rel_ci=None, threshold=None, z=1.96, min_batch=50, max_batch=1000, run_point=simulate_point):
+    """
+    Simulate the point in batches of frames (doubling from min_batch up to max_batch) until:
+        - target_errors frame errors (missed or invalid CRC) are observed,
+        - or the half width of the confidence interval is below rel_ci times the FER,
+        - or the confidence interval does not contain the FER threshold,
+        - or max_frames frames are sent.
+    Returns the counts as simulate_point, with the FER over all the frames sent, its confidence interval (ci_low,
+    ci_high), and the reason of the stop.
+    """
+    totals = dict(n_frames=0, n_detected=0, n_valid=0)
+    batch = min_batch
+    k = 0
+    while True:
+        n = min(batch, max_frames - totals["n_frames"])
+        result = run_point(point, point_seed(seed, dict(batch=k)), n)
+        for key in totals:
+            totals[key] += result[key]
+        k += 1
+        n_errors = totals["n_frames"] - totals["n_valid"]
+        low, high = wilson_interval(n_errors, totals["n_frames"], z)
+        fer = n_errors / totals["n_frames"]
+
+        if target_errors is not None and n_errors >= target_errors:
+            stop = "errors"
+        elif rel_ci is not None and n_errors and (high - low) / 2 <= rel_ci * fer:
+            stop = "ci"
+        elif threshold is not None and (low > threshold or high < threshold):
+            stop = "threshold"
+        elif totals["n_frames"] >= max_frames:
+            stop = "max_frames"
+        else:
+            batch = min(2 * batch, max_batch)
+            continue
+        return dict(totals, fer=fer, ci_low=low, ci_high=high, n_batches=k, stop=stop)
+
+
+def find_sensitivity(point, seed, max_frames, target_fer=0.01, snr_low=-20, snr_high=0, tol=0.1, rel_ci=0.2, expand_step=3, max_expand=5, z=1.96,
+                     min_batch=50, max_batch=1000, run_point=simulate_point):
+    """
+    Search the SNR at which the FER of the point (without its snr) equals target_fer, to tol dB. The FER is assumed
+    decreasing with the SNR: the search keeps an interval [snr_low, snr_high] around the target (widened by expand_step
+    dB if needed) and evaluates the secant of log(FER) between its bounds, or their middle if the secant makes no progress.
+    Each evaluation stops as soon as the FER is known to be above or below the target, or to within rel_ci of its value
+    (the search then ends at this SNR if the target is in its confidence interval), up to max_frames frames.
+
+    Returns the SNR found (nan if the target could not be bracketed), the total number of frames simulated and the
+    evaluations as a list of (snr, result of simulate_adaptive).
+    """
+    evaluations = []
+
+    def evaluate(snr):
+        result = simulate_adaptive(dict(point, snr=snr), point_seed(seed, dict(snr=snr)), max_frames, target_errors=None, rel_ci=rel_ci,
+                                   threshold=target_fer, z=z, min_batch=min_batch, max_batch=max_batch, run_point=run_point)
+        evaluations.append((snr, result))
+        return result
+
+    def log_fer(result):
+        # FER of 0 counted as less than one error
+        return math.log(max(result["fer"], 0.5 / result["n_frames"]))
+
+    def summary(snr):
+        return dict(snr=snr, n_frames=sum(r["n_frames"] for _, r in evaluations), evaluations=evaluations)
+
+    low, high = evaluate(snr_low), evaluate(snr_high)
+    for _ in range(max_expand):
+        if low["fer"] < target_fer:
+            snr_low -= expand_step
+            low = evaluate(snr_low)
+        elif high["fer"] > target_fer:
+            snr_high += expand_step
+            high = evaluate(snr_high)
+        else:
+            break
+    if low["fer"] < target_fer or high["fer"] > target_fer:
+        return summary(float("nan"))
+
+    log_target = math.log(target_fer)
+
+    def secant():
+        # SNR of the target on the line of log(FER) between the bounds, their middle if the FER is flat
+        if log_fer(low) <= log_fer(high):
+            return (snr_low + snr_high) / 2
+        return snr_low + (log_fer(low) - log_target) / (log_fer(low) - log_fer(high)) * (snr_high - snr_low)
+
+    last_moved, n_moved = None, 0
+    while snr_high - snr_low > tol:
+        # bisection when the secant falls too close to a bound, or when the same bound moved twice in a row
+        snr = secant()
+        if n_moved >= 2 or not snr_low + tol / 4 < snr < snr_high - tol / 4:
+            snr = (snr_low + snr_high) / 2
+        result = evaluate(snr)
+        if result["ci_low"] <= target_fer <= result["ci_high"] and result["stop"] == "ci":
+            return summary(snr)
+        moved = "low" if result["fer"] > target_fer else "high"
+        n_moved = n_moved + 1 if moved == last_moved else 1
+        last_moved = moved
+        if moved == "low":
+            snr_low, low = snr, result
+        else:
+            snr_high, high = snr, result
+    return summary(secant())
+
+
+def sensitivity_table(grid, target_fer=0.01, max_frames=100000, base_seed=0, n_workers=None, **search_args):
+    """
+    Sensitivity of each point of a grid without SNR (e.g. {"sf": [7, 8, 9], "cr": [1, 4]}), the searches running in parallel
+    """
+    return run_sweep(grid, max_frames, base_seed=base_seed, run_point=functools.partial(find_sensitivity, target_fer=target_fer, **search_args),
+                     n_workers=n_workers, progress=lambda done, total, point, result: print("[{}/{}] {}: {:.2f} dB ({} frames)".format(
+                         done, total, point, result["snr"], result["n_frames"]), file=sys.stderr, flush=True))
+
+
+if __name__ == "__main__":
+    # e.g. python adaptive.py '{"sf": [7, 8, 9], "cr": [1, 4]}' 0.01
+    grid = json.loads(sys.argv[1])
+    target_fer = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+    start_time = time.time()
+    results = sensitivity_table(grid, target_fer)
+    for point, result in results:
+        print(point, "sensitivity {:.2f} dB at FER {}, {} frames".format(result["snr"], target_fer, result["n_frames"]))
+    print("--- Simulation time: %s seconds ---" % (time.time() - start_time))
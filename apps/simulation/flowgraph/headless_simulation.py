@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# Headless version of tx_rx_simulation: no throttle, the payloads come from memory and the received frames are
+# returned as NumPy arrays. The simulation ends as soon as all the frames sent are received, or else at the end of the
+# stream: the header errors can come from false detections on the noise and are not matched to the frames sent.
+
+import threading
+
+import numpy as np
+import pmt
+from gnuradio import blocks
+from gnuradio import channels
+from gnuradio import gr
+import gnuradio.lora_sdr as lora_sdr
+
+
+class frame_counter(gr.basic_block):
+    """
+    Store the PDUs of the received frames and count the headers with an error, complete is set once n_frames PDUs are received
+    """
+    def __init__(self, n_frames):
+        gr.basic_block.__init__(self, name="frame_counter", in_sig=None, out_sig=None)
+        self.n_frames = n_frames
+        self.frames = []
+        self.n_header_errors = 0
+        self.complete = threading.Event()
+        self.message_port_register_in(pmt.intern("pdu"))
+        self.message_port_register_in(pmt.intern("frame_info"))
+        self.set_msg_handler(pmt.intern("pdu"), self.handle_pdu)
+        self.set_msg_handler(pmt.intern("frame_info"), self.handle_frame_info)
+
+    def handle_pdu(self, msg):
+        self.frames.append((pmt.to_python(pmt.car(msg)), bytes(pmt.u8vector_elements(pmt.cdr(msg)))))
+        self.check_complete()
+
+    def handle_frame_info(self, msg):
+        # the frames with a valid header are counted with their PDU, a header error does not end a frame sent as it
+        # may be a false detection
+        if pmt.to_long(pmt.dict_ref(msg, pmt.intern("err"), pmt.from_long(0))):
+            self.n_header_errors += 1
+
+    def check_complete(self):
+        if len(self.frames) >= self.n_frames:
+            self.complete.set()
+
+
+class tx_rx_headless(gr.top_block):
+
+    def __init__(self, payloads, soft_decoding=False, SNRdB=0, samp_rate=250000, bw=125000, center_freq=868.1, sf=7, cr=1, clk_offset_ppm=0, ldro=0, preamb_len=8,
+                 log_i0_kernel=0, noise_seed=1, frame_zero_padd=None):
+        gr.top_block.__init__(self, "Tx Rx Headless Simulation", catch_exceptions=True)
+
+        ##################################################
+        # Variables
+        ##################################################
+        self.sf = sf
+        self.samp_rate = samp_rate
+        self.bw = bw
+        self.os_factor = int(samp_rate/bw)
+        self.impl_head = impl_head = False
+        self.has_crc = has_crc = True
+        # zeros after each frame, two symbols by default so that the receiver gets the end of the last frame
+        if frame_zero_padd is None:
+            frame_zero_padd = 2 * (1 << sf) * self.os_factor
+
+        # payloads separated by commas, as in the payload files
+        self.payloads = payloads
+        tx_data = b"".join(bytes(payload) + b"," for payload in payloads)
+
+        ##################################################
+        # Blocks
+        ##################################################
+        self.blocks_vector_source_0 = blocks.vector_source_b(list(tx_data), False)
+        self.lora_sdr_whitening_0 = lora_sdr.whitening(False, False)
+        self.lora_sdr_header_0 = lora_sdr.header(impl_head, has_crc, cr)
+        self.lora_sdr_add_crc_0 = lora_sdr.add_crc(has_crc)
+        self.lora_sdr_hamming_enc_0 = lora_sdr.hamming_enc(cr, sf)
+        self.lora_sdr_interleaver_0 = lora_sdr.interleaver(cr, sf, ldro, bw)
+        self.lora_sdr_gray_demap_0 = lora_sdr.gray_demap(sf)
+        self.lora_sdr_modulate_0 = lora_sdr.modulate(sf, samp_rate, bw, [0x12], frame_zero_padd, preamb_len)
+        self.channels_channel_model_0 = channels.channel_model(
+            noise_voltage=(10**(-SNRdB/20)),
+            frequency_offset = center_freq*clk_offset_ppm/samp_rate,
+            epsilon=(1.0 + clk_offset_ppm*1e-6),
+            taps=[1.0 + 0.0j],
+            noise_seed=noise_seed,
+            block_tags=True)
+        self.channels_channel_model_0.set_min_output_buffer(int(2**sf*samp_rate/bw*1.1))
+        self.lora_sdr_frame_sync_0 = lora_sdr.frame_sync(int(center_freq*1e6), bw, sf, impl_head, [0x12], self.os_factor, preamb_len)
+        self.lora_sdr_fft_demod_0 = lora_sdr.fft_demod(soft_decoding, True, 0, log_i0_kernel)
+        self.lora_sdr_gray_mapping_0 = lora_sdr.gray_mapping(soft_decoding)
+        self.lora_sdr_deinterleaver_0 = lora_sdr.deinterleaver(soft_decoding)
+        self.lora_sdr_hamming_dec_0 = lora_sdr.hamming_dec(soft_decoding)
+        self.lora_sdr_header_decoder_0 = lora_sdr.header_decoder(impl_head, cr, 255, has_crc, ldro, False)
+        self.lora_sdr_dewhitening_0 = lora_sdr.dewhitening()
+        self.lora_sdr_crc_verif_0 = lora_sdr.crc_verif(False, False, True)
+        self.frame_counter_0 = frame_counter(len(payloads))
+
+        ##################################################
+        # Connections
+        ##################################################
+        self.msg_connect((self.lora_sdr_header_decoder_0, 'frame_info'), (self.lora_sdr_frame_sync_0, 'frame_info'))
+        self.msg_connect((self.lora_sdr_header_decoder_0, 'frame_info'), (self.frame_counter_0, 'frame_info'))
+        self.msg_connect((self.lora_sdr_crc_verif_0, 'msg'), (self.frame_counter_0, 'pdu'))
+        self.connect((self.blocks_vector_source_0, 0), (self.lora_sdr_whitening_0, 0))
+        self.connect((self.lora_sdr_whitening_0, 0), (self.lora_sdr_header_0, 0))
+        self.connect((self.lora_sdr_header_0, 0), (self.lora_sdr_add_crc_0, 0))
+        self.connect((self.lora_sdr_add_crc_0, 0), (self.lora_sdr_hamming_enc_0, 0))
+        self.connect((self.lora_sdr_hamming_enc_0, 0), (self.lora_sdr_interleaver_0, 0))
+        self.connect((self.lora_sdr_interleaver_0, 0), (self.lora_sdr_gray_demap_0, 0))
+        self.connect((self.lora_sdr_gray_demap_0, 0), (self.lora_sdr_modulate_0, 0))
+        self.connect((self.lora_sdr_modulate_0, 0), (self.channels_channel_model_0, 0))
+        self.connect((self.channels_channel_model_0, 0), (self.lora_sdr_frame_sync_0, 0))
+        self.connect((self.lora_sdr_frame_sync_0, 0), (self.lora_sdr_fft_demod_0, 0))
+        self.connect((self.lora_sdr_fft_demod_0, 0), (self.lora_sdr_gray_mapping_0, 0))
+        self.connect((self.lora_sdr_gray_mapping_0, 0), (self.lora_sdr_deinterleaver_0, 0))
+        self.connect((self.lora_sdr_deinterleaver_0, 0), (self.lora_sdr_hamming_dec_0, 0))
+        self.connect((self.lora_sdr_hamming_dec_0, 0), (self.lora_sdr_header_decoder_0, 0))
+        self.connect((self.lora_sdr_header_decoder_0, 0), (self.lora_sdr_dewhitening_0, 0))
+        self.connect((self.lora_sdr_dewhitening_0, 0), (self.lora_sdr_crc_verif_0, 0))
+
+    def run_until_complete(self):
+        """
+        Run the flowgraph until all the frames are received or the stream is over
+        """
+        complete = self.frame_counter_0.complete
+
+        def wait():
+            self.wait()
+            complete.set()
+
+        self.start()
+        waiter = threading.Thread(target=wait, daemon=True)
+        waiter.start()
+        complete.wait()
+        self.stop()
+        waiter.join()
+
+    def results(self):
+        """
+        The frames received as NumPy arrays, in their order of reception:
+            - tx_payloads: the payloads sent, (n_frames, pay_len) uint8
+            - payloads: the payloads received, (n_received, max pay_len) uint8 padded with zeros
+            - pay_len, cr, ldro_mode: the header fields of the received frames
+            - crc_valid: the result of their payload CRC check
+            - n_header_errors: the number of invalid headers, frames sent or false detections
+        """
+        frames = self.frame_counter_0.frames
+        payloads = np.zeros((len(frames), max((len(payload) for _, payload in frames), default=0)), dtype=np.uint8)
+        for i, (_, payload) in enumerate(frames):
+            payloads[i, :len(payload)] = np.frombuffer(payload, dtype=np.uint8)
+        return dict(tx_payloads=np.asarray(self.payloads, dtype=np.uint8),
+                    payloads=payloads,
+                    pay_len=np.array([meta["pay_len"] for meta, _ in frames], dtype=int),
+                    cr=np.array([meta["cr"] for meta, _ in frames], dtype=int),
+                    ldro_mode=np.array([meta["ldro_mode"] for meta, _ in frames], dtype=int),
+                    crc_valid=np.array([meta.get("crc_valid", False) for meta, _ in frames], dtype=bool),
+                    n_header_errors=self.frame_counter_0.n_header_errors)
+
+
+def simulate(payloads, **params):
+    """
+    Send the payloads, a (n_frames, pay_len) array of bytes without commas, through the headless flowgraph with the
+    parameters of tx_rx_headless, and return the results of tx_rx_headless.results.
+    """
+    simulator = tx_rx_headless(payloads, **params)
+    simulator.run_until_complete()
+    return simulator.results()
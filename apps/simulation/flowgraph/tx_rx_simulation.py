@@ -28,7 +28,7 @@ import gnuradio.lora_sdr as lora_sdr
 
 class tx_rx_simulation(gr.top_block):
 
-    def __init__(self,tx_payload_file, rx_payload_file, rx_crc_file, impl_head=False, soft_decoding=False, SNRdB=0, samp_rate=250000, bw=125000, center_freq=868.1, sf=7, cr=1, pay_len=32, clk_offset_ppm=0, ldro=0,preamb_len=8):
+    def __init__(self,tx_payload_file, rx_payload_file, rx_crc_file, impl_head=False, soft_decoding=False, SNRdB=0, samp_rate=250000, bw=125000, center_freq=868.1, sf=7, cr=1, pay_len=32, clk_offset_ppm=0, ldro=0,preamb_len=8, log_i0_kernel=0, noise_seed=1):
         gr.top_block.__init__(self, "Tx Rx Simulation", catch_exceptions=True)
 
         ##################################################
@@ -61,7 +61,7 @@ class tx_rx_simulation(gr.top_block):
         self.lora_sdr_gray_mapping_0 = lora_sdr.gray_mapping(soft_decoding)
         self.lora_sdr_gray_demap_0 = lora_sdr.gray_demap(sf)
         self.lora_sdr_frame_sync_0 = lora_sdr.frame_sync(int(center_freq*1e6), bw, sf, impl_head, [0x12],self.os_factor,preamb_len)
-        self.lora_sdr_fft_demod_0 = lora_sdr.fft_demod( soft_decoding, True)
+        self.lora_sdr_fft_demod_0 = lora_sdr.fft_demod( soft_decoding, True, 0, log_i0_kernel)
         self.lora_sdr_dewhitening_0 = lora_sdr.dewhitening()
         self.lora_sdr_deinterleaver_0 = lora_sdr.deinterleaver(soft_decoding)
         self.lora_sdr_crc_verif_0 = lora_sdr.crc_verif( False, True)
@@ -71,7 +71,7 @@ class tx_rx_simulation(gr.top_block):
             frequency_offset = center_freq*clk_offset_ppm/samp_rate,
             epsilon=(1.0 + clk_offset_ppm*1e-6),
             taps=[1.0 + 0.0j],
-            noise_seed=1,
+            noise_seed=noise_seed,
             block_tags=True)
         self.channels_channel_model_0.set_min_output_buffer(int(2**sf*samp_rate/bw*1.1))
         self.blocks_throttle_0 = blocks.throttle(gr.sizeof_gr_complex*1, (samp_rate*10),True)
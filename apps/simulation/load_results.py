@@ -1,26 +1,28 @@
-from os import fork
 import numpy as np
 import matplotlib.pyplot as plt
-import pickle
+from results_store import ResultsStore
 
 plt.figure()
 
-# results folder path
-folder = "results/"
+# results store path
+store_path = "results/store"
 
 #-----------------------------------------
 # Results to load and plot
 #-----------------------------------------
-file_list=[""]
+# parameters of the curves to plot, a value or a list of values, e.g. dict(sf=[7, 8], soft_decoding=True), all the curves if empty
+filters = dict()
 
-colors = plt.cm.rainbow(np.linspace(0,1,len(file_list)))
-for idx,file in enumerate(file_list):
-    
-    snrs, FER, Glob_FER = pickle.load(open(folder+file+".pkl","rb"))
+curves = ResultsStore(store_path).curves(**filters)
+# the curves are labelled with the parameters that differ between them
+varying = [name for name in sorted(set().union(*(config for config, _ in curves))) if len(set(str(config.get(name)) for config, _ in curves)) > 1]
+colors = plt.cm.rainbow(np.linspace(0,1,len(curves)))
+for idx,(config, curve) in enumerate(curves):
+    label = ", ".join("{}={}".format(name, config.get(name)) for name in varying)
     # Plot FER of frame which preamble has been detected
-    plt.semilogy(snrs,FER,'-d',label=file_list[idx], color=colors[idx])
+    plt.semilogy(curve["snr"],curve["fer"],'-d',label=label, color=colors[idx])
     # Plot FER over all transmitted frames
-    plt.semilogy(snrs,Glob_FER,'--d',label=file_list[idx], color=colors[idx])
+    plt.semilogy(curve["snr"],curve["glob_fer"],'--d',label=label, color=colors[idx])
 
 plt.grid()
 plt.xlabel('SNR [dB]')
@@ -29,4 +31,3 @@ plt.ylim([1e-4,1.05])
 plt.legend(loc='upper right')
 plt.title("")
 plt.show()
-
@@ -1,13 +1,10 @@
 # Imports
-from os import fork
 import numpy as np
-from flowgraph.tx_rx_simulation import tx_rx_simulation
+from sweep import run_sweep, error_rates, simulate_point, simulate_point_numpy
+from adaptive import simulate_adaptive
+import functools
 import matplotlib.pyplot as plt
-import string
-import random 
-import pickle
-from threading import Thread
-import threading
+from results_store import ResultsStore
 import time
 #-----------------------------------------
 #            Parameters Settings
@@ -15,7 +12,10 @@ import time
 sf = 7                  # Spreading factor
 cr = 2                  # Coding rate
 snrs = np.arange(-13,0,1) -3*(sf-7) # List of SNR to evaluate
-n_frames = 100         # Number of frames transmitted per SNR
+n_frames = 100         # Number of frames transmitted per SNR (maximum number if adaptive)
+adaptive = False        # keep sending frames at each SNR until target_errors errors are observed or the FER is known within rel_ci
+target_errors = 100     # frame errors (missed or invalid CRC) observed before stopping, in adaptive mode
+rel_ci = 0.2            # relative half width of the 95% confidence interval of the FER before stopping, in adaptive mode
 samp_rate = 500000      # Sample rate !Should be at least 4 time the bandwidth to avoid issue with the MMSE fractional resampler in the channel model!
 bw = 125000             # LoRa bandwidth
 center_freq = 868.1     # Center frequency in MHz
@@ -23,62 +23,23 @@ clk_offset_ppm = 0      # crystal offset in ppm
 pay_len = 32            # in bytes
 ldro = False            # usage of low datarate optimisation mode
 soft_decoding = True   # usage of soft-decision decoding in hte receiver
+seed = 0                # base seed, each SNR gets its own noise and payloads derived from it
+numpy_sim = False       # use the vectorized NumPy link-level simulator (gnuradio.lora_sdr.link_sim) instead of the flowgraph
+store_path = "results/store"  # results store the points are appended to
 
 
-# Result variables initialisation
-FER = [0]*len(snrs) 
-Glob_FER = [0]*len(snrs)  #paquet reception ratio
-
-# Run experiments for one SNR
-def run_exp(lock,snr_idx,tx_payload_file,rx_payload_file,rx_crc_file):
-    SNRdB = snrs[snr_idx]
-    print("Running SNR={}".format(SNRdB))
-    simulator = tx_rx_simulation(tx_payload_file, rx_payload_file, rx_crc_file, impl_head=False, soft_decoding=soft_decoding, SNRdB=SNRdB, samp_rate=samp_rate, bw=bw,center_freq=center_freq, sf=sf, cr=cr, pay_len=pay_len, clk_offset_ppm=clk_offset_ppm, ldro=ldro)
-    simulator.start()
-    simulator.wait()
-    #Get Frame error rate 
-    
-    lock.acquire()
-    f = open(rx_crc_file)
-    rx_crc = np.fromfile(f, dtype=np.uint8)
-    if len(rx_crc) == 0:
-        FER[snr_idx] = np.nan
-        Glob_FER[snr_idx] = np.nan
-    else:
-        FER[snr_idx] = (1-sum(rx_crc)/len(rx_crc))
-        Glob_FER[snr_idx] = (1-sum(rx_crc)/n_frames)
-    f.close()
-    lock.release()
-    print("SNR {} done".format(SNRdB))
-
 def main():
-    start_time = time.time()    
-    threads = []
-    lock = threading.Lock()
-    # For each SNR 
-    for snr_idx in range(len(snrs)):
-    
-        #set temporary file names
-        tx_payload_file = "./data/tx_payload{}.txt".format(snr_idx)
-        rx_payload_file = "./data/rx_payload{}.txt".format(snr_idx)
-        rx_crc_file     = "./data/rx_crc_valid{}.txt".format(snr_idx)
-
-        #create Tx payload
-        f = open(tx_payload_file, "w")
-        letters = string.ascii_lowercase
-        for i in range(n_frames):
-            payload = ''.join(random.choice(letters) for i in range(pay_len)) 
-            f.write(payload+",")
-        f.close()
-
-        # If you prefer not to use multiple threads, uncomment this line and comment the next three
-        # run_exp(lock,snr_idx,tx_payload_file,rx_payload_file,rx_crc_file) 
-        t = Thread(target=run_exp, args=(lock,snr_idx,tx_payload_file,rx_payload_file,rx_crc_file))
-        threads.append(t)
-        t.start()
-
-    for t in threads:
-        t.join()
+    start_time = time.time()
+    # one point per SNR, run in parallel on all the cores
+    grid = dict(snr=list(snrs), sf=[sf], cr=[cr], clk_offset_ppm=[clk_offset_ppm], soft_decoding=[soft_decoding],
+                pay_len=[pay_len], ldro=[ldro], samp_rate=[samp_rate], bw=[bw], center_freq=[center_freq])
+    run_point = simulate_point_numpy if numpy_sim else simulate_point
+    if adaptive:
+        results = run_sweep(grid, n_frames, base_seed=seed, run_point=functools.partial(simulate_adaptive, target_errors=target_errors, rel_ci=rel_ci, run_point=run_point))
+    else:
+        results = run_sweep(grid, n_frames, base_seed=seed, run_point=run_point)
+    FER, Glob_FER = error_rates(results)
+    ResultsStore(store_path).append(results, simulator="numpy" if numpy_sim else "flowgraph")
     print("--- Simulation time: %s seconds ---" % (time.time() - start_time))
     
     #-----------------------------------------
@@ -97,8 +58,6 @@ def main():
     # Save results
     curve_name = "samp{}_bw{}_sf{}_cr{}_payLen{}_clk_offset_ppm{}_soft{}_ldro{}".format(samp_rate, bw, sf, cr, pay_len, clk_offset_ppm ,soft_decoding, ldro)
     plt.savefig("results/"+curve_name+".png")
-    with open('results/'+curve_name+'.pkl', 'wb') as f:
-        pickle.dump([snrs, FER, Glob_FER],f)
     plt.show()
 
 
@@ -0,0 +1,173 @@
+# Store of the results of the simulation campaigns: one row per simulated point (configuration and SNR) with the number
+# of frames sent, detected and received with a valid CRC, the bit errors when measured, the runtime and the seed.
+# The rows are kept in columnar NPZ files, each append writing a new part, and an index (index.json) gives the
+# configurations by the hash of their parameters and the parts holding their rows, so that a query only loads the parts
+# it needs. compact() merges the parts once they become too many.
+import datetime
+import hashlib
+import json
+import os
+import sys
+import uuid
+
+import numpy as np
+
+from sweep import DEFAULT_PARAMS, _canonical
+
+# columns of the rows and their type, n_bit_errors is -1 when not measured
+COLUMNS = dict(config="U16", snr="f8", n_frames="i8", n_detected="i8", n_valid="i8", n_bit_errors="i8", runtime="f8", seed="i8", time="f8")
+
+
+def config_hash(config):
+    """
+    Hash of a configuration (all the parameters of a point but its SNR), the same for the numpy and python types of a value
+    """
+    key = json.dumps(sorted((name, _canonical(v)) for name, v in config.items()))
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def _matches(config, filters):
+    # a filter is a value or a list of accepted values
+    for name, accepted in filters.items():
+        accepted = accepted if isinstance(accepted, (list, tuple, np.ndarray)) else [accepted]
+        if _canonical(config.get(name)) not in [_canonical(v) for v in accepted]:
+            return False
+    return True
+
+
+def _write_atomic(path, write):
+    # write to a temporary file renamed once complete, readers never see a partial file
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+class ResultsStore:
+    """
+    Results store in the folder path, created if needed. A single process should write to a store at a time.
+    """
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        index_file = os.path.join(path, "index.json")
+        if os.path.exists(index_file):
+            with open(index_file) as f:
+                index = json.load(f)
+        else:
+            index = dict(configs={}, parts={})
+        self.configs_by_hash = index["configs"]
+        self.parts = index["parts"]
+
+    def _save_index(self):
+        data = json.dumps(dict(configs=self.configs_by_hash, parts=self.parts), indent=1, sort_keys=True).encode()
+        _write_atomic(os.path.join(self.path, "index.json"), lambda f: f.write(data))
+
+    def _write_part(self, columns):
+        # rows sorted by configuration, the index lists the configurations of the part
+        order = np.argsort(columns["config"], kind="stable")
+        columns = {name: np.asarray(columns[name], dtype=dtype)[order] for name, dtype in COLUMNS.items()}
+        name = "part-{}-{}.npz".format(datetime.datetime.now().strftime("%Y%m%dT%H%M%S"), uuid.uuid4().hex[:8])
+        _write_atomic(os.path.join(self.path, name), lambda f: np.savez(f, **columns))
+        self.parts[name] = sorted(set(columns["config"].tolist()))
+        return name
+
+    def append(self, results, simulator="flowgraph", **params):
+        """
+        Append the results of run_sweep, whose points all have an SNR. The configuration of a point is made of its
+        parameters but the SNR, completed with params, the default parameters of sweep.py and the simulator used.
+        Returns the hashes of the configurations of the points.
+        """
+        if not results:
+            return []
+        columns = {name: [] for name in COLUMNS}
+        hashes = []
+        now = datetime.datetime.now().timestamp()
+        for point, result in results:
+            config = {name: _canonical(v) if isinstance(v, np.generic) else v for name, v in {**DEFAULT_PARAMS, **params, **point}.items()}
+            snr = config.pop("snr")
+            config["simulator"] = simulator
+            h = config_hash(config)
+            # the first record of a configuration keeps its parameters, e.g. an int and a float of a same value share the hash
+            self.configs_by_hash.setdefault(h, config)
+            hashes.append(h)
+            for name, value in (("config", h), ("snr", snr), ("n_frames", result["n_frames"]), ("n_detected", result["n_detected"]),
+                                ("n_valid", result["n_valid"]), ("n_bit_errors", result.get("n_bit_errors", -1)), ("runtime", result.get("runtime", np.nan)),
+                                ("seed", result.get("seed", -1)), ("time", now)):
+                columns[name].append(value)
+        self._write_part(columns)
+        self._save_index()
+        return hashes
+
+    def configs(self, **filters):
+        """
+        The (hash, configuration) stored whose parameters match the filters, e.g. configs(sf=[7, 8], soft_decoding=True)
+        """
+        return [(h, config) for h, config in sorted(self.configs_by_hash.items()) if _matches(config, filters)]
+
+    def rows(self, hashes=None, **filters):
+        """
+        Columns of the rows of the configurations of the given hashes, or matching the filters, as a dictionary of arrays
+        """
+        if hashes is None:
+            hashes = [h for h, _ in self.configs(**filters)]
+        hashes = set(hashes)
+        selected = {name: [np.zeros(0, dtype=dtype)] for name, dtype in COLUMNS.items()}
+        for part, part_hashes in sorted(self.parts.items()):
+            if hashes.isdisjoint(part_hashes):
+                continue
+            with np.load(os.path.join(self.path, part)) as data:
+                mask = np.isin(data["config"], list(hashes))
+                for name in COLUMNS:
+                    selected[name].append(data[name][mask])
+        return {name: np.concatenate(values) for name, values in selected.items()}
+
+    def curves(self, **filters):
+        """
+        Error rate curves of the configurations matching the filters, as a list of (configuration, curve), the results of
+        a same SNR being accumulated over all the runs. A curve is a dictionary of arrays ordered by SNR: snr, n_frames,
+        n_detected, n_valid, n_bit_errors (-1 if not measured in all the runs), runtime, fer (over the detected frames, nan if none), glob_fer (over all the
+        frames sent) and ber (nan if the bit errors were not measured in all the runs).
+        """
+        configs = self.configs(**filters)
+        rows = self.rows([h for h, _ in configs])
+        curves = []
+        for h, config in configs:
+            mask = rows["config"] == h
+            snrs, inverse = np.unique(rows["snr"][mask], return_inverse=True)
+            curve = dict(snr=snrs)
+            for name in ("n_frames", "n_detected", "n_valid", "n_bit_errors"):
+                curve[name] = np.bincount(inverse, weights=rows[name][mask], minlength=len(snrs)).astype(np.int64)
+            curve["runtime"] = np.bincount(inverse, weights=rows["runtime"][mask], minlength=len(snrs))
+            measured = np.bincount(inverse, weights=rows["n_bit_errors"][mask] < 0, minlength=len(snrs)) == 0
+            curve["n_bit_errors"][~measured] = -1
+            with np.errstate(divide="ignore", invalid="ignore"):
+                curve["fer"] = np.where(curve["n_detected"] > 0, 1 - curve["n_valid"] / curve["n_detected"], np.nan)
+                curve["glob_fer"] = 1 - curve["n_valid"] / curve["n_frames"]
+                curve["ber"] = np.where(measured, curve["n_bit_errors"] / (8 * config["pay_len"] * curve["n_frames"]), np.nan)
+            curves.append((config, curve))
+        return curves
+
+    def compact(self):
+        """
+        Merge all the parts in a single one
+        """
+        if len(self.parts) < 2:
+            return
+        old_parts = list(self.parts)
+        columns = self.rows(list(self.configs_by_hash))
+        self.parts = {}
+        self._write_part(columns)
+        self._save_index()
+        for part in old_parts:
+            os.remove(os.path.join(self.path, part))
+
+
+if __name__ == "__main__":
+    # e.g. python results_store.py results/store '{"sf": [7, 8], "soft_decoding": true}'
+    store = ResultsStore(sys.argv[1])
+    filters = json.loads(sys.argv[2]) if len(sys.argv) > 2 else {}
+    for config, curve in store.curves(**filters):
+        print(config)
+        for snr, n_frames, fer, glob_fer in zip(curve["snr"], curve["n_frames"], curve["fer"], curve["glob_fer"]):
+            print("    SNR {:6.2f} dB: {:8d} frames, FER {:.4f}, FER including frame miss {:.4f}".format(snr, int(n_frames), fer, glob_fer))
@@ -0,0 +1,70 @@
+# Compare the frame error rate and the CPU time per symbol of fft_demod for the different log(I0) kernels
+# used in soft-decision decoding. The cycles per symbol of the kernels alone are measured by lib/benchmark_soft_demod.
+import os
+os.environ["GR_CONF_PERFCOUNTERS_ON"] = "True"  # must be set before gnuradio is loaded
+import numpy as np
+from flowgraph.tx_rx_simulation import tx_rx_simulation
+from gnuradio import gr
+import string
+import random
+import pickle
+import time
+#-----------------------------------------
+#            Parameters Settings
+#-----------------------------------------
+sf = 7                  # Spreading factor
+cr = 2                  # Coding rate
+snrs = np.arange(-13,-5,1) -3*(sf-7) # List of SNR to evaluate
+n_frames = 100          # Number of frames transmitted per SNR
+samp_rate = 500000      # Sample rate
+bw = 125000             # LoRa bandwidth
+center_freq = 868.1     # Center frequency in MHz
+pay_len = 32            # in bytes
+ldro = False            # usage of low datarate optimisation mode
+kernels = {0: "boost", 1: "poly", 2: "table", 3: "asymptotic"}  # log(I0) kernels to compare
+
+
+def run_exp(SNRdB, log_i0_kernel, tx_payload_file, rx_payload_file, rx_crc_file):
+    simulator = tx_rx_simulation(tx_payload_file, rx_payload_file, rx_crc_file, impl_head=False, soft_decoding=True, SNRdB=SNRdB, samp_rate=samp_rate, bw=bw, center_freq=center_freq, sf=sf, cr=cr, pay_len=pay_len, ldro=ldro, log_i0_kernel=log_i0_kernel)
+    simulator.start()
+    simulator.wait()
+    # Frame error rate including missed frames
+    rx_crc = np.fromfile(rx_crc_file, dtype=np.uint8)
+    FER = 1 - sum(rx_crc)/n_frames
+    # work time of the demodulator per symbol
+    demod = simulator.lora_sdr_fft_demod_0
+    n_symbols = demod.nitems_written(0)
+    time_per_symbol = demod.pc_work_time_total()/gr.high_res_timer_tps()/n_symbols if n_symbols else np.nan
+    return FER, time_per_symbol
+
+def main():
+    tx_payload_file = "./data/tx_payload_bench.txt"
+    rx_payload_file = "./data/rx_payload_bench.txt"
+    rx_crc_file     = "./data/rx_crc_valid_bench.txt"
+    # same payloads for all the kernels
+    with open(tx_payload_file, "w") as f:
+        letters = string.ascii_lowercase
+        for i in range(n_frames):
+            f.write(''.join(random.choice(letters) for i in range(pay_len))+",")
+
+    start_time = time.time()
+    FER = {}
+    time_per_symbol = {}
+    for kernel, name in kernels.items():
+        FER[name] = []
+        time_per_symbol[name] = []
+        for SNRdB in snrs:
+            fer, t = run_exp(SNRdB, kernel, tx_payload_file, rx_payload_file, rx_crc_file)
+            FER[name].append(fer)
+            time_per_symbol[name].append(t)
+            print("{:>10} SNR {:>4} dB: FER {:.3f}, fft_demod {:.1f} us/symbol".format(name, SNRdB, fer, t*1e6))
+    print("--- Simulation time: %s seconds ---" % (time.time() - start_time))
+
+    # Save results
+    curve_name = "soft_demod_benchmark_sf{}_cr{}_payLen{}_ldro{}".format(sf, cr, pay_len, ldro)
+    with open('results/'+curve_name+'.pkl', 'wb') as f:
+        pickle.dump([snrs, FER, time_per_symbol], f)
+
+
+if __name__ == "__main__":
+    main()
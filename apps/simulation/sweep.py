@@ -0,0 +1,145 @@
+# Monte-Carlo sweep of the tx_rx_simulation flowgraph over a grid of parameters, one process per core.
+# Each point of the grid gets its own seed, derived from the base seed and the values of the point only, so that the
+# noise and the payloads are independent between points and the results do not depend on the number of workers
+# or on the order of execution.
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import string
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# parameters of a point and their default values, snr in dB
+DEFAULT_PARAMS = dict(snr=0, sf=7, cr=2, clk_offset_ppm=0, soft_decoding=False, pay_len=32, ldro=False, samp_rate=500000, bw=125000, center_freq=868.1, log_i0_kernel=0)
+
+
+def grid_points(grid):
+    """
+    All the combinations of the values of a grid {parameter: list of values}, as dictionaries, the last parameter varying fastest
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _canonical(value):
+    # same key for the numpy and python types, and for the integers and their float value
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def point_seed(base_seed, point):
+    """
+    Seed of a point, a 63-bit integer depending only on the base seed and on the values of the point
+    """
+    key = json.dumps([base_seed, sorted((name, _canonical(v)) for name, v in point.items())])
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], "little") >> 1
+
+
+def simulate_point(point, seed, n_frames):
+    """
+    Transmit n_frames random payloads through the headless simulation flowgraph with the parameters of the point.
+    Returns the number of frames sent, detected (with a decoded header) and received with a valid CRC.
+    """
+    from flowgraph.headless_simulation import simulate
+    params = dict(DEFAULT_PARAMS, **point)
+    rng = np.random.default_rng(seed)
+    letters = np.frombuffer(string.ascii_lowercase.encode(), dtype=np.uint8)
+    payloads = rng.choice(letters, (n_frames, params["pay_len"]))
+
+    result = simulate(payloads, soft_decoding=params["soft_decoding"], SNRdB=params["snr"], samp_rate=params["samp_rate"], bw=params["bw"],
+                      center_freq=params["center_freq"], sf=params["sf"], cr=params["cr"], clk_offset_ppm=params["clk_offset_ppm"], ldro=params["ldro"],
+                      log_i0_kernel=params["log_i0_kernel"], noise_seed=int(rng.integers(1, 2**31 - 1)))
+    return dict(n_frames=n_frames, n_detected=len(result["crc_valid"]), n_valid=int(np.sum(result["crc_valid"])))
+
+
+def simulate_point_numpy(point, seed, n_frames):
+    """
+    Same as simulate_point with the vectorized NumPy link-level simulator instead of the flowgraph, log_i0_kernel
+    being ignored. Also returns the number of bit errors in the payloads received.
+    """
+    from gnuradio.lora_sdr.link_sim import simulate
+    params = dict(DEFAULT_PARAMS, **point)
+    rng = np.random.default_rng(seed)
+    letters = np.frombuffer(string.ascii_lowercase.encode(), dtype=np.uint8)
+    payloads = rng.choice(letters, (n_frames, params["pay_len"]))
+
+    result = simulate(payloads, params["sf"], params["cr"], params["snr"], os_factor=int(params["samp_rate"] / params["bw"]), ldro=params["ldro"],
+                      soft_decoding=params["soft_decoding"], clk_offset_ppm=params["clk_offset_ppm"], center_freq=params["center_freq"] * 1e6,
+                      bw=params["bw"], rng=rng)
+    return dict(n_frames=n_frames, n_detected=int(np.sum(result["header_valid"])), n_valid=int(np.sum(result["crc_valid"])),
+                n_bit_errors=int(np.sum(result["bit_errors"])))
+
+
+def _init_worker(counter, cores):
+    # pin each worker on its own core, the blocks of its flowgraph then share this core
+    if cores:
+        with counter.get_lock():
+            idx = counter.value
+            counter.value += 1
+        os.sched_setaffinity(0, {cores[idx % len(cores)]})
+
+
+def _run_timed(run_point, point, seed, n_frames):
+    # result of the point with its seed and its runtime in seconds
+    start_time = time.time()
+    result = run_point(point, seed, n_frames)
+    return dict(result, seed=seed, runtime=time.time() - start_time)
+
+
+def print_progress(done, total, point, result):
+    print("[{}/{}] {}: {}".format(done, total, ", ".join("{}={}".format(k, v) for k, v in point.items()), result), file=sys.stderr, flush=True)
+
+
+def run_sweep(grid, n_frames, base_seed=0, run_point=simulate_point, n_workers=None, pin_cores=True, progress=print_progress):
+    """
+    Run run_point(point, seed, n_frames) for each point of the grid in a pool of n_workers processes (one per core
+    available by default), pinned to distinct cores if pin_cores. progress(done, total, point, result) is called as
+    the points complete.
+
+    Returns the list of (point, result) in the order of grid_points(grid), each result completed with the seed of its
+    point (seed) and its runtime in seconds (runtime).
+    """
+    points = grid_points(grid)
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+    if n_workers is None:
+        n_workers = len(cores) if cores else os.cpu_count()
+    counter = multiprocessing.Value("i", 0)
+
+    results = [None] * len(points)
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(counter, cores if pin_cores else None)) as executor:
+        futures = {executor.submit(_run_timed, run_point, point, point_seed(base_seed, point), n_frames): i for i, point in enumerate(points)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            results[i] = future.result()
+            if progress:
+                progress(done, len(points), points[i], results[i])
+    return list(zip(points, results))
+
+
+def error_rates(results):
+    """
+    Frame error rates of the results of run_sweep: over the detected frames (nan if none), and over all the frames sent
+    """
+    fer = np.array([1 - r["n_valid"] / r["n_detected"] if r["n_detected"] else np.nan for _, r in results])
+    glob_fer = np.array([1 - r["n_valid"] / r["n_frames"] for _, r in results])
+    return fer, glob_fer
+
+
+if __name__ == "__main__":
+    # e.g. python sweep.py '{"snr": [-10, -8, -6], "sf": [7, 8], "soft_decoding": [false, true]}' 100
+    grid = json.loads(sys.argv[1])
+    n_frames = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    start_time = time.time()
+    results = run_sweep(grid, n_frames)
+    fer, glob_fer = error_rates(results)
+    for (point, _), f, g in zip(results, fer, glob_fer):
+        print(point, "FER {:.4f}, FER including frame miss {:.4f}".format(f, g))
+    print("--- Simulation time: %s seconds ---" % (time.time() - start_time))
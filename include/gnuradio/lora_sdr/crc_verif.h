@@ -45,8 +45,14 @@ namespace gr {
        * constructor is in a private implementation
        * class. lora_sdr::crc_verif::make is the public interface for
        * creating new instances.
+       *
+       * \param print_rx_msg print the received payloads
+       * \param output_crc_check output a stream with the result of the CRC check
+       * \param pdu publish the payloads as PDUs, a pair of the frame info dictionary
+       *            (with "crc_valid" if the frame has a CRC) and a u8vector of the bytes.
+       *            Otherwise they are published as symbols, which are never freed by pmt.
        */
-      static sptr make(bool print_rx_msg, bool output_crc_check);
+      static sptr make(bool print_rx_msg, bool output_crc_check, bool pdu = false);
     };
 
   } // namespace lora_sdr
@@ -45,8 +45,14 @@ namespace gr {
        * constructor is in a private implementation
        * class. lora_sdr::fft_demod::make is the public interface for
        * creating new instances.
+       *
+       * \param soft_decoding output LLRs instead of the symbol values
+       * \param max_log_approx use the max-log approximation to compute the LLRs
+       * \param fft_backend FFT library used for the demodulation (0: bundled kiss_fft, 1: GNU Radio gr::fft/FFTW)
+       * \param log_i0_kernel approximation of log(I0) used to compute the log-likelihoods in soft decoding (0: boost, 1: polynomial, 2: table, 3: asymptotic expansion)
+       * \param soft_format format of the soft output (0: MAX_SF doubles per symbol, 1: one float per used bit, 2: one int8 per used bit, scaled per block to the int8 range)
        */
-      static sptr make(bool soft_decoding, bool max_log_approx);
+      static sptr make(bool soft_decoding, bool max_log_approx, uint8_t fft_backend = 0, uint8_t log_i0_kernel = 0, uint8_t soft_format = 0);
     };
 
   } // namespace lora_sdr
@@ -0,0 +1,71 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2022 Tapparel Joachim @EPFL,TCL.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifndef INCLUDED_LORA_SDR_FRAME_DECODER_H
+#define INCLUDED_LORA_SDR_FRAME_DECODER_H
+
+#include <gnuradio/lora_sdr/api.h>
+#include <gnuradio/block.h>
+
+namespace gr {
+  namespace lora_sdr {
+
+    /*!
+     * \brief Decoding of the frames demodulated by fft_demod, replacing the chain gray_mapping, deinterleaver,
+     * hamming_dec, header_decoder, dewhitening and crc_verif.
+     * Each block of symbols (or LLRs in soft decoding) is decoded to its nibbles in one pass, the header is checked
+     * and published on the "frame_info" port for frame_sync, and once all the nibbles of the payload are received
+     * the frame is dewhitened, its CRC verified and the payload output on the stream (tagged with the frame
+     * information) and on the "msg" port, as crc_verif does.
+     * \ingroup lora_sdr
+     *
+     */
+    class LORA_SDR_API frame_decoder : virtual public gr::block
+    {
+     public:
+      typedef std::shared_ptr<frame_decoder> sptr;
+
+      /*!
+       * \brief Return a shared_ptr to a new instance of lora_sdr::frame_decoder.
+       *
+       * To avoid accidental use of raw pointers, lora_sdr::frame_decoder's
+       * constructor is in a private implementation
+       * class. lora_sdr::frame_decoder::make is the public interface for
+       * creating new instances.
+       *
+       * \param impl_head use implicit header mode
+       * \param cr coding rate of the implicit header mode
+       * \param pay_len payload length of the implicit header mode
+       * \param has_crc presence of a payload CRC in implicit header mode
+       * \param ldro_mode low datarate optimisation mode (0: disable, 1: enable, 2: auto), published with the header
+       * \param print_header print the header information in the terminal
+       * \param print_payload print the received payloads in the terminal
+       * \param soft_decoding decode the LLRs of fft_demod instead of its hard symbol values
+       * \param soft_format format of the soft values output by fft_demod, see soft_format
+       * \param pdu publish the payloads as PDUs (frame info dictionary, u8vector) instead of symbols
+       */
+      static sptr make(bool impl_head, uint8_t cr, uint32_t pay_len, bool has_crc, uint8_t ldro_mode, bool print_header, bool print_payload,
+                       bool soft_decoding, uint8_t soft_format = 0, bool pdu = false);
+    };
+
+  } // namespace lora_sdr
+} // namespace gr
+
+#endif /* INCLUDED_LORA_SDR_FRAME_DECODER_H */
@@ -0,0 +1,80 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2022 Tapparel Joachim @EPFL,TCL.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifndef INCLUDED_LORA_SDR_FRAME_ENCODER_H
+#define INCLUDED_LORA_SDR_FRAME_ENCODER_H
+
+#include <gnuradio/lora_sdr/api.h>
+#include <gnuradio/sync_block.h>
+
+namespace gr {
+  namespace lora_sdr {
+
+    /*!
+     * \brief Encoding of the payloads received as messages into the symbol values of their frames,
+     * replacing the chain whitening, header, add_crc, hamming_enc, interleaver and gray_demap.
+     * Each frame is encoded in one pass and output with a "frame_len" tag on its first symbol, as
+     * expected by modulate. All the frames waiting are output in the same call if they fit.
+     * \ingroup lora_sdr
+     *
+     */
+    class LORA_SDR_API frame_encoder : virtual public gr::sync_block
+    {
+     public:
+      typedef std::shared_ptr<frame_encoder> sptr;
+
+      virtual void set_cr(uint8_t cr) = 0;
+      virtual uint8_t get_cr() = 0;
+      virtual void set_sf(uint8_t sf) = 0;
+
+      /*!
+       * \brief Return a shared_ptr to a new instance of lora_sdr::frame_encoder.
+       *
+       * To avoid accidental use of raw pointers, lora_sdr::frame_encoder's
+       * constructor is in a private implementation
+       * class. lora_sdr::frame_encoder::make is the public interface for
+       * creating new instances.
+       *
+       * \param sf spreading factor
+       * \param cr coding rate
+       * \param has_crc append the payload CRC
+       * \param impl_head use implicit header mode
+       * \param ldro_mode low datarate optimisation mode (0: disable, 1: enable, 2: auto)
+       * \param bw bandwidth, used by the auto ldro mode
+       */
+      static sptr make(uint8_t sf, uint8_t cr, bool has_crc, bool impl_head, uint8_t ldro_mode = 2, uint32_t bw = 125000);
+
+      /*!
+       * \brief Return the symbol values of the frame of a payload, as output by this block.
+       *
+       * \param payload the payload bytes (at most 255)
+       * \param sf spreading factor
+       * \param cr coding rate
+       * \param has_crc append the payload CRC
+       * \param impl_head use implicit header mode
+       * \param ldro use the low datarate optimisation
+       */
+      static std::vector<uint32_t> encode(const std::vector<uint8_t> &payload, uint8_t sf, uint8_t cr, bool has_crc, bool impl_head, bool ldro);
+    };
+
+  } // namespace lora_sdr
+} // namespace gr
+
+#endif /* INCLUDED_LORA_SDR_FRAME_ENCODER_H */
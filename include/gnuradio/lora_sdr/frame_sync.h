@@ -29,7 +29,18 @@ namespace gr {
   namespace lora_sdr {
 
     /*!
-     * \brief <+description of block+>
+     * \brief Preamble detection, CFO and STO estimation and correction.
+     *
+     * Each call to general_work processes all the complete symbols of its input, including the
+     * state transitions, and outputs the downsampled symbols of the frames contiguously. A call
+     * stops before the next "new_frame" input tag, when the output is full, or once the 8 symbols of
+     * the explicit header have been output, until its frame_info message is received from the
+     * header_decoder. With inline_header, the explicit header is instead decoded by this block as
+     * soon as its 8 symbols are received, and the frame_info messages are only used to measure the
+     * wait this removes. A "frame_info" tag is placed on the first output item of each frame (its
+     * header), and on the first payload item once the header has been received; a call may hold
+     * several frames, each with its own tag. The header tag holds the index of the input sample
+     * where the header starts ("sample_offset"), locating the frame in the received stream.
      * \ingroup lora_sdr
      *
      */
@@ -45,8 +56,47 @@ namespace gr {
        * constructor is in a private implementation
        * class. lora_sdr::frame_sync::make is the public interface for
        * creating new instances.
+       *
+       * \param energy_gate threshold in dB of the energy of a symbol window over the noise floor
+       *        to run the FFT based preamble search on it, 0 to search every window. The noise floor
+       *        is received on the noise_est message port (noise power per sample) or tracked on the
+       *        windows below the threshold, starting from the quietest of the first windows (all searched).
+       * \param inline_header decode the explicit header (hard decision) in this block instead of waiting
+       *        for the frame_info message of the header_decoder
+       * \param ldro_mode low datarate optimisation mode of the frames, used with inline_header
+       */
+      static sptr make(uint32_t center_freq, uint32_t bandwidth, uint8_t sf, bool impl_head, std::vector<uint16_t> sync_word, uint8_t os_factor, uint16_t preamble_len = 8, uint8_t fft_backend = 0, float energy_gate = 0, bool inline_header = false, uint8_t ldro_mode = 2);
+
+      /*!
+       * \brief Number of symbol windows received while looking for a preamble
+       */
+      virtual uint64_t detect_windows() const = 0;
+
+      /*!
+       * \brief Number of these windows on which the FFT based preamble search was run
+       */
+      virtual uint64_t searched_windows() const = 0;
+
+      /*!
+       * \brief Number of times the energy gate opened without a preamble being detected
+       */
+      virtual uint64_t gate_false_alarms() const = 0;
+
+      /*!
+       * \brief Number of times the energy gate closed on a run of consecutive upchirps too short to be detected
+       */
+      virtual uint64_t gate_misses() const = 0;
+
+      /*!
+       * \brief Number of explicit headers decoded by this block (inline_header)
+       */
+      virtual uint64_t inline_headers() const = 0;
+
+      /*!
+       * \brief Mean time in microseconds between the inline decoding of a header and the reception of
+       * its frame_info message from the header_decoder, i.e. the wait removed before the payload output
        */
-      static sptr make(uint32_t center_freq, uint32_t bandwidth, uint8_t sf, bool impl_head, std::vector<uint16_t> sync_word, uint8_t os_factor, uint16_t preamble_len);
+      virtual double header_latency_saved() const = 0;
     };
 
   } // namespace lora_sdr
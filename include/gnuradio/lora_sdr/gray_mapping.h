@@ -45,8 +45,11 @@ namespace gr {
        * constructor is in a private implementation
        * class. lora_sdr::gray_mapping::make is the public interface for
        * creating new instances.
+       *
+       * \param soft_decoding work on soft values (LLRs) instead of hard bits
+       * \param soft_format format of the soft values, see soft_format (0: double, 1: float, 2: int8 scaled per block)
        */
-      static sptr make( bool soft_decoding);
+      static sptr make(bool soft_decoding, uint8_t soft_format = 0);
     };
 
   } // namespace lora_sdr
@@ -0,0 +1,68 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2022 Tapparel Joachim @EPFL,TCL.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifndef INCLUDED_LORA_SDR_MULTI_SF_DETECTOR_H
+#define INCLUDED_LORA_SDR_MULTI_SF_DETECTOR_H
+
+#include <gnuradio/lora_sdr/api.h>
+#include <gnuradio/block.h>
+
+namespace gr {
+  namespace lora_sdr {
+
+    /*!
+     * \brief Preamble detection for several spreading factors on a single stream of samples.
+     * The input is decimated once and searched for the preamble upchirps of every spreading factor.
+     * The samples of a detected frame, starting one symbol before its preamble, are forwarded to
+     * the output of its spreading factor, to be synchronized and decoded by a frame_sync and the
+     * receiver chain of this spreading factor. Nothing is output between frames.
+     * \ingroup lora_sdr
+     *
+     */
+    class LORA_SDR_API multi_sf_detector : virtual public gr::block
+    {
+     public:
+      typedef std::shared_ptr<multi_sf_detector> sptr;
+
+      /*!
+       * \brief Return a shared_ptr to a new instance of lora_sdr::multi_sf_detector.
+       *
+       * To avoid accidental use of raw pointers, lora_sdr::multi_sf_detector's
+       * constructor is in a private implementation
+       * class. lora_sdr::multi_sf_detector::make is the public interface for
+       * creating new instances.
+       *
+       * \param bandwidth bandwidth of the signal
+       * \param sfs spreading factors to detect, output i forwards the frames of sfs[i]
+       * \param impl_head use implicit header mode
+       * \param os_factor oversampling factor of the input
+       * \param preamble_len number of upchirps in the preamble
+       * \param fft_backend FFT library used, see fft_backend
+       *
+       * The header_decoder of output i should be connected to the message input frame_info<i>,
+       * the end of the frame is then known from its header instead of its maximal length.
+       */
+      static sptr make(uint32_t bandwidth, std::vector<uint8_t> sfs, bool impl_head, uint8_t os_factor, uint16_t preamble_len = 8, uint8_t fft_backend = 0);
+    };
+
+  } // namespace lora_sdr
+} // namespace gr
+
+#endif /* INCLUDED_LORA_SDR_MULTI_SF_DETECTOR_H */
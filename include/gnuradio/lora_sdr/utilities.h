@@ -45,6 +45,26 @@ namespace gr {
             ENABLE,
             AUTO
         };
+        enum fft_backend {
+            KISS_FFT,   ///< bundled kiss_fft
+            GR_FFT      ///< GNU Radio gr::fft (FFTW), with wisdom stored on disk
+        };
+        enum soft_format {
+            SOFT_DOUBLE,    ///< MAX_SF LLR per symbol, reference format
+            SOFT_FLOAT,     ///< one float per used bit
+            SOFT_INT8       ///< one int8_t per used bit, each block scaled to the int8 range
+        };
+        /**
+         *  \brief  return the size in bytes of one soft value in the given soft_format
+         */
+        inline size_t soft_value_size(uint8_t format)
+        { return format == SOFT_INT8 ? sizeof(int8_t) : (format == SOFT_FLOAT ? sizeof(float) : sizeof(LLR)); }
+        /**
+         *  \brief  return the size in bytes of the soft stream items between fft_demod and deinterleaver.
+         *          An item holds a whole symbol in SOFT_DOUBLE and a single bit in the compact formats.
+         */
+        inline size_t soft_symbol_item_size(uint8_t format)
+        { return format == SOFT_DOUBLE ? MAX_SF * sizeof(LLR) : soft_value_size(format); }
         /**
          *  \brief  return the modulus a%b between 0 and (b-1)
          */
@@ -128,6 +148,25 @@ namespace gr {
             //     upchirp[n] =  gr_complex(0.9f, 0.0f)*gr_expj(2.0 * M_PI * (n*n/(2*N)-0.5*n));
             //     downchirp[n] = gr_complex(0.9f, 0.0f)*gr_expj(-2.0 * M_PI * (n*n/(2*N)-0.5*n));
             // }
+        }
+        /**
+         *  \brief  Return exp(j*2*pi*cycles*n) for n in [0,length), computed with a phase recursion instead of a complex exponential per sample
+         *
+         *  \param  rotator
+         *          The pointer to the output vector
+         *  \param  cycles
+         *          The frequency in cycles per sample
+         *  \param  length
+         *          The number of samples
+         */
+        inline void build_rotator(gr_complex* rotator, double cycles, uint32_t length){
+            // the recursion is done in double precision, its error stays far below the float resolution for the lengths used
+            std::complex<double> phasor(1.0, 0.0);
+            const std::complex<double> step = std::polar(1.0, 2.0 * M_PI * cycles);
+            for (uint32_t n = 0; n < length; n++){
+                rotator[n] = gr_complex(phasor);
+                phasor *= step;
+            }
         }
          // find most frequency number in vector
         inline int most_frequent(int arr[], int n)
@@ -100,9 +100,17 @@ namespace gr
                     {
                         nitems_to_process = std::min(tags[1].offset - tags[0].offset, (uint64_t)noutput_items);
                     }
-                    std::string str = pmt::symbol_to_string(tags[0].value);
-                    
-                    std::copy(str.begin(), str.end(), std::back_inserter(m_payload));
+                    if (pmt::is_u8vector(tags[0].value))
+                    {
+                        size_t len;
+                        const uint8_t *bytes = pmt::u8vector_elements(tags[0].value, len);
+                        m_payload.insert(m_payload.end(), bytes, bytes + len);
+                    }
+                    else
+                    {
+                        std::string str = pmt::symbol_to_string(tags[0].value);
+                        std::copy(str.begin(), str.end(), std::back_inserter(m_payload));
+                    }
                     //pass tags downstream
                     get_tags_in_window(tags, 0, 0, ninput_items[0], pmt::string_to_symbol("frame_len"));
                     m_frame_len = pmt::to_long(tags[0].value);
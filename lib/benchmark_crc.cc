@@ -0,0 +1,128 @@
+/* Benchmark of the payload CRC verification of crc_verif.
+ *
+ * Measures the throughput in bytes/s of the previous bit by bit CRC16 and of the slicing-by-8 table CRC16,
+ * then of the whole framing of crc_verif: the previous vector buffer (byte per byte append, erase from the front,
+ * string built one char at a time) against the ring buffer with bulk copies.
+ * The frames are fed in chunks, as the header_decoder and dewhitening blocks output them.
+ *
+ * Usage: benchmark_crc [payload_len] [n_frames] [chunk_len]
+ */
+#include "crc16.h"
+#include <chrono>
+#include <cstdlib>
+#include <iostream>
+#include <random>
+#include <string>
+
+using namespace gr::lora_sdr;
+
+namespace {
+  /**
+   *  \brief  Previous implementation of crc_verif_impl::crc16, one bit at a time
+   */
+  unsigned int crc16_bitwise(uint8_t *data, uint32_t len)
+  {
+    uint16_t crc = 0x0000;
+    for (unsigned int i = 0; i < len; i++)
+    {
+      uint8_t newByte = data[i];
+      for (unsigned char i = 0; i < 8; i++)
+      {
+        if (((crc & 0x8000) >> 8) ^ (newByte & 0x80))
+          crc = (crc << 1) ^ 0x1021;
+        else
+          crc = (crc << 1);
+        newByte <<= 1;
+      }
+    }
+    return crc;
+  }
+
+  double seconds_since(std::chrono::steady_clock::time_point start)
+  {
+    return std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+  }
+} // namespace
+
+int main(int argc, char **argv)
+{
+  uint32_t payload_len = argc > 1 ? atoi(argv[1]) : 255;
+  int n_frames = argc > 2 ? atoi(argv[2]) : 100000;
+  uint32_t chunk_len = argc > 3 ? atoi(argv[3]) : 64;
+  uint32_t frame_len = payload_len + 2;
+
+  std::mt19937 gen(1);
+  std::vector<uint8_t> stream((size_t)n_frames * frame_len);
+  for (auto &b : stream)
+    b = gen();
+  double n_bytes = stream.size();
+  volatile uint32_t sink = 0; // keep the results alive
+
+  std::cout << n_frames << " frames of " << payload_len << " bytes, fed by chunks of " << chunk_len << " bytes" << std::endl;
+
+  // CRC alone
+  auto start = std::chrono::steady_clock::now();
+  for (int f = 0; f < n_frames; f++)
+    sink = sink + crc16_bitwise(&stream[(size_t)f * frame_len], payload_len);
+  double t_bitwise = seconds_since(start);
+  start = std::chrono::steady_clock::now();
+  for (int f = 0; f < n_frames; f++)
+    sink = sink + crc16(&stream[(size_t)f * frame_len], payload_len);
+  double t_table = seconds_since(start);
+  std::cout << "crc16 bit by bit:        " << n_bytes / t_bitwise / 1e6 << " MB/s" << std::endl;
+  std::cout << "crc16 slicing-by-8:      " << n_bytes / t_table / 1e6 << " MB/s (x" << t_bitwise / t_table << ")" << std::endl;
+
+  // previous framing
+  start = std::chrono::steady_clock::now();
+  {
+    std::vector<uint8_t> in_buff;
+    std::vector<uint8_t> out(payload_len);
+    std::string message_str;
+    for (size_t pos = 0; pos < stream.size(); pos += chunk_len)
+    {
+      size_t n = std::min((size_t)chunk_len, stream.size() - pos);
+      for (size_t i = 0; i < n; i++)
+        in_buff.push_back(stream[pos + i]);
+      while (in_buff.size() >= frame_len)
+      {
+        uint16_t crc = crc16_bitwise(&in_buff[0], payload_len - 2) ^ in_buff[payload_len - 1] ^ (in_buff[payload_len - 2] << 8);
+        message_str.clear();
+        for (uint32_t i = 0; i < payload_len; i++)
+        {
+          char m_char = (char)in_buff[i];
+          message_str = message_str + m_char;
+          out[i] = in_buff[i];
+        }
+        sink = sink + ((in_buff[payload_len] + (in_buff[payload_len + 1] << 8)) == crc) + message_str.size();
+        in_buff.erase(in_buff.begin(), in_buff.begin() + frame_len);
+      }
+    }
+  }
+  double t_vector = seconds_since(start);
+
+  // ring buffer framing, as in crc_verif
+  start = std::chrono::steady_clock::now();
+  {
+    byte_ring_buffer in_buff(4096);
+    std::vector<uint8_t> out(payload_len), frame(frame_len);
+    std::string message_str;
+    for (size_t pos = 0; pos < stream.size(); pos += chunk_len)
+    {
+      size_t n = std::min((size_t)chunk_len, stream.size() - pos);
+      in_buff.push(&stream[pos], n);
+      while (in_buff.size() >= frame_len)
+      {
+        in_buff.peek(&frame[0], frame_len);
+        in_buff.pop(frame_len);
+        message_str.assign((const char *)&frame[0], payload_len);
+        memcpy(&out[0], &frame[0], payload_len);
+        uint16_t crc = crc16(&frame[0], payload_len - 2) ^ frame[payload_len - 1] ^ (frame[payload_len - 2] << 8);
+        sink = sink + ((frame[payload_len] + (frame[payload_len + 1] << 8)) == crc) + message_str.size();
+      }
+    }
+  }
+  double t_ring = seconds_since(start);
+  std::cout << "framing, vector buffer:  " << n_bytes / t_vector / 1e6 << " MB/s, " << t_vector / n_frames * 1e6 << " us/frame" << std::endl;
+  std::cout << "framing, ring buffer:    " << n_bytes / t_ring / 1e6 << " MB/s, " << t_ring / n_frames * 1e6 << " us/frame (x" << t_vector / t_ring << ")" << std::endl;
+  return 0;
+}
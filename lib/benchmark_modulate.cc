@@ -0,0 +1,61 @@
+/* Benchmark of the generation of the lora symbols by modulate.
+ *
+ * Measures the samples/s of the previous per sample computation of each symbol (build_upchirp)
+ * and of the chirp bank, and the largest deviation between the two waveforms.
+ *
+ * Usage: benchmark_modulate [sf] [os_factor] [n_symbols]
+ */
+#include "chirp_bank.h"
+#include <chrono>
+#include <cstdlib>
+#include <iostream>
+#include <random>
+
+using namespace gr::lora_sdr;
+
+namespace {
+  double seconds_since(std::chrono::steady_clock::time_point start)
+  {
+    return std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+  }
+} // namespace
+
+int main(int argc, char **argv)
+{
+  uint8_t sf = argc > 1 ? atoi(argv[1]) : 7;
+  uint8_t os_factor = argc > 2 ? atoi(argv[2]) : 4;
+  int n_symbols = argc > 3 ? atoi(argv[3]) : 10000;
+
+  auto start = std::chrono::steady_clock::now();
+  std::shared_ptr<const chirp_bank> bank = chirp_bank::get(sf, os_factor);
+  double t_init = seconds_since(start);
+  uint32_t sps = bank->samples_per_symbol();
+
+  std::mt19937 gen(1);
+  std::vector<uint32_t> symbols(n_symbols);
+  for (auto &s : symbols)
+    s = gen() % (1u << sf);
+  std::vector<gr_complex> out_ref((size_t)n_symbols * sps), out_bank((size_t)n_symbols * sps);
+
+  start = std::chrono::steady_clock::now();
+  for (int i = 0; i < n_symbols; i++)
+    build_upchirp(&out_ref[(size_t)i * sps], symbols[i], sf, os_factor);
+  double t_ref = seconds_since(start);
+  start = std::chrono::steady_clock::now();
+  for (int i = 0; i < n_symbols; i++)
+    bank->symbol(&out_bank[(size_t)i * sps], symbols[i]);
+  double t_bank = seconds_since(start);
+
+  float max_err = 0;
+  for (size_t n = 0; n < out_ref.size(); n++)
+    max_err = std::max(max_err, std::abs(out_ref[n] - out_bank[n]));
+
+  double n_samples = out_ref.size();
+  std::cout << "sf " << (int)sf << ", os_factor " << (int)os_factor << ", " << n_symbols << " symbols, "
+            << (((uint64_t)sps << sf) <= chirp_bank::MAX_TABLE_SAMPLES ? "full table" : "shifted upchirp") << std::endl;
+  std::cout << "bank construction:  " << t_init * 1e3 << " ms" << std::endl;
+  std::cout << "build_upchirp:      " << n_samples / t_ref / 1e6 << " Msamples/s" << std::endl;
+  std::cout << "chirp bank:         " << n_samples / t_bank / 1e6 << " Msamples/s (x" << t_ref / t_bank << ")" << std::endl;
+  std::cout << "max deviation:      " << max_err << std::endl;
+  return 0;
+}
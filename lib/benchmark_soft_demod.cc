@@ -0,0 +1,104 @@
+/* Benchmark of the soft-decision demodulation kernels of fft_demod.
+ *
+ * For random lora symbols in AWGN, measures the time spent per symbol computing the
+ * log-likelihoods and LLRs with each log(I0) kernel, the largest deviation of the LLRs
+ * from the boost reference, and the uncoded bit error rate of the LLRs signs.
+ * The frame error rate of the complete receiver is measured by apps/simulation/soft_demod_benchmark.py.
+ *
+ * Usage: benchmark_soft_demod [sf] [n_symbols] [snr_min_dB] [snr_max_dB]
+ */
+#include "fft_plan.h"
+#include "soft_demap.h"
+#include <chrono>
+#include <cmath>
+#include <cstdlib>
+#include <iostream>
+#include <random>
+#if defined(__x86_64__) || defined(__i386__)
+#include <x86intrin.h>
+#define TICKS_UNIT "cycles"
+static inline uint64_t ticks() { return __rdtsc(); }
+#else
+#define TICKS_UNIT "ns"
+static inline uint64_t ticks()
+{
+    return std::chrono::duration_cast<std::chrono::nanoseconds>(std::chrono::steady_clock::now().time_since_epoch()).count();
+}
+#endif
+
+using namespace gr::lora_sdr;
+
+int main(int argc, char **argv)
+{
+    uint8_t sf = argc > 1 ? atoi(argv[1]) : 12;
+    int n_symbols = argc > 2 ? atoi(argv[2]) : 2000;
+    int snr_min = argc > 3 ? atoi(argv[3]) : -25;
+    int snr_max = argc > 4 ? atoi(argv[4]) : -5;
+    uint32_t N = 1u << sf;
+    const char *kernel_names[] = {"boost", "poly", "table", "asymptotic"};
+
+    std::mt19937 gen(1);
+    std::uniform_int_distribution<uint32_t> rand_symb(0, N - 1);
+    std::normal_distribution<float> noise(0, std::sqrt(0.5));
+    fft_plan::sptr fft = fft_plan_registry::instance().get(N, true, KISS_FFT);
+    std::vector<float> fft_mag_sq(N), bessel_arg(N);
+    std::vector<double> LLs(N), work(2 * N);
+    std::vector<LLR> LLRs(MAX_SF), LLRs_ref(MAX_SF);
+
+    std::cout << "sf " << (int)sf << ", " << n_symbols << " symbols per SNR, time in " << TICKS_UNIT << " per symbol" << std::endl;
+    for (int max_log = 1; max_log >= 0; max_log--)
+    {
+        std::cout << (max_log ? "max-log LLRs" : "exact LLRs") << std::endl;
+        for (int snr = snr_min; snr <= snr_max; snr += 5)
+        {
+            float amp = std::pow(10, snr / 20.0);
+            std::vector<uint64_t> time(4, 0), bit_errors(4, 0);
+            std::vector<double> max_dev(4, 0);
+            for (int k = 0; k < n_symbols; k++)
+            {
+                // dechirped symbol in AWGN
+                uint32_t bin = rand_symb(gen);
+                for (uint32_t n = 0; n < N; n++)
+                    fft->get_inbuf()[n] = amp * gr_expj(2 * M_PI * bin * n / N) + gr_complex(noise(gen), noise(gen));
+                fft->execute();
+                volk_32fc_magnitude_squared_32f(&fft_mag_sq[0], fft->get_outbuf(), N);
+
+                // signal and noise power estimation, as in fft_demod
+                uint32_t idx = std::max_element(fft_mag_sq.begin(), fft_mag_sq.end()) - fft_mag_sq.begin();
+                double signal_energy = 0, noise_energy = 0;
+                for (uint32_t n = 0; n < N; n++)
+                {
+                    if (mod(std::abs((int)n - (int)idx), N - 1) < 2)
+                        signal_energy += fft_mag_sq[n];
+                    else
+                        noise_energy += fft_mag_sq[n];
+                }
+                double Ps = signal_energy / N, Pn = noise_energy / (N - 3);
+                uint32_t value = mod(bin - 1, N);
+                value = value ^ (value >> 1);
+
+                for (int kernel = 0; kernel < 4; kernel++)
+                {
+                    uint64_t start = ticks();
+                    volk_32f_sqrt_32f(&bessel_arg[0], &fft_mag_sq[0], N);
+                    volk_32f_s32f_multiply_32f(&bessel_arg[0], &bessel_arg[0], std::sqrt(Ps * N) / Pn, N);
+                    log_bessel_i0(&bessel_arg[0], &LLs[0], N, kernel);
+                    compute_LLRs(&LLs[0], sf, false, max_log, &LLRs[0], &work[0]);
+                    time[kernel] += ticks() - start;
+
+                    if (kernel == LOG_I0_BOOST)
+                        LLRs_ref = LLRs;
+                    for (int i = 0; i < sf; i++)
+                    {
+                        max_dev[kernel] = std::max(max_dev[kernel], std::abs(LLRs[sf - 1 - i] - LLRs_ref[sf - 1 - i]));
+                        bit_errors[kernel] += (LLRs[sf - 1 - i] > 0) != (bool)(value & (1u << i));
+                    }
+                }
+            }
+            for (int kernel = 0; kernel < 4; kernel++)
+                std::cout << "  SNR " << snr << " dB, " << kernel_names[kernel] << ": " << time[kernel] / n_symbols << " " << TICKS_UNIT
+                          << ", max |LLR - LLR_boost| " << max_dev[kernel] << ", BER " << (double)bit_errors[kernel] / n_symbols / sf << std::endl;
+        }
+    }
+    return 0;
+}
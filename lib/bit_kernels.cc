@@ -0,0 +1,305 @@
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include "bit_kernels.h"
+#include "crc16.h"
+#include "tables.h"
+#include <cmath>
+#include <type_traits>
+
+namespace gr {
+  namespace lora_sdr {
+
+    namespace {
+      struct hamming_tables {
+        uint8_t enc[4][256];
+        uint8_t dec[4][256];
+        float signs[4][8][16];  ///< sign of the bit j of the candidate k, transposed so that the candidates are contiguous
+        uint8_t soft_nibbles[16]; ///< data nibble of each candidate
+
+        hamming_tables()
+        {
+          for (uint8_t cr = 1; cr <= 4; cr++)
+          {
+            for (uint32_t x = 0; x < 256; x++)
+            {
+              enc[cr - 1][x] = encode(x, cr);
+              dec[cr - 1][x] = decode(x, cr);
+            }
+            // candidates ordered by their data bits msb first, the first one wins in case of equal scores
+            uint8_t cw_len = cr + 4;
+            for (uint8_t k = 0; k < 16; k++)
+            {
+              uint8_t nibble = (k & 1) << 3 | (k & 2) << 1 | (k & 4) >> 1 | (k & 8) >> 3;
+              soft_nibbles[k] = nibble;
+              for (uint8_t j = 0; j < 8; j++)
+                signs[cr - 1][j][k] = j < cw_len ? ((enc[cr - 1][nibble] >> (cw_len - 1 - j)) & 1 ? 1 : -1) : 0;
+            }
+          }
+        }
+
+        /**
+         *  \brief  Reference encoder, filling the tables once
+         */
+        static uint8_t encode(uint8_t data, uint8_t cr)
+        {
+          // data bits msb first
+          bool d0 = data & 8, d1 = data & 4, d2 = data & 2, d3 = data & 1;
+          if (cr != 1)
+          { // need hamming parity bits
+            bool p0 = d3 ^ d2 ^ d1;
+            bool p1 = d2 ^ d1 ^ d0;
+            bool p2 = d3 ^ d2 ^ d0;
+            bool p3 = d3 ^ d1 ^ d0;
+            // we put the data LSB first and append the parity bits
+            return (d3 << 7 | d2 << 6 | d1 << 5 | d0 << 4 | p0 << 3 | p1 << 2 | p2 << 1 | p3) >> (4 - cr);
+          }
+          // coding rate = 4/5 we add a parity bit
+          bool p4 = d0 ^ d1 ^ d2 ^ d3;
+          return d3 << 4 | d2 << 3 | d1 << 2 | d0 << 1 | p4;
+        }
+
+        /**
+         *  \brief  Reference hard decoder, filling the tables once
+         */
+        static uint8_t decode(uint8_t x, uint8_t cr)
+        {
+          uint8_t cw_len = cr + 4;
+          bool c[8];  // codeword bits msb first
+          for (int i = 0; i < cw_len; i++)
+            c[i] = (x >> (cw_len - 1 - i)) & 1;
+          uint8_t data_nibble = c[3] << 3 | c[2] << 2 | c[1] << 1 | c[0];  // reorganized msb-first
+
+          if (cr == 4 && !(std::count(c, c + cw_len, true) % 2))  // Don't correct if even number of errors
+            return data_nibble;
+          if (cr >= 3)
+          {
+            bool s0 = c[0] ^ c[1] ^ c[2] ^ c[4];
+            bool s1 = c[1] ^ c[2] ^ c[3] ^ c[5];
+            bool s2 = c[0] ^ c[1] ^ c[3] ^ c[6];
+            switch (s0 + (s1 << 1) + (s2 << 2))
+            {
+            case 5:
+              data_nibble ^= 0b0001;
+              break;
+            case 7:
+              data_nibble ^= 0b0010;
+              break;
+            case 3:
+              data_nibble ^= 0b0100;
+              break;
+            case 6:
+              data_nibble ^= 0b1000;
+              break;
+            default: // either parity bit wrong or no error
+              break;
+            }
+          }
+          // cr 4/5 and 4/6 only detect errors
+          return data_nibble;
+        }
+      };
+
+      const hamming_tables &get_hamming_tables()
+      {
+        static const hamming_tables tables;
+        return tables;
+      }
+
+      /**
+       *  \brief  Transpose the 8x8 bit matrix whose row k is the byte k of x (Hacker's Delight, 7-3)
+       */
+      inline uint64_t transpose8(uint64_t x)
+      {
+        uint64_t t;
+        t = (x ^ (x >> 7)) & 0x00AA00AA00AA00AAULL;
+        x = x ^ t ^ (t << 7);
+        t = (x ^ (x >> 14)) & 0x0000CCCC0000CCCCULL;
+        x = x ^ t ^ (t << 14);
+        t = (x ^ (x >> 28)) & 0x00000000F0F0F0F0ULL;
+        x = x ^ t ^ (t << 28);
+        return x;
+      }
+
+      inline uint32_t parity(uint32_t x)
+      {
+        x ^= x >> 16;
+        x ^= x >> 8;
+        x ^= x >> 4;
+        x ^= x >> 2;
+        x ^= x >> 1;
+        return x & 1;
+      }
+    } // namespace
+
+    const uint8_t *hamming_enc_table(uint8_t cr)
+    {
+      return get_hamming_tables().enc[cr - 1];
+    }
+
+    const uint8_t *hamming_dec_table(uint8_t cr)
+    {
+      return get_hamming_tables().dec[cr - 1];
+    }
+
+    template <typename T>
+    void hamming_soft_decode(const T *LLRs, uint8_t *nibbles, uint32_t n, uint8_t cr)
+    {
+      // accumulate in double for double LLRs, float otherwise
+      typedef typename std::conditional<std::is_same<T, double>::value, double, float>::type acc_t;
+      const hamming_tables &tables = get_hamming_tables();
+      const float(*signs)[16] = tables.signs[cr - 1];
+      uint8_t cw_len = cr + 4;
+
+      for (uint32_t i = 0; i < n; i++)
+      {
+        const T *cw_LLRs = LLRs + 8 * i;
+        acc_t scores[16] = {0};
+        for (int j = 0; j < cw_len; j++)
+        {
+          acc_t llr = cw_LLRs[j];
+          for (int k = 0; k < 16; k++)
+            scores[k] += signs[j][k] * llr;
+        }
+        nibbles[i] = tables.soft_nibbles[std::max_element(scores, scores + 16) - scores];
+      }
+    }
+
+    template void hamming_soft_decode<double>(const double *, uint8_t *, uint32_t, uint8_t);
+    template void hamming_soft_decode<float>(const float *, uint8_t *, uint32_t, uint8_t);
+    template void hamming_soft_decode<int8_t>(const int8_t *, uint8_t *, uint32_t, uint8_t);
+
+    void interleave_block(const uint8_t *codewords, uint32_t *symbols, uint8_t sf, uint8_t sf_app, uint8_t cw_len, bool add_parity)
+    {
+      // one codeword per row, as MAX_SF rows don't fit in a single 8x8 matrix the rows 8 to 11 are in a second one
+      uint64_t rows[2] = {0, 0};
+      uint8_t cw_mask = (1u << cw_len) - 1;
+      for (int r = 0; r < sf_app; r++)
+        rows[r >> 3] |= (uint64_t)(codewords[r] & cw_mask) << (8 * (r & 7));
+      // after the transpose, byte c holds the bit c of all the codewords
+      uint64_t cols[2] = {transpose8(rows[0]), transpose8(rows[1])};
+
+      uint32_t app_mask = (1u << sf_app) - 1;
+      for (int i = 0; i < cw_len; i++)
+      {
+        // symbol i carries the i-th bit (msb first) of the codewords, shifted by one more codeword at each symbol
+        int c = cw_len - 1 - i;
+        uint32_t col = (uint32_t)((cols[0] >> (8 * c)) & 0xFF) | (uint32_t)((cols[1] >> (8 * c)) & 0xFF) << 8;
+        uint32_t shift = i % sf_app;
+        col = ((col >> shift) | (col << (sf_app - shift))) & app_mask;
+        symbols[i] = col << (sf - sf_app);
+        // For the first bloc we add a parity bit and a zero in the end of the lora symbol(reduced rate)
+        if (add_parity)
+          symbols[i] |= parity(col) << (sf - sf_app - 1);
+      }
+    }
+
+    void deinterleave_block(const uint16_t *symbols, uint8_t *codewords, uint8_t sf_app, uint8_t cw_len)
+    {
+      // undo the diagonal shift of each symbol, the symbol i is stored in row cw_len-1-i so that the codewords come out msb first
+      uint64_t rows[2] = {0, 0};
+      uint32_t app_mask = (1u << sf_app) - 1;
+      for (int i = 0; i < cw_len; i++)
+      {
+        uint32_t symb = symbols[i] & app_mask;
+        uint32_t shift = i % sf_app;
+        symb = ((symb << shift) | (symb >> (sf_app - shift))) & app_mask;
+        int row = cw_len - 1 - i;
+        rows[0] |= (uint64_t)(symb & 0xFF) << (8 * row);
+        rows[1] |= (uint64_t)(symb >> 8) << (8 * row);
+      }
+      uint64_t cols[2] = {transpose8(rows[0]), transpose8(rows[1])};
+      for (int r = 0; r < sf_app; r++)
+        codewords[r] = (cols[r >> 3] >> (8 * (r & 7))) & 0xFF;
+    }
+
+    template <typename T>
+    void deinterleave_soft(const T *in, size_t in_stride, T *out, uint8_t sf_app, uint8_t cw_len)
+    {
+      for (int32_t i = 0; i < cw_len; i++)
+        for (int32_t j = 0; j < int(sf_app); j++)
+          out[mod((i - j - 1), sf_app) * 8 + i] = in[i * in_stride + j];
+    }
+
+    template void deinterleave_soft<double>(const double *, size_t, double *, uint8_t, uint8_t);
+    template void deinterleave_soft<float>(const float *, size_t, float *, uint8_t, uint8_t);
+    template void deinterleave_soft<int8_t>(const int8_t *, size_t, int8_t *, uint8_t, uint8_t);
+
+    uint8_t header_checksum(const uint8_t *header)
+    {
+      bool c4 = (header[0] & 0b1000) >> 3 ^ (header[0] & 0b0100) >> 2 ^ (header[0] & 0b0010) >> 1 ^ (header[0] & 0b0001);
+      bool c3 = (header[0] & 0b1000) >> 3 ^ (header[1] & 0b1000) >> 3 ^ (header[1] & 0b0100) >> 2 ^ (header[1] & 0b0010) >> 1 ^ (header[2] & 0b0001);
+      bool c2 = (header[0] & 0b0100) >> 2 ^ (header[1] & 0b1000) >> 3 ^ (header[1] & 0b0001) ^ (header[2] & 0b1000) >> 3 ^ (header[2] & 0b0010) >> 1;
+      bool c1 = (header[0] & 0b0010) >> 1 ^ (header[1] & 0b0100) >> 2 ^ (header[1] & 0b0001) ^ (header[2] & 0b0100) >> 2 ^ (header[2] & 0b0010) >> 1 ^ (header[2] & 0b0001);
+      bool c0 = (header[0] & 0b0001) ^ (header[1] & 0b0010) >> 1 ^ (header[2] & 0b1000) >> 3 ^ (header[2] & 0b0100) >> 2 ^ (header[2] & 0b0010) >> 1 ^ (header[2] & 0b0001);
+      return (c4 << 4) + (c3 << 3) + (c2 << 2) + (c1 << 1) + c0;
+    }
+
+    uint32_t frame_symb_numb(uint32_t n_nibbles, uint8_t sf, uint8_t cr, bool ldro)
+    {
+      return 8 + std::max((int)std::ceil((double)((int)n_nibbles - sf + 2) / (sf - 2 * ldro)) * (cr + 4), 0);
+    }
+
+    uint32_t encode_frame(const uint8_t *payload, uint32_t len, uint32_t *symbols, uint8_t sf, uint8_t cr, bool has_crc, bool impl_head, bool ldro)
+    {
+      // nibbles of the frame: explicit header, whitened payload (low nibble first) and CRC
+      uint8_t nibbles[5 + 2 * 255 + 4];
+      uint32_t n_nibbles = 0;
+      if (!impl_head)
+      {
+        nibbles[0] = len >> 4;
+        nibbles[1] = len & 0x0F;
+        nibbles[2] = (cr << 1) | has_crc;
+        uint8_t chk = header_checksum(nibbles);
+        nibbles[3] = chk >> 4;
+        nibbles[4] = chk & 0x0F;
+        n_nibbles = 5;
+      }
+      for (uint32_t i = 0; i < len; i++)
+      {
+        uint8_t whitened = payload[i] ^ whitening_seq[i];
+        nibbles[n_nibbles++] = whitened & 0x0F;
+        nibbles[n_nibbles++] = whitened >> 4;
+      }
+      if (has_crc)
+      {
+        // CRC of the N-2 first bytes XORed with the last 2, computed on the payload before whitening
+        uint16_t crc = len >= 2 ? crc16(payload, len - 2) ^ payload[len - 1] ^ (payload[len - 2] << 8) : (len ? payload[0] : 0);
+        nibbles[n_nibbles++] = crc & 0x000F;
+        nibbles[n_nibbles++] = (crc & 0x00F0) >> 4;
+        nibbles[n_nibbles++] = (crc & 0x0F00) >> 8;
+        nibbles[n_nibbles++] = (crc & 0xF000) >> 12;
+      }
+
+      uint32_t n_symb = 0;
+      uint32_t mask = (1u << sf) - 1;
+      for (uint32_t cw_cnt = 0; cw_cnt < n_nibbles || !cw_cnt;)
+      {
+        // the first block carries the header in reduced rate with a coding rate 4/8
+        bool first = !cw_cnt;
+        uint8_t sf_app = (first || ldro) ? sf - 2 : sf;
+        uint8_t cw_len = 4 + (first ? 4 : cr);
+        const uint8_t *enc_table = hamming_enc_table(first ? 4 : cr);
+        uint8_t codewords[MAX_SF] = {0};
+        for (uint32_t i = 0; i < sf_app && cw_cnt + i < n_nibbles; i++)
+          codewords[i] = enc_table[nibbles[cw_cnt + i]];
+        cw_cnt += sf_app;
+
+        interleave_block(codewords, &symbols[n_symb], sf, sf_app, cw_len, first || ldro);
+        for (uint32_t i = n_symb; i < n_symb + cw_len; i++)
+        { // gray demapping, the inverse of x ^ (x >> 1), and shift of 1
+          uint32_t x = symbols[i];
+          x ^= x >> 1;
+          x ^= x >> 2;
+          x ^= x >> 4;
+          x ^= x >> 8;
+          symbols[i] = (x + 1) & mask;
+        }
+        n_symb += cw_len;
+      }
+      return n_symb;
+    }
+
+  } // namespace lora_sdr
+} // namespace gr
@@ -0,0 +1,145 @@
+#ifndef INCLUDED_LORA_SDR_BIT_KERNELS_H
+#define INCLUDED_LORA_SDR_BIT_KERNELS_H
+
+#include <gnuradio/lora_sdr/utilities.h>
+
+namespace gr {
+  namespace lora_sdr {
+
+    /**
+     *  \brief  Return the 256-entry Hamming encoding table of a coding rate.
+     *          Entry x is the codeword of the data nibble in the 4 LSB of x, as output by hamming_enc.
+     *
+     *  \param  cr
+     *          coding rate (1 to 4)
+     */
+    const uint8_t *hamming_enc_table(uint8_t cr);
+
+    /**
+     *  \brief  Return the 256-entry hard Hamming decoding table of a coding rate.
+     *          Entry x is the data nibble of the codeword in the cr+4 LSB of x, after syndrome correction, as output by hamming_dec.
+     *
+     *  \param  cr
+     *          coding rate (1 to 4)
+     */
+    const uint8_t *hamming_dec_table(uint8_t cr);
+
+    /**
+     *  \brief  Soft maximum likelihood decoding of Hamming codewords.
+     *          The 16 possible codewords are scored by the correlation of their +/-1 bit signs with the LLRs,
+     *          computed for each codeword as a product with the precomputed sign matrix of the coding rate.
+     *
+     *  \param  LLRs
+     *          the LLRs of the n codewords, in the first cr+4 of each group of 8 values
+     *  \param  nibbles
+     *          the n output data nibbles, as output by hamming_dec
+     *  \param  n
+     *          number of codewords
+     *  \param  cr
+     *          coding rate (1 to 4)
+     */
+    template <typename T>
+    void hamming_soft_decode(const T *LLRs, uint8_t *nibbles, uint32_t n, uint8_t cr);
+
+    /**
+     *  \brief  Diagonal interleaving of a block of codewords, computed on machine words.
+     *          The codewords are transposed as a bit matrix, each resulting column then only needs a rotation to get its diagonal shift.
+     *
+     *  \param  codewords
+     *          the sf_app codewords, on the cw_len LSB
+     *  \param  symbols
+     *          the cw_len output symbols of sf bits
+     *  \param  sf
+     *          spreading factor
+     *  \param  sf_app
+     *          number of bits per symbol used to carry the codewords (sf or sf-2 in reduced rate)
+     *  \param  cw_len
+     *          length of the codewords
+     *  \param  add_parity
+     *          in reduced rate, set the bit following the sf_app bits of each symbol to their parity
+     */
+    void interleave_block(const uint8_t *codewords, uint32_t *symbols, uint8_t sf, uint8_t sf_app, uint8_t cw_len, bool add_parity);
+
+    /**
+     *  \brief  Inverse of interleave_block, the diagonal shift is removed from each symbol by a rotation before the bit matrix transpose.
+     *
+     *  \param  symbols
+     *          the cw_len received symbols (gray demapped), on the sf_app LSB
+     *  \param  codewords
+     *          the sf_app output codewords, on the cw_len LSB
+     *  \param  sf_app
+     *          number of bits per symbol used to carry the codewords
+     *  \param  cw_len
+     *          length of the codewords
+     */
+    void deinterleave_block(const uint16_t *symbols, uint8_t *codewords, uint8_t sf_app, uint8_t cw_len);
+
+    /**
+     *  \brief  Deinterleave a block of soft values
+     *
+     *  \param  in
+     *          cw_len symbols of sf_app values, [MSB ... LSB], separated by in_stride values
+     *  \param  in_stride
+     *          number of values between the beginning of two symbols
+     *  \param  out
+     *          sf_app codewords, written in the first cw_len of 8 values
+     *  \param  sf_app
+     *          number of bits per symbol used to carry the codewords
+     *  \param  cw_len
+     *          length of the codewords
+     */
+    template <typename T>
+    void deinterleave_soft(const T *in, size_t in_stride, T *out, uint8_t sf_app, uint8_t cw_len);
+
+    /**
+     *  \brief  Return the 5 bit checksum of an explicit header, computed on its first 3 nibbles (payload length, CRC presence and coding rate).
+     *
+     *  \param  header
+     *          the header nibbles
+     */
+    uint8_t header_checksum(const uint8_t *header);
+
+    /**
+     *  \brief  Return the number of symbols of a frame after its preamble, as tagged by the interleaver.
+     *
+     *  \param  n_nibbles
+     *          number of nibbles of the frame (explicit header, payload and CRC)
+     *  \param  sf
+     *          spreading factor
+     *  \param  cr
+     *          coding rate (1 to 4)
+     *  \param  ldro
+     *          use of the low datarate optimisation
+     */
+    uint32_t frame_symb_numb(uint32_t n_nibbles, uint8_t sf, uint8_t cr, bool ldro);
+
+    /**
+     *  \brief  Encode a payload into the symbol values of its frame in one pass, equal to the output of the chain
+     *          whitening, header, add_crc, hamming_enc, interleaver and gray_demap.
+     *          The nibbles are built from the whitening sequence and the table based CRC, then each interleaved block is
+     *          encoded from the Hamming table of its coding rate.
+     *
+     *  \param  payload
+     *          the payload bytes
+     *  \param  len
+     *          the payload length (at most 255 bytes)
+     *  \param  symbols
+     *          the output symbol values, frame_symb_numb() of them
+     *  \param  sf
+     *          spreading factor
+     *  \param  cr
+     *          coding rate (1 to 4)
+     *  \param  has_crc
+     *          append the payload CRC
+     *  \param  impl_head
+     *          use an implicit header (no header nibbles)
+     *  \param  ldro
+     *          use of the low datarate optimisation
+     *  \return the number of symbols written
+     */
+    uint32_t encode_frame(const uint8_t *payload, uint32_t len, uint32_t *symbols, uint8_t sf, uint8_t cr, bool has_crc, bool impl_head, bool ldro);
+
+  } // namespace lora_sdr
+} // namespace gr
+
+#endif /* INCLUDED_LORA_SDR_BIT_KERNELS_H */
@@ -0,0 +1,73 @@
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include "chirp_bank.h"
+#include <map>
+#include <mutex>
+
+namespace gr {
+  namespace lora_sdr {
+
+    std::shared_ptr<const chirp_bank> chirp_bank::get(uint8_t sf, uint8_t os_factor)
+    {
+      // keep the banks only while they are used
+      static std::mutex mutex;
+      static std::map<std::pair<uint8_t, uint8_t>, std::weak_ptr<const chirp_bank>> banks;
+
+      std::lock_guard<std::mutex> lock(mutex);
+      std::weak_ptr<const chirp_bank> &entry = banks[std::make_pair(sf, os_factor)];
+      std::shared_ptr<const chirp_bank> bank = entry.lock();
+      if (!bank)
+      {
+        bank = std::make_shared<const chirp_bank>(sf, os_factor);
+        entry = bank;
+      }
+      return bank;
+    }
+
+    chirp_bank::chirp_bank(uint8_t sf, uint8_t os_factor)
+        : m_sf(sf),
+          m_os_factor(os_factor),
+          m_samples_per_symbol((1u << sf) * os_factor),
+          m_upchirp(m_samples_per_symbol),
+          m_downchirp(m_samples_per_symbol)
+    {
+      build_ref_chirps(&m_upchirp[0], &m_downchirp[0], m_sf, m_os_factor);
+
+      uint32_t N = 1u << m_sf;
+      if ((uint64_t)N * m_samples_per_symbol <= MAX_TABLE_SAMPLES)
+      {
+        m_table.resize((size_t)N * m_samples_per_symbol);
+        for (uint32_t id = 0; id < N; id++)
+          build_upchirp(&m_table[(size_t)id * m_samples_per_symbol], id, m_sf, m_os_factor);
+      }
+      else
+      {
+        m_phases.resize(N);
+        for (uint32_t id = 0; id < N; id++)
+        {
+          // the shifted upchirp starts with the phase 2*pi*(id^2/(2N) - id/2), reduced modulo 1 before the conversion to float
+          double cycles = (double)(((uint64_t)id * id) % (2 * N)) / (2 * N) - 0.5 * (id & 1);
+          m_phases[id] = gr_expj(-2.0 * M_PI * cycles);
+        }
+      }
+    }
+
+    void chirp_bank::symbol(gr_complex *out, uint32_t id) const
+    {
+      if (m_table.size())
+      {
+        memcpy(out, &m_table[(size_t)id * m_samples_per_symbol], m_samples_per_symbol * sizeof(gr_complex));
+        return;
+      }
+      uint32_t shift = id * m_os_factor;
+      memcpy(out, &m_upchirp[shift], (m_samples_per_symbol - shift) * sizeof(gr_complex));
+      memcpy(out + m_samples_per_symbol - shift, &m_upchirp[0], shift * sizeof(gr_complex));
+      gr_complex phase = m_phases[id];
+      for (uint32_t n = 0; n < m_samples_per_symbol; n++)
+        out[n] *= phase;
+    }
+
+  } // namespace lora_sdr
+} // namespace gr
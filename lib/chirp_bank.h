@@ -0,0 +1,63 @@
+#ifndef INCLUDED_LORA_SDR_CHIRP_BANK_H
+#define INCLUDED_LORA_SDR_CHIRP_BANK_H
+
+#include <gnuradio/lora_sdr/utilities.h>
+#include <memory>
+
+namespace gr {
+  namespace lora_sdr {
+
+    /**
+     *  \brief  Precomputed waveforms of the lora symbols for a spreading factor and an oversampling factor.
+     *          The banks are shared by all the blocks using the same parameters.
+     *
+     *  The symbol id is the base upchirp cyclically shifted by id*os_factor samples, rotated by the constant phase
+     *  -2*pi*(id^2/(2N) - id/2). If all the symbols fit in MAX_TABLE_SAMPLES they are rendered once with
+     *  build_upchirp and copied as is, else each symbol is copied from the base upchirp in two parts and
+     *  multiplied by its phase.
+     */
+    class chirp_bank
+    {
+    public:
+      static const uint32_t MAX_TABLE_SAMPLES = 1u << 20; ///< largest table of all the symbols, in samples
+
+      /**
+       *  \brief  Return the bank of the parameters, built on first use
+       *
+       *  \param  sf
+       *          spreading factor
+       *  \param  os_factor
+       *          oversampling factor
+       */
+      static std::shared_ptr<const chirp_bank> get(uint8_t sf, uint8_t os_factor);
+
+      chirp_bank(uint8_t sf, uint8_t os_factor);
+
+      uint32_t samples_per_symbol() const { return m_samples_per_symbol; }
+      const gr_complex *upchirp() const { return &m_upchirp[0]; }
+      const gr_complex *downchirp() const { return &m_downchirp[0]; }
+
+      /**
+       *  \brief  Write the samples_per_symbol() samples of a symbol, as build_upchirp would
+       *
+       *  \param  out
+       *          output samples
+       *  \param  id
+       *          value of the symbol
+       */
+      void symbol(gr_complex *out, uint32_t id) const;
+
+    private:
+      uint8_t m_sf;
+      uint8_t m_os_factor;
+      uint32_t m_samples_per_symbol;
+      std::vector<gr_complex> m_upchirp;   ///< reference upchirp (symbol 0)
+      std::vector<gr_complex> m_downchirp; ///< reference downchirp
+      std::vector<gr_complex> m_table;     ///< all the symbols one after the other, empty if too large
+      std::vector<gr_complex> m_phases;    ///< phase of each symbol relative to the shifted upchirp, when there is no table
+    };
+
+  } // namespace lora_sdr
+} // namespace gr
+
+#endif /* INCLUDED_LORA_SDR_CHIRP_BANK_H */
@@ -0,0 +1,51 @@
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include "crc16.h"
+
+namespace gr {
+  namespace lora_sdr {
+
+    namespace {
+      const int CRC16_SLICES = 8; ///< bytes processed per step
+
+      struct crc16_tables {
+        /// table[k][x]: CRC of the byte x followed by k zero bytes
+        uint16_t table[CRC16_SLICES][256];
+
+        crc16_tables()
+        {
+          for (uint32_t x = 0; x < 256; x++)
+          {
+            uint16_t crc = x << 8;
+            for (int i = 0; i < 8; i++)
+              crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+            table[0][x] = crc;
+          }
+          for (int k = 1; k < CRC16_SLICES; k++)
+            for (uint32_t x = 0; x < 256; x++)
+              table[k][x] = (table[k - 1][x] << 8) ^ table[0][table[k - 1][x] >> 8];
+        }
+      };
+    } // namespace
+
+    uint16_t crc16(const uint8_t *data, size_t len, uint16_t crc)
+    {
+      static const crc16_tables tables;
+      const uint16_t(*t)[256] = tables.table;
+      size_t i = 0;
+      // the CRC register only overlaps the two first bytes of each step
+      for (; i + CRC16_SLICES <= len; i += CRC16_SLICES)
+      {
+        const uint8_t *d = data + i;
+        crc = t[7][d[0] ^ (crc >> 8)] ^ t[6][d[1] ^ (crc & 0xFF)] ^ t[5][d[2]] ^ t[4][d[3]] ^
+              t[3][d[4]] ^ t[2][d[5]] ^ t[1][d[6]] ^ t[0][d[7]];
+      }
+      for (; i < len; i++)
+        crc = (crc << 8) ^ t[0][(crc >> 8) ^ data[i]];
+      return crc;
+    }
+
+  } // namespace lora_sdr
+} // namespace gr
@@ -0,0 +1,91 @@
+#ifndef INCLUDED_LORA_SDR_CRC16_H
+#define INCLUDED_LORA_SDR_CRC16_H
+
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <vector>
+
+namespace gr {
+  namespace lora_sdr {
+
+    /**
+     *  \brief  Calculate the CRC 16 using poly=0x1021 (MSB first), with tables processing 8 bytes per step (slicing-by-8)
+     *
+     *  \param  data
+     *          The pointer to the data beginning.
+     *  \param  len
+     *          The length of the data in bytes.
+     *  \param  crc
+     *          The initial value, or the CRC of the preceding data to continue it.
+     */
+    uint16_t crc16(const uint8_t *data, size_t len, uint16_t crc = 0x0000);
+
+    /**
+     *  \brief  Fixed capacity FIFO of bytes. Data is pushed and read in bulk, the storage is never reallocated.
+     */
+    class byte_ring_buffer
+    {
+    public:
+      /**
+       *  \param  capacity
+       *          Maximal number of bytes stored, rounded up to a power of 2.
+       */
+      explicit byte_ring_buffer(size_t capacity)
+      {
+        size_t cap = 1;
+        while (cap < capacity)
+          cap <<= 1;
+        m_data.resize(cap);
+        m_mask = cap - 1;
+        m_head = 0;
+        m_size = 0;
+      }
+
+      size_t size() const { return m_size; }
+      size_t free_space() const { return m_data.size() - m_size; }
+
+      /**
+       *  \brief  Append n bytes, n must not exceed free_space()
+       */
+      void push(const uint8_t *data, size_t n)
+      {
+        size_t tail = (m_head + m_size) & m_mask;
+        size_t first = std::min(n, m_data.size() - tail);
+        memcpy(&m_data[tail], data, first);
+        memcpy(&m_data[0], data + first, n - first);
+        m_size += n;
+      }
+
+      /**
+       *  \brief  Copy n bytes starting offset bytes after the oldest one, without removing them
+       */
+      void peek(uint8_t *dst, size_t n, size_t offset = 0) const
+      {
+        size_t start = (m_head + offset) & m_mask;
+        size_t first = std::min(n, m_data.size() - start);
+        memcpy(dst, &m_data[start], first);
+        memcpy(dst + first, &m_data[0], n - first);
+      }
+
+      /**
+       *  \brief  Remove the n oldest bytes
+       */
+      void pop(size_t n)
+      {
+        m_head = (m_head + n) & m_mask;
+        m_size -= n;
+      }
+
+    private:
+      std::vector<uint8_t> m_data;
+      size_t m_mask;
+      size_t m_head;  ///< index of the oldest byte
+      size_t m_size;  ///< number of bytes stored
+    };
+
+  } // namespace lora_sdr
+} // namespace gr
+
+#endif /* INCLUDED_LORA_SDR_CRC16_H */
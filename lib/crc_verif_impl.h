@@ -2,6 +2,7 @@
 #define INCLUDED_LORA_CRC_VERIF_IMPL_H
 
 #include <gnuradio/lora_sdr/crc_verif.h>
+#include "crc16.h"
 
 // #define GRLORA_DEBUG
 
@@ -15,11 +16,12 @@ namespace gr {
         bool m_crc_presence;///< Indicate if there is a payload CRC
         uint16_t m_crc;///< The CRC calculated from the received payload
         std::string message_str;///< The payload string
-        char m_char;///< A new char of the payload
         bool new_frame; ///<indicate a new frame
-        std::vector<uint8_t> in_buff;///< input buffer containing the data bytes and CRC if any
+        byte_ring_buffer in_buff;///< input buffer containing the data bytes and CRC if any
+        std::vector<uint8_t> m_frame;///< the data bytes and CRC of the frame being verified, copied at once from in_buff
         bool print_rx_msg;  ///< print received message in terminal or not
         bool output_crc_check; ///< output the result of the payload CRC check
+        bool m_pdu; ///< publish the payload as a PDU (frame info dictionary, u8vector) instead of a symbol
         tag_t curent_tag; ///< the most recent tag for the packet we are currently processing
         
 
@@ -33,18 +35,9 @@ namespace gr {
          *  \brief  Handles the crc_presence received from the header_decoder block.
          */
         void header_crc_handler(pmt::pmt_t crc_presence);
-        /**
-         *  \brief  Calculate the CRC 16 using poly=0x1021 and Init=0x0000
-         *
-         *  \param  data
-         *          The pointer to the data beginning.
-         *  \param  len
-         *          The length of the data in bytes.
-         */
-        unsigned int crc16(uint8_t* data, uint32_t len);
 
      public:
-      crc_verif_impl(bool print_rx_msg, bool output_crc_check);
+      crc_verif_impl(bool print_rx_msg, bool output_crc_check, bool pdu);
       ~crc_verif_impl();
 
       void forecast (int noutput_items, gr_vector_int &ninput_items_required);
@@ -16,10 +16,11 @@ namespace gr {
       uint8_t cw_len;   ///< Length of a codeword
       bool m_is_header;    ///< Indicate that we need to deinterleave the first block with the default header parameters (cr=4/8, reduced rate)
       bool m_soft_decoding;   ///< Hard/Soft decoding
+      uint8_t m_soft_format;  ///< Format of the soft values, see soft_format
       bool m_ldro; ///< use low datarate optimization mode
 
      public:
-      deinterleaver_impl(bool soft_decoding);
+      deinterleaver_impl(bool soft_decoding, uint8_t soft_format);
       ~deinterleaver_impl();
 
       void forecast (int noutput_items, gr_vector_int &ninput_items_required);
@@ -4,33 +4,34 @@
 
 #include <gnuradio/io_signature.h>
 
-#include <boost/math/special_functions/bessel.hpp>  // to compute LLR
 #include <limits>
 
 #include "fft_demod_impl.h"
-extern "C" {
-#include "kiss_fft.h"
-}
+#include "soft_demap.h"
 
 namespace gr {
     namespace lora_sdr {
 
         fft_demod::sptr
-        fft_demod::make( bool soft_decoding, bool max_log_approx) {
-            return gnuradio::get_initial_sptr(new fft_demod_impl(soft_decoding, max_log_approx));
+        fft_demod::make( bool soft_decoding, bool max_log_approx, uint8_t fft_backend, uint8_t log_i0_kernel, uint8_t soft_format) {
+            return gnuradio::get_initial_sptr(new fft_demod_impl(soft_decoding, max_log_approx, fft_backend, log_i0_kernel, soft_format));
         }
 
         /*
          * The private constructor
          */
-        fft_demod_impl::fft_demod_impl(bool soft_decoding, bool max_log_approx)
+        fft_demod_impl::fft_demod_impl(bool soft_decoding, bool max_log_approx, uint8_t fft_backend, uint8_t log_i0_kernel, uint8_t soft_format)
             : gr::block("fft_demod",
                         gr::io_signature::make(1, 1, sizeof(gr_complex)),
-                        gr::io_signature::make(1, 1, soft_decoding ? MAX_SF * sizeof(LLR) : sizeof(uint16_t))),
+                        gr::io_signature::make(1, 1, soft_decoding ? soft_symbol_item_size(soft_format) : sizeof(uint16_t))),
                         m_soft_decoding(soft_decoding), max_log_approx(max_log_approx), 
-                        m_new_frame(true) {
+                        m_new_frame(true), m_fft_backend(fft_backend), m_log_i0_kernel(log_i0_kernel), m_soft_format(soft_format) {
             set_sf(MIN_SF);//accept any new sf
             m_symb_cnt = 0;
+            output.resize(8);  // a block contains at most 8 lora symbols
+            LLRs_block.resize(8 * MAX_SF);
+            m_block_cnt = 0;
+            is_header = false;
             // m_samples_per_symbol = (uint32_t)(1u << m_sf);
             m_ldro = false;
 
@@ -70,40 +71,27 @@ namespace gr {
         m_samples_per_symbol = (uint32_t)(1u << m_sf);
         m_upchirp.resize(m_samples_per_symbol);
         m_downchirp.resize(m_samples_per_symbol);
+        build_upchirp(&m_upchirp[0], 0, m_sf);
 
         // FFT demodulation preparations
-        m_fft.resize(m_samples_per_symbol);
-        m_dechirped.resize(m_samples_per_symbol);
+        if (!m_fft_plan || m_fft_plan->size() != m_samples_per_symbol)
+            m_fft_plan = fft_plan_registry::instance().get(m_samples_per_symbol, true, m_fft_backend);
+        m_fft_mag_sq.resize(m_samples_per_symbol);
+        m_LLs.resize(m_samples_per_symbol);
+        m_LLs_work.resize(2 * m_samples_per_symbol);
+        m_bessel_arg.resize(m_samples_per_symbol);
     }
 
 
         float *fft_demod_impl::compute_fft_mag(const gr_complex *samples) {
-            float rec_en = 0;
-            kiss_fft_cfg cfg = kiss_fft_alloc(m_samples_per_symbol, 0, 0, 0);
-            kiss_fft_cpx *cx_in = new kiss_fft_cpx[m_samples_per_symbol];
-            kiss_fft_cpx *cx_out = new kiss_fft_cpx[m_samples_per_symbol];
-
             // Multiply with ideal downchirp
-            volk_32fc_x2_multiply_32fc(&m_dechirped[0], samples, &m_downchirp[0], m_samples_per_symbol);
-            for (uint32_t i = 0; i < m_samples_per_symbol; i++) {
-                cx_in[i].r = m_dechirped[i].real();
-                cx_in[i].i = m_dechirped[i].imag();
-            }
+            volk_32fc_x2_multiply_32fc(m_fft_plan->get_inbuf(), samples, &m_downchirp[0], m_samples_per_symbol);
             // do the FFT
-            kiss_fft(cfg, cx_in, cx_out);
-
+            m_fft_plan->execute();
             // Get magnitude squared
-            float *m_fft_mag_sq = new float[m_samples_per_symbol];  // /!\ dynamic memory allocation
-            for (uint32_t i = 0u; i < m_samples_per_symbol; i++) {
-                m_fft_mag_sq[i] = cx_out[i].r * cx_out[i].r + cx_out[i].i * cx_out[i].i;
-                rec_en += m_fft_mag_sq[i];
-            }
+            volk_32fc_magnitude_squared_32f(&m_fft_mag_sq[0], m_fft_plan->get_outbuf(), m_samples_per_symbol);
 
-            free(cfg);
-            delete[] cx_in;
-            delete[] cx_out;
-
-            return m_fft_mag_sq;  // /!\ delete[] , release memory after !
+            return &m_fft_mag_sq[0];  // valid until the next call
         }
 
         // Use in Hard-decoding
@@ -116,6 +104,7 @@ namespace gr {
             //std::cout << " hard-dec idx " << idx /*<< " m_fft_mag_sq " << m_fft_mag_sq[0] */<< std::endl;
 
 #ifdef GRLORA_MEASUREMENTS
+            float rec_en = std::accumulate(m_fft_mag_sq, m_fft_mag_sq + m_samples_per_symbol, 0.0f);
             energy_file << std::fixed << std::setprecision(10) << m_fft_mag_sq[idx] << "," << m_fft_mag_sq[mod(idx - 1, m_samples_per_symbol)] << "," << m_fft_mag_sq[mod(idx + 1, m_samples_per_symbol)] << "," << rec_en << "," << std::endl;
 #endif
             // std::cout<<"SNR est = "<<m_fft_mag_sq[idx]<<","<<rec_en<<","<<10*log10(m_fft_mag_sq[idx]/(rec_en-m_fft_mag_sq[idx]))<<std::endl;
@@ -124,18 +113,17 @@ namespace gr {
             idx_file << idx << ", ";
 #endif
             //  std::cout<<idx<<", ";
-            delete[] m_fft_mag_sq;
 
             return idx;
         }
 
         // Use in Soft-decoding
-        std::vector<LLR> fft_demod_impl::get_LLRs(const gr_complex *samples) {
-            float *m_fft_mag_sq = compute_fft_mag(samples); // from dynamic memory alloc
+        void fft_demod_impl::get_LLRs(const gr_complex *samples, LLR *LLRs) {
+            float *m_fft_mag_sq = compute_fft_mag(samples);
 
             // Compute LLRs of the SF bits
-            std::vector<double> LLs(m_samples_per_symbol);   // 2**sf  Log-Likelihood
-            std::vector<LLR> LLRs(MAX_SF,0);        //      Log-Likelihood Ratios
+            std::vector<double> &LLs = m_LLs;   // 2**sf  Log-Likelihood
+            std::fill(LLRs, LLRs + MAX_SF, 0);  //      Log-Likelihood Ratios
 
             
             //static double Ps_frame = 0; // Signal Power estimation updated at each rx new frame
@@ -183,61 +171,17 @@ namespace gr {
             }            
 #endif
             //double SNRdB_estimate = 10*std::log10(Ps_frame/Pn_frame);
-            double SNRdB_estimate = 10*std::log10(m_Ps_est/m_Pn_est);
+            //double SNRdB_estimate = 10*std::log10(m_Ps_est/m_Pn_est);
             //std::cout << "SNR " << SNRdB_estimate << std::endl;
-            //  Normalize fft_mag to 1 to avoid Bessel overflow
-            for (uint32_t i = 0; i < m_samples_per_symbol; i++) {  // upgrade to avoid for loop
-                m_fft_mag_sq[i] *= m_samples_per_symbol; // Normalized |Y[n]| * sqrt(N) => |Y[n]|² * N (depends on kiss FFT library)
-                //m_fft_mag_sq[i] /= Ps_frame; // // Normalize to avoid Bessel overflow (does not change the performances)
-            }
 
-            bool clipping = false;
-            for (uint32_t n = 0; n < m_samples_per_symbol; n++) {
-                double bessel_arg = std::sqrt(m_Ps_est) / m_Pn_est * std::sqrt(m_fft_mag_sq[n]);
-                // Manage overflow of Bessel function
-                if (bessel_arg < 713)  // 713 ~ log(std::numeric_limits<LLR>::max())
-                    LLs[n] = boost::math::cyl_bessel_i(0, bessel_arg);  // compute Bessel safely
-                else {
-                    //std::cerr << RED << "Log-Likelihood clipping :-( SNR: " << SNRdB_estimate << " |Y|: " << std::sqrt(m_fft_mag_sq[n]) << RESET << std::endl;
-                    //LLs[n] = std::numeric_limits<LLR>::max();  // clipping
-                    clipping = true;
-                }
-                if (max_log_approx) LLs[n] = std::log(LLs[n]);  // Log-Likelihood
-                //LLs[n] = m_fft_mag_sq[n]; // same performance with just |Y[n]| or |Y[n]|²
-            }
+            // Bessel argument sqrt(Ps)/Pn * |Y[n]|, with |Y[n]| normalized by sqrt(N) (depends on kiss FFT library)
+            volk_32f_sqrt_32f(&m_bessel_arg[0], m_fft_mag_sq, m_samples_per_symbol);
+            volk_32f_s32f_multiply_32f(&m_bessel_arg[0], &m_bessel_arg[0], std::sqrt(m_Ps_est * m_samples_per_symbol) / m_Pn_est, m_samples_per_symbol);
+            // Log-Likelihood, computed in the log domain so that high SNR symbols do not overflow
+            log_bessel_i0(&m_bessel_arg[0], &LLs[0], m_samples_per_symbol, m_log_i0_kernel);
 
-            if (clipping) // change to max-log formula with only |Y[n]|² to avoid overflows, solve LLR computation incapacity in high SNR
-                for (uint32_t n = 0; n < m_samples_per_symbol; n++) LLs[n] = m_fft_mag_sq[n];
-
-            // Log-Likelihood Ratio estimations
-            if (max_log_approx) {
-                for (uint32_t i = 0; i < m_sf; i++) { // sf bits => sf LLRs
-                    double max_X1(0), max_X0(0); // X1 = set of symbols where i-th bit is '1'
-                    for (uint32_t n = 0; n < m_samples_per_symbol; n++) {  // for all symbols n : 0 --> 2^sf
-                        // LoRa: shift by -1 and use reduce rate if first block (header)
-                        uint32_t s = mod(n - 1, (1 << m_sf)) / ((is_header||m_ldro )? 4 : 1);
-                        s = (s ^ (s >> 1u));  // Gray encoding formula               // Gray demap before (in this block)
-                        if (s & (1u << i)) {  // if i-th bit of symbol n is '1'
-                            if (LLs[n] > max_X1) max_X1 = LLs[n];
-                        } else {              // if i-th bit of symbol n is '0'
-                            if (LLs[n] > max_X0) max_X0 = LLs[n];
-                        }
-                    }
-                    LLRs[m_sf - 1 - i] = max_X1 - max_X0;  // [MSB ... ... LSB]
-                }
-            } else {
-                // Without max-log approximation of the LLR estimation
-                for (uint32_t i = 0; i < m_sf; i++) {
-                    double sum_X1(0), sum_X0(0); // X1 = set of symbols where i-th bit is '1'
-                    for (uint32_t n = 0; n < m_samples_per_symbol; n++) {  // for all symbols n : 0 --> 2^sf
-                        uint32_t s = mod(n - 1, (1 << m_sf)) / ((is_header||m_ldro)? 4 : 1);
-                        s = (s ^ (s >> 1u));  // Gray demap
-                        if (s & (1u << i)) sum_X1 += LLs[n]; // Likelihood
-                        else sum_X0 += LLs[n];
-                    }
-                    LLRs[m_sf - 1 - i] = std::log(sum_X1) - std::log(sum_X0); // [MSB ... ... LSB]
-                }
-            }
+            // Log-Likelihood Ratio estimations, using the Gray partition of the bins for the current rate
+            compute_LLRs(&LLs[0], m_sf, is_header || m_ldro, max_log_approx, LLRs, &m_LLs_work[0]);
 
 #ifdef GRLORA_LLR_MEASUREMENTS_SAVE
             // Save Log-Likelihood and LLR for debug
@@ -252,14 +196,65 @@ namespace gr {
             LLR_file.close();
 #endif
 
-            delete[] m_fft_mag_sq; // release memory
-            return LLRs;
+        }
+
+        void fft_demod_impl::pack_LLRs(void *out, uint8_t sf_app) {
+            // only the sf_app LSB LLRs of each symbol carry information
+            if (m_soft_format == SOFT_FLOAT) {
+                float *out_f = (float *)out;
+                for (int i = 0; i < block_size; i++)
+                    for (int j = 0; j < sf_app; j++)
+                        out_f[i * sf_app + j] = LLRs_block[i * MAX_SF + m_sf - sf_app + j];
+                return;
+            }
+            // SOFT_INT8: the largest LLR of the block is mapped to 127. The scale is not passed on: the blocks are decoded
+            // independently and the hard decision on a block does not change when it is multiplied by a positive scale
+            double max_abs = 0;
+            for (int i = 0; i < block_size; i++)
+                for (int j = 0; j < sf_app; j++)
+                    max_abs = std::max(max_abs, std::abs(LLRs_block[i * MAX_SF + m_sf - sf_app + j]));
+            double scale = max_abs > 0 ? 127 / max_abs : 1;
+            int8_t *out_8 = (int8_t *)out;
+            for (int i = 0; i < block_size; i++)
+                for (int j = 0; j < sf_app; j++)
+                    out_8[i * sf_app + j] = (int8_t)std::max(-127.0, std::min(127.0, std::round(LLRs_block[i * MAX_SF + m_sf - sf_app + j] * scale)));
         }
 
         void fft_demod_impl::header_cr_handler(pmt::pmt_t cr) {
             m_cr = pmt::to_long(cr);
         };
 
+        void fft_demod_impl::frame_info_handler(const pmt::pmt_t &frame_info) {
+            pmt::pmt_t err = pmt::string_to_symbol("error");
+            is_header = pmt::to_bool(pmt::dict_ref(frame_info, pmt::string_to_symbol("is_header"), err));
+            if (is_header) // new frame beginning
+            {
+                int cfo_int = pmt::to_long(pmt::dict_ref(frame_info, pmt::string_to_symbol("cfo_int"), err));
+                float cfo_frac = pmt::to_float(pmt::dict_ref(frame_info, pmt::string_to_symbol("cfo_frac"), err));
+                int sf = pmt::to_double(pmt::dict_ref(frame_info, pmt::string_to_symbol("sf"), err));
+                if(sf != m_sf)
+                    set_sf(sf);
+                // create downchirp taking CFO_int into account: the upchirp of value id is the reference upchirp
+                // cyclically shifted by id samples with a constant phase of -2*pi*(id^2/(2N)-id/2)
+                uint32_t id = mod(cfo_int, m_samples_per_symbol);
+                gr_complex id_phase = gr_expj(2 * M_PI * ((double)id * id / (2.0 * m_samples_per_symbol) - id / 2.0));
+                // adapt the downchirp to the cfo_frac of the frame
+                build_rotator(&m_downchirp[0], -cfo_frac / m_samples_per_symbol, m_samples_per_symbol);
+                for (uint32_t n = 0; n < m_samples_per_symbol; n++)
+                {
+                    m_downchirp[n] *= std::conj(m_upchirp[(n + id) % m_samples_per_symbol]) * id_phase;
+                }
+                // drop any incomplete block of a previous frame
+                m_block_cnt = 0;
+            } 
+            else
+            {
+                m_cr = pmt::to_long(pmt::dict_ref(frame_info, pmt::string_to_symbol("cr"), err));
+                m_ldro = pmt::to_bool(pmt::dict_ref(frame_info,pmt::string_to_symbol("ldro"),err));
+                m_symb_numb = pmt::to_long(pmt::dict_ref(frame_info, pmt::string_to_symbol("symb_numb"), err));                
+            }
+        }
+
         int fft_demod_impl::general_work(int noutput_items,
                                          gr_vector_int &ninput_items,
                                          gr_vector_const_void_star &input_items,
@@ -267,70 +262,54 @@ namespace gr {
             const gr_complex *in = (const gr_complex *)input_items[0];
             uint16_t *out1 = (uint16_t *)output_items[0];
             LLR *out2 = (LLR *)output_items[0];
+            bool compact_soft = m_soft_decoding && m_soft_format != SOFT_DOUBLE;
             int to_output = 0;
+            int nitems_consumed = 0;
             std::vector<tag_t> tags;
-            
-            get_tags_in_window(tags, 0, 0, m_samples_per_symbol, pmt::string_to_symbol("frame_info"));
-            if (tags.size()) 
-            {
-                pmt::pmt_t err = pmt::string_to_symbol("error");
-                is_header = pmt::to_bool(pmt::dict_ref(tags[0].value, pmt::string_to_symbol("is_header"), err));
-                if (is_header) // new frame beginning
-                {
-                    int cfo_int = pmt::to_long(pmt::dict_ref(tags[0].value, pmt::string_to_symbol("cfo_int"), err));
-                    float cfo_frac = pmt::to_float(pmt::dict_ref(tags[0].value, pmt::string_to_symbol("cfo_frac"), err));
-                    int sf = pmt::to_double(pmt::dict_ref(tags[0].value, pmt::string_to_symbol("sf"), err));
-                    if(sf != m_sf)
-                        set_sf(sf);
-                     //create downchirp taking CFO_int into account
-                    build_upchirp(&m_upchirp[0], mod(cfo_int, m_samples_per_symbol), m_sf);
-                    volk_32fc_conjugate_32fc(&m_downchirp[0], &m_upchirp[0], m_samples_per_symbol);
-                    // adapt the downchirp to the cfo_frac of the frame
-                    for (uint32_t n = 0; n < m_samples_per_symbol; n++)
-                    {
-                        m_downchirp[n] = m_downchirp[n] * gr_expj(-2 * M_PI * cfo_frac / m_samples_per_symbol * n);
-                    }
-                    output.clear();
-                } 
-                else
-                {
-                    m_cr = pmt::to_long(pmt::dict_ref(tags[0].value, pmt::string_to_symbol("cr"), err));
-                    m_ldro = pmt::to_bool(pmt::dict_ref(tags[0].value,pmt::string_to_symbol("ldro"),err));
-                    m_symb_numb = pmt::to_long(pmt::dict_ref(tags[0].value, pmt::string_to_symbol("symb_numb"), err));                
-                }
-            }
-            if((uint32_t)ninput_items[0]>=m_samples_per_symbol)//check if we have enough samples at the input
+            const pmt::pmt_t frame_info_key = pmt::string_to_symbol("frame_info");
+
+            // demodulate all complete symbols available in the input window
+            while ((uint32_t)(ninput_items[0] - nitems_consumed) >= m_samples_per_symbol)
             {
+                get_tags_in_window(tags, 0, nitems_consumed, nitems_consumed + m_samples_per_symbol, frame_info_key);
+                if (tags.size())
+                    frame_info_handler(tags[0].value); // might change the sf
+
+                block_size = 4 + (is_header ? 4 : m_cr);
+                // compact soft formats output one item per used bit
+                uint8_t sf_app = (is_header || m_ldro) ? m_sf - 2 : m_sf;
+                int items_per_symb = compact_soft ? sf_app : 1;
+
+                // the tag is handled again in the next call if we stop here, so it should not be propagated yet
+                if ((uint32_t)(ninput_items[0] - nitems_consumed) < m_samples_per_symbol || noutput_items - to_output < block_size * items_per_symb)
+                    break;
+
                 if (tags.size()){
-                        tags[0].offset = nitems_written(0);
+                        tags[0].offset = nitems_written(0) + to_output;
                         add_item_tag(0, tags[0]);  // 8 LoRa symbols in the header
                 }
 
-                block_size = 4 + (is_header ? 4 : m_cr);
-
                 if (m_soft_decoding) {
-                    LLRs_block.push_back(get_LLRs(in));  // Store 'sf' LLRs
+                    get_LLRs(in + nitems_consumed, &LLRs_block[m_block_cnt * MAX_SF]);  // Store 'sf' LLRs
                 } else {                                 // Hard decoding
                     // shift by -1 and use reduce rate if first block (header)
-                    output.push_back(mod(get_symbol_val(in) - 1, (1 << m_sf)) / ((is_header||m_ldro) ? 4 : 1));
+                    output[m_block_cnt] = mod(get_symbol_val(in + nitems_consumed) - 1, (1 << m_sf)) / ((is_header||m_ldro) ? 4 : 1);
                 }
+                m_block_cnt++;
 
-                if (output.size() == block_size || LLRs_block.size() == block_size) {
-                    if (m_soft_decoding) {
+                if (m_block_cnt == block_size) {
+                    if (compact_soft) {
+                        pack_LLRs((uint8_t *)output_items[0] + to_output * soft_value_size(m_soft_format), sf_app);
+                    } else if (m_soft_decoding) {
                         for (int i = 0; i < block_size; i++)
-                            memcpy(out2 + i * MAX_SF, LLRs_block[i].data(), m_sf * sizeof(LLR));
-                        LLRs_block.clear();
+                            memcpy(out2 + (to_output + i) * MAX_SF, &LLRs_block[i * MAX_SF], m_sf * sizeof(LLR));
                     } else {  // Hard decoding
-                        memcpy(out1, output.data(), block_size * sizeof(uint16_t));
-                        output.clear();
+                        memcpy(out1 + to_output, output.data(), block_size * sizeof(uint16_t));
                     }
-                    to_output = block_size;
+                    to_output += block_size * items_per_symb;
+                    m_block_cnt = 0;
                 } 
-                else
-                {
-                    to_output = 0;
-                }
-                consume_each(m_samples_per_symbol);
+                nitems_consumed += m_samples_per_symbol;
                 m_symb_cnt += 1;
                 if(m_symb_cnt == m_symb_numb){
                 // std::cout<<"fft_demod_impl.cc end of frame\n";
@@ -338,14 +317,8 @@ namespace gr {
                 m_symb_cnt = 0;
                 }
             }
-            else{
-                to_output = 0;
-            }
-            if (noutput_items < to_output)
-            {
-                print(RED<<"fft_demod not enough space in output buffer!!"<<RESET);
-            }
-            
+            consume_each(nitems_consumed);
+
             return to_output;
         }
 
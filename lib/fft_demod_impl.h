@@ -14,6 +14,7 @@
 #include <gnuradio/io_signature.h>
 #include <gnuradio/lora_sdr/utilities.h>
 #include <gnuradio/lora_sdr/fft_demod.h>
+#include "fft_plan.h"
 
 namespace gr {
   namespace lora_sdr {
@@ -38,12 +39,20 @@ namespace gr {
 
       // variable used to perform the FFT demodulation
       std::vector<gr_complex> m_upchirp;   ///< Reference upchirp
-      std::vector<gr_complex> m_downchirp; ///< Reference downchirp
-      std::vector<gr_complex> m_dechirped; ///< Dechirped symbol
-      std::vector<gr_complex> m_fft;       ///< Result of the FFT
+      std::vector<gr_complex> m_downchirp; ///< Downchirp of the current frame, accounting for its CFO
+      uint8_t m_fft_backend;               ///< FFT library used, see fft_backend
+      fft_plan::sptr m_fft_plan;           ///< FFT of the current symbol size, its input buffer holds the dechirped symbol
+
+      std::vector<float> m_fft_mag_sq;     ///< Squared magnitude of the FFT of the current symbol
+      std::vector<double> m_LLs;           ///< Log-likelihood of each possible symbol value
+      std::vector<double> m_LLs_work;      ///< Scratch buffer holding the likelihoods sorted by demapped value
+      std::vector<float> m_bessel_arg;     ///< Argument of the Bessel function giving the likelihood of each possible symbol value
+      uint8_t m_log_i0_kernel;             ///< Approximation of log(I0) used to compute the log-likelihoods, see log_i0_kernel
+      uint8_t m_soft_format;               ///< Format of the soft output, see soft_format
 
       std::vector<uint16_t> output;   ///< Stores the value to be outputted once a full bloc has been received
-      std::vector< std::vector<LLR> > LLRs_block; ///< Stores the LLRs to be outputted once a full bloc has been received
+      std::vector<LLR> LLRs_block;    ///< Stores the LLRs to be outputted once a full bloc has been received (MAX_SF LLRs per symbol)
+      uint8_t m_block_cnt;            ///< Number of lora symbols of the current block already demodulated
       bool is_header;                  ///< Indicate that the first block hasn't been fully received
       uint8_t block_size;             ///< The number of lora symbol in one block
      
@@ -91,11 +100,32 @@ namespace gr {
 
       /**
        *  \brief  Compute the Log-Likelihood Ratios of the SF nbr of bits
+       *
+       *  \param  samples
+       *          The pointer to the symbol beginning.
+       *  \param  LLRs
+       *          The MAX_SF LLRs of the symbol, [MSB ... LSB] in the first sf entries.
+       */
+      void get_LLRs(const gr_complex *samples, LLR *LLRs);
+
+      /**
+       *  \brief  Write the LLRs of the current block in a compact soft format, one value per used bit.
+       *          In SOFT_INT8 the block is scaled to use the full int8 range.
+       *
+       *  \param  out
+       *          The output buffer
+       *  \param  sf_app
+       *          Number of bits per symbol
+       */
+      void pack_LLRs(void *out, uint8_t sf_app);
+
+      /**
+       *  \brief  Update the frame parameters from a frame_info tag
        */
-      std::vector<LLR> get_LLRs(const gr_complex *samples);
+      void frame_info_handler(const pmt::pmt_t &frame_info);
 
      public:
-      fft_demod_impl( bool soft_decoding, bool max_log_approx);
+      fft_demod_impl( bool soft_decoding, bool max_log_approx, uint8_t fft_backend, uint8_t log_i0_kernel, uint8_t soft_format);
       ~fft_demod_impl();
 
       // Where all the action really happens
@@ -0,0 +1,108 @@
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include "fft_plan.h"
+#include <gnuradio/fft/fft.h>
+#include <volk/volk.h>
+#include <iostream>
+
+namespace gr {
+  namespace lora_sdr {
+
+    /**
+     *  \brief  Plan using the bundled kiss_fft. The twiddle factors are owned by the registry and shared between plans.
+     */
+    class kiss_fft_plan : public fft_plan
+    {
+    public:
+      kiss_fft_plan(uint32_t size, bool forward, kiss_fft_cfg cfg)
+          : fft_plan(size, forward, KISS_FFT), m_cfg(cfg)
+      {
+        // gr_complex and kiss_fft_cpx share the same memory layout
+        m_inbuf = (gr_complex *)volk_malloc(size * sizeof(gr_complex), volk_get_alignment());
+        m_outbuf = (gr_complex *)volk_malloc(size * sizeof(gr_complex), volk_get_alignment());
+      }
+      ~kiss_fft_plan()
+      {
+        volk_free(m_inbuf);
+        volk_free(m_outbuf);
+      }
+      gr_complex *get_inbuf() { return m_inbuf; }
+      gr_complex *get_outbuf() { return m_outbuf; }
+      void execute() { kiss_fft(m_cfg, (kiss_fft_cpx *)m_inbuf, (kiss_fft_cpx *)m_outbuf); }
+
+    private:
+      kiss_fft_cfg m_cfg;
+      gr_complex *m_inbuf;
+      gr_complex *m_outbuf;
+    };
+
+    /**
+     *  \brief  Plan using GNU Radio gr::fft (FFTW). FFTW wisdom is loaded from and saved to disk by the gr::fft planner.
+     */
+    template <bool is_forward>
+    class gr_fft_plan : public fft_plan
+    {
+    public:
+      gr_fft_plan(uint32_t size) : fft_plan(size, is_forward, GR_FFT), m_fft(size) {}
+      gr_complex *get_inbuf() { return m_fft.get_inbuf(); }
+      gr_complex *get_outbuf() { return m_fft.get_outbuf(); }
+      void execute() { m_fft.execute(); }
+
+    private:
+      gr::fft::fft<gr_complex, is_forward> m_fft;
+    };
+
+    fft_plan_registry &fft_plan_registry::instance()
+    {
+      // never destroyed, plans may be released by blocks after static destruction
+      static fft_plan_registry *registry = new fft_plan_registry();
+      return *registry;
+    }
+
+    fft_plan::sptr fft_plan_registry::get(uint32_t size, bool forward, uint8_t backend)
+    {
+      fft_plan *plan = nullptr;
+      {
+        std::lock_guard<std::mutex> lock(m_mutex);
+        std::vector<fft_plan *> &free_plans = m_free_plans[plan_key(backend, size, forward)];
+        if (!free_plans.empty())
+        {
+          plan = free_plans.back();
+          free_plans.pop_back();
+        }
+        else
+          plan = create(size, forward, backend);
+      }
+      return fft_plan::sptr(plan, [this](fft_plan *p) { this->release(p); });
+    }
+
+    fft_plan *fft_plan_registry::create(uint32_t size, bool forward, uint8_t backend)
+    {
+      switch (backend)
+      {
+      case GR_FFT:
+        if (forward)
+          return new gr_fft_plan<true>(size);
+        else
+          return new gr_fft_plan<false>(size);
+      default:
+        std::cerr << RED << "Unknown FFT backend " << (int)backend << ", using kiss_fft" << RESET << std::endl;
+        // fall through
+      case KISS_FFT:
+        kiss_fft_cfg &cfg = m_kiss_cfgs[std::make_pair(size, forward)];
+        if (!cfg)
+          cfg = kiss_fft_alloc(size, !forward, 0, 0);
+        return new kiss_fft_plan(size, forward, cfg);
+      }
+    }
+
+    void fft_plan_registry::release(fft_plan *plan)
+    {
+      std::lock_guard<std::mutex> lock(m_mutex);
+      m_free_plans[plan_key(plan->backend(), plan->size(), plan->forward())].push_back(plan);
+    }
+
+  } // namespace lora_sdr
+} // namespace gr
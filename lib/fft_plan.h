@@ -0,0 +1,98 @@
+#ifndef INCLUDED_LORA_SDR_FFT_PLAN_H
+#define INCLUDED_LORA_SDR_FFT_PLAN_H
+
+#include <gnuradio/gr_complex.h>
+#include <gnuradio/lora_sdr/utilities.h>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <tuple>
+#include <vector>
+#include "kiss_fft.h"
+
+namespace gr {
+  namespace lora_sdr {
+
+    /**
+     *  \brief  Handle on a complex FFT of a given size and direction.
+     *          The handle owns aligned input and output buffers which are reused from one call to execute() to the next.
+     */
+    class fft_plan
+    {
+    public:
+      typedef std::shared_ptr<fft_plan> sptr;
+
+      virtual ~fft_plan() {}
+
+      /**
+       *  \brief  Aligned buffer of size() samples to be filled before calling execute()
+       */
+      virtual gr_complex *get_inbuf() = 0;
+
+      /**
+       *  \brief  Aligned buffer of size() samples holding the (unnormalized) result of the last execute()
+       */
+      virtual gr_complex *get_outbuf() = 0;
+
+      /**
+       *  \brief  Compute the FFT of the input buffer into the output buffer
+       */
+      virtual void execute() = 0;
+
+      uint32_t size() const { return m_size; }
+      bool forward() const { return m_forward; }
+      uint8_t backend() const { return m_backend; }
+
+    protected:
+      fft_plan(uint32_t size, bool forward, uint8_t backend)
+          : m_size(size), m_forward(forward), m_backend(backend) {}
+
+      uint32_t m_size;    ///< Number of points of the FFT
+      bool m_forward;     ///< Forward or inverse transform
+      uint8_t m_backend;  ///< FFT library used, see fft_backend
+    };
+
+    /**
+     *  \brief  Process-wide registry of FFT plans keyed by backend, size and direction.
+     *          Plans are created on the first request of a key and go back to the registry when the last shared pointer on them is released,
+     *          so that a block changing its spreading factor or another block instance can reuse them without any new allocation.
+     */
+    class fft_plan_registry
+    {
+    public:
+      /**
+       *  \brief  Return the registry shared by all the blocks of the process
+       */
+      static fft_plan_registry &instance();
+
+      /**
+       *  \brief  Get a plan for the given key, reusing a released one when available
+       *
+       *  \param  size
+       *          number of points of the FFT
+       *  \param  forward
+       *          true for a forward transform, false for an inverse one
+       *  \param  backend
+       *          FFT library to use, see fft_backend
+       */
+      fft_plan::sptr get(uint32_t size, bool forward, uint8_t backend);
+
+    private:
+      typedef std::tuple<uint8_t, uint32_t, bool> plan_key;
+
+      fft_plan_registry() {}
+      fft_plan_registry(const fft_plan_registry &) = delete;
+      fft_plan_registry &operator=(const fft_plan_registry &) = delete;
+
+      fft_plan *create(uint32_t size, bool forward, uint8_t backend);
+      void release(fft_plan *plan);
+
+      std::mutex m_mutex;                                             ///< Protect the members below
+      std::map<plan_key, std::vector<fft_plan *>> m_free_plans;       ///< Plans currently not in use
+      std::map<std::pair<uint32_t, bool>, kiss_fft_cfg> m_kiss_cfgs;  ///< kiss_fft twiddles, shared by all the kiss plans of the same size and direction
+    };
+
+  } // namespace lora_sdr
+} // namespace gr
+
+#endif /* INCLUDED_LORA_SDR_FFT_PLAN_H */
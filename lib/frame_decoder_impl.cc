@@ -0,0 +1,327 @@
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <gnuradio/io_signature.h>
+#include "frame_decoder_impl.h"
+#include "bit_kernels.h"
+#include "crc16.h"
+#include "tables.h"
+
+namespace gr
+{
+    namespace lora_sdr
+    {
+
+        namespace {
+            /**
+             *  \brief  Soft decoding of a block, deinterleaving of its LLRs followed by the maximum likelihood decoding of its codewords
+             */
+            template <typename T>
+            void soft_decode_block(const T *in, size_t in_stride, uint8_t *nibbles, uint8_t sf_app, uint8_t cw_len)
+            {
+                T cw_LLRs[8 * MAX_SF];
+                deinterleave_soft(in, in_stride, cw_LLRs, sf_app, cw_len);
+                hamming_soft_decode(cw_LLRs, nibbles, sf_app, cw_len - 4);
+            }
+        } // namespace
+
+        frame_decoder::sptr
+        frame_decoder::make(bool impl_head, uint8_t cr, uint32_t pay_len, bool has_crc, uint8_t ldro_mode, bool print_header, bool print_payload,
+                            bool soft_decoding, uint8_t soft_format, bool pdu)
+        {
+            return gnuradio::get_initial_sptr(new frame_decoder_impl(impl_head, cr, pay_len, has_crc, ldro_mode, print_header, print_payload,
+                                                                     soft_decoding, soft_format, pdu));
+        }
+
+        /*
+         * The private constructor
+         */
+        frame_decoder_impl::frame_decoder_impl(bool impl_head, uint8_t cr, uint32_t pay_len, bool has_crc, uint8_t ldro_mode, bool print_header, bool print_payload,
+                                               bool soft_decoding, uint8_t soft_format, bool pdu)
+            : gr::block("frame_decoder",
+                        gr::io_signature::make(1, 1, soft_decoding ? soft_symbol_item_size(soft_format) : sizeof(uint16_t)),
+                        gr::io_signature::make(0, 1, sizeof(uint8_t))),
+              m_impl_head(impl_head), m_impl_cr(cr), m_impl_pay_len(pay_len), m_impl_has_crc(has_crc), m_ldro_mode(ldro_mode),
+              m_print_header(print_header), m_print_payload(print_payload), m_soft_decoding(soft_decoding), m_soft_format(soft_format), m_pdu(pdu)
+        {
+            m_sf = MIN_SF;
+            m_cr = cr;
+            m_ldro = false;
+            m_is_header = false;
+            m_in_frame = false;
+            m_frame_ready = false;
+            m_last_tag_offset = (uint64_t)-1;
+            m_payload_len = pay_len;
+            m_has_crc = has_crc;
+            m_frame_nibbles = 0;
+            m_frame_info = pmt::make_dict();
+            m_sample_offset = pmt::PMT_NIL;
+            m_symbols.resize(8);
+            m_codewords.resize(MAX_SF);
+
+            set_tag_propagation_policy(TPP_DONT);
+            message_port_register_out(pmt::mp("msg"));
+            message_port_register_out(pmt::mp("frame_info"));
+        }
+
+        /*
+         * Our virtual destructor.
+         */
+        frame_decoder_impl::~frame_decoder_impl()
+        {
+        }
+
+        void frame_decoder_impl::forecast(int noutput_items, gr_vector_int &ninput_items_required)
+        {
+            // compact soft formats use one item per bit of the symbols
+            ninput_items_required[0] = (m_soft_decoding && m_soft_format != SOFT_DOUBLE) ? 4 * (MIN_SF - 2) : 4;
+        }
+
+        void frame_decoder_impl::frame_info_handler(const pmt::pmt_t &frame_info)
+        {
+            pmt::pmt_t err = pmt::string_to_symbol("error");
+            if (pmt::to_bool(pmt::dict_ref(frame_info, pmt::string_to_symbol("is_header"), err)))
+            { // new frame beginning
+                m_sf = pmt::to_long(pmt::dict_ref(frame_info, pmt::string_to_symbol("sf"), err));
+                m_sample_offset = pmt::dict_ref(frame_info, pmt::string_to_symbol("sample_offset"), pmt::PMT_NIL);
+                m_is_header = true;
+                m_in_frame = true;
+                m_nibbles.clear();
+                if (m_impl_head)
+                { // implicit header, all parameters should have been provided
+                    m_cr = m_impl_cr;
+                    m_payload_len = m_impl_pay_len;
+                    m_has_crc = m_impl_has_crc;
+                    m_frame_nibbles = 2 * m_payload_len + (m_has_crc ? 4 : 0);
+                    publish_frame_info(m_cr, m_payload_len, m_has_crc, m_ldro_mode, 0);
+                }
+                else
+                    m_frame_nibbles = header_len;
+            }
+            else
+            {
+                m_cr = pmt::to_long(pmt::dict_ref(frame_info, pmt::string_to_symbol("cr"), err));
+                m_ldro = pmt::to_bool(pmt::dict_ref(frame_info, pmt::string_to_symbol("ldro"), err));
+            }
+        }
+
+        void frame_decoder_impl::publish_frame_info(int cr, int pay_len, int crc, uint8_t ldro_mode, int err)
+        {
+            m_frame_info = pmt::make_dict();
+            m_frame_info = pmt::dict_add(m_frame_info, pmt::intern("cr"), pmt::from_long(cr));
+            m_frame_info = pmt::dict_add(m_frame_info, pmt::intern("pay_len"), pmt::from_long(pay_len));
+            m_frame_info = pmt::dict_add(m_frame_info, pmt::intern("crc"), pmt::from_long(crc));
+            m_frame_info = pmt::dict_add(m_frame_info, pmt::intern("ldro_mode"), pmt::from_long(ldro_mode));
+            m_frame_info = pmt::dict_add(m_frame_info, pmt::intern("err"), pmt::from_long(err));
+            message_port_pub(pmt::intern("frame_info"), m_frame_info);
+            // only kept with the payload, frame_sync does not need it back
+            if (!pmt::is_null(m_sample_offset))
+                m_frame_info = pmt::dict_add(m_frame_info, pmt::intern("sample_offset"), m_sample_offset);
+        }
+
+        void frame_decoder_impl::decode_block(const void *in, uint8_t *nibbles, uint8_t sf_app, uint8_t cw_len)
+        {
+            if (m_soft_decoding)
+            {
+                switch (m_soft_format)
+                {
+                case SOFT_FLOAT:
+                    soft_decode_block((const float *)in, sf_app, nibbles, sf_app, cw_len);
+                    break;
+                case SOFT_INT8:
+                    // each block has its own scale, the ML decision is invariant to a positive scale of the block
+                    soft_decode_block((const int8_t *)in, sf_app, nibbles, sf_app, cw_len);
+                    break;
+                default:
+                    // take only sf_app bits over the MAX_SF LLRs of each symbol
+                    soft_decode_block((const LLR *)in + m_sf - sf_app, MAX_SF, nibbles, sf_app, cw_len);
+                }
+                return;
+            }
+            const uint16_t *symbols = (const uint16_t *)in;
+            for (int i = 0; i < cw_len; i++)
+                m_symbols[i] = symbols[i] ^ (symbols[i] >> 1u); // Gray demap
+            deinterleave_block(&m_symbols[0], &m_codewords[0], sf_app, cw_len);
+            const uint8_t *hard_table = hamming_dec_table(cw_len - 4);
+            for (int i = 0; i < sf_app; i++)
+                nibbles[i] = hard_table[m_codewords[i]];
+        }
+
+        bool frame_decoder_impl::decode_header()
+        {
+            const uint8_t *header = &m_nibbles[0];
+            m_payload_len = (header[0] << 4) + header[1];
+            m_has_crc = header[2] & 1;
+            uint8_t cr = header[2] >> 1;
+            uint8_t header_chk = ((header[3] & 1) << 4) + header[4];
+
+            if (m_print_header)
+            {
+                std::cout << "\n--------Header--------" << std::endl;
+                std::cout << "Payload length: " << (int)m_payload_len << std::endl;
+                std::cout << "CRC presence:   " << (int)m_has_crc << std::endl;
+                std::cout << "Coding rate:    " << (int)cr << std::endl;
+            }
+            int head_err = header_chk != header_checksum(header);
+            if (head_err || m_payload_len == 0 || cr < 1 || cr > 4)
+            {
+                if (m_print_header && head_err)
+                    std::cout << RED << "Header checksum invalid!" << RESET << std::endl << std::endl;
+                else if (m_print_header && m_payload_len == 0)
+                    std::cout << RED << "Frame can not be empty!" << RESET << std::endl << std::endl;
+                else if (m_print_header)
+                    std::cout << RED << "Invalid coding rate!" << RESET << std::endl << std::endl;
+                head_err = 1;
+            }
+            else if (m_print_header)
+                std::cout << "Header checksum valid!" << std::endl << std::endl;
+
+            publish_frame_info(cr, m_payload_len, m_has_crc, m_ldro_mode, head_err);
+            m_frame_nibbles = header_len + 2 * m_payload_len + (m_has_crc ? 4 : 0);
+            return !head_err;
+        }
+
+        int frame_decoder_impl::output_frame(uint8_t *out, uint64_t offset)
+        {
+            m_frame_ready = false;
+            if (m_has_crc && m_payload_len < 2)
+            { // undefined CRC
+                std::cout << "CRC not supported for payload smaller than 2 bytes" << std::endl;
+                return 0;
+            }
+
+            // dewhiten the payload, the CRC is not whitened
+            const uint8_t *nibbles = &m_nibbles[m_impl_head ? 0 : header_len];
+            uint32_t frame_len = m_payload_len + (m_has_crc ? 2 : 0);
+            std::vector<uint8_t> frame(frame_len);
+            for (uint32_t i = 0; i < frame_len; i++)
+            {
+                frame[i] = nibbles[2 * i + 1] << 4 | nibbles[2 * i];
+                if (i < m_payload_len)
+                    frame[i] ^= whitening_seq[i];
+            }
+            std::string message_str((const char *)&frame[0], m_payload_len);
+
+            pmt::pmt_t frame_info = m_frame_info;
+            if (m_has_crc)
+            {
+                // calculate CRC on the N-2 firsts data bytes, XOR-ed with the last 2 data bytes
+                uint16_t crc = crc16(&frame[0], m_payload_len - 2) ^ frame[m_payload_len - 1] ^ (frame[m_payload_len - 2] << 8);
+                bool crc_valid = (frame[m_payload_len] + (frame[m_payload_len + 1] << 8)) == crc;
+                frame_info = pmt::dict_add(frame_info, pmt::string_to_symbol("crc_valid"), pmt::from_bool(crc_valid));
+
+                if (m_print_payload)
+                {
+                    std::cout << "rx msg: " << message_str << std::endl
+                              << std::endl;
+                    if (crc_valid)
+                        std::cout << "CRC valid!" << std::endl
+                                  << std::endl;
+                    else
+                        std::cout << RED << "CRC invalid" << RESET << std::endl
+                                  << std::endl;
+                }
+            }
+            else if (m_print_payload)
+                std::cout << "rx msg: " << message_str << std::endl;
+
+            if (m_pdu)
+                message_port_pub(pmt::intern("msg"), pmt::cons(frame_info, pmt::init_u8vector(m_payload_len, &frame[0])));
+            else
+                message_port_pub(pmt::intern("msg"), pmt::mp(message_str));
+
+            if (!out)
+                return 0;
+            memcpy(out, &frame[0], m_payload_len);
+            add_item_tag(0, offset, pmt::string_to_symbol("frame_info"), frame_info);
+            return m_payload_len;
+        }
+
+        int frame_decoder_impl::general_work(int noutput_items,
+                                             gr_vector_int &ninput_items,
+                                             gr_vector_const_void_star &input_items,
+                                             gr_vector_void_star &output_items)
+        {
+            const uint8_t *in = (const uint8_t *)input_items[0];
+            uint8_t *out = output_items.size() ? (uint8_t *)output_items[0] : nullptr;
+            size_t item_size = m_soft_decoding ? soft_symbol_item_size(m_soft_format) : sizeof(uint16_t);
+            bool compact_soft = m_soft_decoding && m_soft_format != SOFT_DOUBLE;
+            int nitems_consumed = 0;
+            int nitems_output = 0;
+
+            std::vector<tag_t> tags;
+            get_tags_in_window(tags, 0, 0, ninput_items[0], pmt::string_to_symbol("frame_info"));
+            size_t next_tag = 0;
+
+            // decode all the complete blocks available, over as many frames as the output can take
+            while (true)
+            {
+                if (m_frame_ready)
+                {
+                    if (out && noutput_items - nitems_output < (int)m_payload_len)
+                        break;
+                    nitems_output += output_frame(out ? out + nitems_output : nullptr, nitems_written(0) + nitems_output);
+                }
+                if (nitems_consumed == ninput_items[0])
+                    break;
+
+                uint64_t pos = nitems_read(0) + nitems_consumed;
+                while (next_tag < tags.size() && tags[next_tag].offset < pos)
+                    next_tag++;
+                if (next_tag < tags.size() && tags[next_tag].offset == pos)
+                {
+                    // the tag is read again in the next call if its block is not complete yet, only handle it once
+                    if (pos != m_last_tag_offset)
+                        frame_info_handler(tags[next_tag].value);
+                    m_last_tag_offset = pos;
+                    next_tag++;
+                }
+                // only use the items until the next frame_info tag (SF might change)
+                int nitems_available = (next_tag < tags.size() ? tags[next_tag].offset - nitems_read(0) : ninput_items[0]) - nitems_consumed;
+
+                if (!m_in_frame)
+                { // padding of a complete frame or frame with an invalid header, skip until the next frame
+                    nitems_consumed += nitems_available;
+                    continue;
+                }
+
+                // the first block uses the reduced rate and a coding rate 4/8
+                uint8_t sf_app = (m_is_header || m_ldro) ? m_sf - 2 : m_sf;
+                uint8_t cw_len = m_is_header ? 8 : m_cr + 4;
+                int block_items = cw_len * (compact_soft ? sf_app : 1);
+                if (nitems_available < block_items)
+                {
+                    if (next_tag < tags.size())
+                        nitems_consumed += nitems_available; // incomplete block before the next tag
+                    else
+                        break; // wait for the rest of the block
+                    continue;
+                }
+
+                size_t n_nibbles = m_nibbles.size();
+                m_nibbles.resize(n_nibbles + sf_app);
+                decode_block(in + nitems_consumed * item_size, &m_nibbles[n_nibbles], sf_app, cw_len);
+                nitems_consumed += block_items;
+
+                if (m_is_header)
+                {
+                    m_is_header = false;
+                    if (!m_impl_head && !decode_header())
+                    { // invalid header, frame_sync looks for a new preamble
+                        m_in_frame = false;
+                        continue;
+                    }
+                }
+                if (m_nibbles.size() >= m_frame_nibbles)
+                {
+                    m_frame_ready = true;
+                    m_in_frame = false;
+                }
+            }
+            consume_each(nitems_consumed);
+            return nitems_output;
+        }
+
+    } /* namespace lora_sdr */
+} /* namespace gr */
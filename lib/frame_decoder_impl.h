@@ -0,0 +1,103 @@
+#ifndef INCLUDED_LORA_SDR_FRAME_DECODER_IMPL_H
+#define INCLUDED_LORA_SDR_FRAME_DECODER_IMPL_H
+
+#include <gnuradio/lora_sdr/frame_decoder.h>
+#include <gnuradio/lora_sdr/utilities.h>
+
+namespace gr
+{
+  namespace lora_sdr
+  {
+
+    class frame_decoder_impl : public frame_decoder
+    {
+    private:
+      const uint8_t header_len = 5; ///< size of the header in nibbles
+
+      bool m_impl_head;             ///< use implicit header mode
+      uint8_t m_impl_cr;            ///< coding rate of the implicit header mode
+      uint32_t m_impl_pay_len;      ///< payload length of the implicit header mode
+      bool m_impl_has_crc;          ///< presence of a payload CRC in implicit header mode
+      uint8_t m_ldro_mode;          ///< low datarate optimisation mode, published with the header
+      bool m_print_header;          ///< print or not header information in terminal
+      bool m_print_payload;         ///< print or not the received payloads in terminal
+      bool m_soft_decoding;         ///< Hard/Soft decoding
+      uint8_t m_soft_format;        ///< Format of the soft values, see soft_format
+      bool m_pdu;                   ///< publish the payload as a PDU (frame info dictionary, u8vector) instead of a symbol
+
+      uint8_t m_sf;                 ///< Spreading factor of the current frame
+      uint8_t m_cr;                 ///< Coding rate of the current frame payload
+      bool m_ldro;                  ///< use of low datarate optimisation for the current frame
+      bool m_is_header;             ///< the next block is the first one of the frame (cr=4/8, reduced rate)
+      bool m_in_frame;              ///< blocks of a frame are expected, false after a complete frame or an invalid header
+      bool m_frame_ready;           ///< all the nibbles of the frame are received, its payload waits for output space
+      uint64_t m_last_tag_offset;   ///< offset of the last frame_info tag handled, the tag is read again if the block is not complete
+
+      uint32_t m_payload_len;       ///< payload length of the current frame in bytes
+      bool m_has_crc;               ///< presence of a payload CRC in the current frame
+      uint32_t m_frame_nibbles;     ///< number of nibbles of the current frame (header, payload and CRC)
+      std::vector<uint8_t> m_nibbles; ///< the nibbles of the current frame received so far
+      pmt::pmt_t m_frame_info;      ///< the header information of the current frame, as published
+      pmt::pmt_t m_sample_offset;   ///< input sample of frame_sync where the current frame header starts, PMT_NIL if not tagged
+
+      std::vector<uint16_t> m_symbols; ///< the gray mapped symbols of a block
+      std::vector<uint8_t> m_codewords; ///< the codewords of a block
+
+      /**
+       *  \brief  Handle a frame_info tag of fft_demod, the first block of a frame or its payload parameters
+       */
+      void frame_info_handler(const pmt::pmt_t &frame_info);
+
+      /**
+       *  \brief  Decode a block of symbols (or LLRs) to its sf_app nibbles
+       *
+       *  \param  in
+       *          the first item of the block
+       *  \param  nibbles
+       *          the output nibbles
+       *  \param  sf_app
+       *          number of bits per symbol carrying the codewords
+       *  \param  cw_len
+       *          length of the codewords
+       */
+      void decode_block(const void *in, uint8_t *nibbles, uint8_t sf_app, uint8_t cw_len);
+
+      /**
+       *  \brief  Check the explicit header at the beginning of the frame nibbles, publish its information
+       *  \return true if the header is valid
+       */
+      bool decode_header();
+
+      /**
+       *  \brief  Publish the header information of a frame on the frame_info port
+       */
+      void publish_frame_info(int cr, int pay_len, int crc, uint8_t ldro_mode, int err);
+
+      /**
+       *  \brief  Dewhiten the frame and verify its CRC, output and publish the payload
+       *
+       *  \param  out
+       *          the output buffer, or nullptr if the output is not connected
+       *  \param  offset
+       *          the absolute offset of the first output byte
+       *  \return the number of bytes output
+       */
+      int output_frame(uint8_t *out, uint64_t offset);
+
+    public:
+      frame_decoder_impl(bool impl_head, uint8_t cr, uint32_t pay_len, bool has_crc, uint8_t ldro_mode, bool print_header, bool print_payload,
+                         bool soft_decoding, uint8_t soft_format, bool pdu);
+      ~frame_decoder_impl();
+
+      void forecast(int noutput_items, gr_vector_int &ninput_items_required);
+
+      int general_work(int noutput_items,
+                       gr_vector_int &ninput_items,
+                       gr_vector_const_void_star &input_items,
+                       gr_vector_void_star &output_items);
+    };
+
+  } // namespace lora_sdr
+} // namespace gr
+
+#endif /* INCLUDED_LORA_SDR_FRAME_DECODER_IMPL_H */
@@ -0,0 +1,130 @@
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <gnuradio/io_signature.h>
+#include "frame_encoder_impl.h"
+#include "bit_kernels.h"
+#include <stdexcept>
+
+namespace gr
+{
+    namespace lora_sdr
+    {
+
+        frame_encoder::sptr
+        frame_encoder::make(uint8_t sf, uint8_t cr, bool has_crc, bool impl_head, uint8_t ldro_mode, uint32_t bw)
+        {
+            return gnuradio::get_initial_sptr(new frame_encoder_impl(sf, cr, has_crc, impl_head, ldro_mode, bw));
+        }
+
+        std::vector<uint32_t> frame_encoder::encode(const std::vector<uint8_t> &payload, uint8_t sf, uint8_t cr, bool has_crc, bool impl_head, bool ldro)
+        {
+            if (payload.size() > 255)
+                throw std::invalid_argument("[frame_encoder_impl.cc] payload longer than 255 bytes");
+            std::vector<uint32_t> symbols(frame_symb_numb(2 * payload.size() + (impl_head ? 0 : 5) + (has_crc ? 4 : 0), sf, cr, ldro));
+            encode_frame(payload.data(), payload.size(), &symbols[0], sf, cr, has_crc, impl_head, ldro);
+            return symbols;
+        }
+
+        /*
+         * The private constructor
+         */
+        frame_encoder_impl::frame_encoder_impl(uint8_t sf, uint8_t cr, bool has_crc, bool impl_head, uint8_t ldro_mode, uint32_t bw)
+            : gr::sync_block("frame_encoder",
+                             gr::io_signature::make(0, 0, 0),
+                             gr::io_signature::make(1, 1, sizeof(uint32_t)))
+        {
+            m_cr = cr;
+            m_has_crc = has_crc;
+            m_impl_head = impl_head;
+            m_ldro_mode = ldro_mode;
+            m_bw = bw;
+            set_sf(sf);
+
+            // a frame is output at once, the longest one has 255 bytes at the minimal sf with low datarate optimisation and a coding rate 4/8 (1384 symbols)
+            set_min_output_buffer(frame_symb_numb(2 * 255 + 5 + 4, MIN_SF, 4, true));
+
+            message_port_register_in(pmt::mp("msg"));
+            set_msg_handler(pmt::mp("msg"), [this](pmt::pmt_t msg)
+                            { this->msg_handler(msg); });
+        }
+
+        /*
+         * Our virtual destructor.
+         */
+        frame_encoder_impl::~frame_encoder_impl() {}
+
+        void frame_encoder_impl::set_cr(uint8_t cr)
+        {
+            m_cr = cr;
+        }
+
+        uint8_t frame_encoder_impl::get_cr()
+        {
+            return m_cr;
+        }
+
+        void frame_encoder_impl::set_sf(uint8_t sf)
+        {
+            m_sf = sf;
+            if (m_ldro_mode == AUTO)
+                m_ldro = (float)(1u << m_sf) * 1e3 / m_bw > LDRO_MAX_DURATION_MS;
+            else
+                m_ldro = m_ldro_mode;
+        }
+
+        void frame_encoder_impl::msg_handler(pmt::pmt_t message)
+        {
+            std::vector<uint8_t> payload;
+            if (pmt::is_pair(message) && pmt::is_u8vector(pmt::cdr(message)))
+            { // PDU: metadata dictionary and payload bytes
+                size_t len;
+                const uint8_t *bytes = pmt::u8vector_elements(pmt::cdr(message), len);
+                payload.assign(bytes, bytes + len);
+            }
+            else if (pmt::is_symbol(message))
+            {
+                std::string str = pmt::symbol_to_string(message);
+                payload.assign(str.begin(), str.end());
+            }
+            else
+            {
+                std::cout << RED << "Frame encoder: message is neither a string nor a PDU, dropped" << RESET << std::endl;
+                return;
+            }
+            if (payload.size() > 255)
+            {
+                std::cout << RED << "Frame encoder: payload longer than 255 bytes, dropped" << RESET << std::endl;
+                return;
+            }
+            m_payloads.push_back(payload);
+        }
+
+        int frame_encoder_impl::work(int noutput_items,
+                                     gr_vector_const_void_star &input_items,
+                                     gr_vector_void_star &output_items)
+        {
+            uint32_t *out = (uint32_t *)output_items[0];
+
+            if (m_payloads.size() >= 100 && !(m_payloads.size() % 100))
+            {
+                std::cout << RED << m_payloads.size() << " frames in waiting list. Transmitter has issue to keep up at that transmission frequency." << RESET << std::endl;
+            }
+            // encode all the frames fitting in the output
+            int nitems_to_output = 0;
+            while (m_payloads.size())
+            {
+                const std::vector<uint8_t> &payload = m_payloads.front();
+                uint32_t symb_numb = frame_symb_numb(2 * payload.size() + (m_impl_head ? 0 : 5) + (m_has_crc ? 4 : 0), m_sf, m_cr, m_ldro);
+                if (nitems_to_output + symb_numb > (uint32_t)noutput_items)
+                    break;
+                add_item_tag(0, nitems_written(0) + nitems_to_output, pmt::string_to_symbol("frame_len"), pmt::from_long(symb_numb));
+                nitems_to_output += encode_frame(payload.data(), payload.size(), &out[nitems_to_output], m_sf, m_cr, m_has_crc, m_impl_head, m_ldro);
+                m_payloads.pop_front();
+            }
+            return nitems_to_output;
+        }
+
+    } /* namespace lora_sdr */
+} /* namespace gr */
@@ -0,0 +1,46 @@
+#ifndef INCLUDED_LORA_SDR_FRAME_ENCODER_IMPL_H
+#define INCLUDED_LORA_SDR_FRAME_ENCODER_IMPL_H
+
+#include <gnuradio/lora_sdr/frame_encoder.h>
+#include <gnuradio/lora_sdr/utilities.h>
+#include <deque>
+
+namespace gr
+{
+  namespace lora_sdr
+  {
+
+    class frame_encoder_impl : public frame_encoder
+    {
+    private:
+      uint8_t m_sf;                               ///< Transmission spreading factor
+      uint8_t m_cr;                               ///< Transmission coding rate
+      bool m_has_crc;                             ///< Append the payload CRC
+      bool m_impl_head;                           ///< Use implicit header mode
+      uint8_t m_ldro_mode;                        ///< Low datarate optimisation mode
+      uint32_t m_bw;                              ///< Bandwidth
+      bool m_ldro;                                ///< Use of low datarate optimisation for the current sf
+      std::deque<std::vector<uint8_t>> m_payloads; ///< Payloads waiting to be encoded
+
+      /**
+       *  \brief  Queue the payload of a message, given as a PDU or a string
+       */
+      void msg_handler(pmt::pmt_t message);
+
+    public:
+      frame_encoder_impl(uint8_t sf, uint8_t cr, bool has_crc, bool impl_head, uint8_t ldro_mode, uint32_t bw);
+      ~frame_encoder_impl();
+
+      void set_cr(uint8_t cr);
+      uint8_t get_cr();
+      void set_sf(uint8_t sf);
+
+      int work(int noutput_items,
+               gr_vector_const_void_star &input_items,
+               gr_vector_void_star &output_items);
+    };
+
+  } // namespace lora_sdr
+} // namespace gr
+
+#endif /* INCLUDED_LORA_SDR_FRAME_ENCODER_IMPL_H */
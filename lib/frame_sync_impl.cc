@@ -7,6 +7,7 @@
 #include <gnuradio/io_signature.h>
 #include <volk/volk_alloc.hh>
 #include "frame_sync_impl.h"
+#include "bit_kernels.h"
 
 namespace gr
 {
@@ -14,15 +15,15 @@ namespace gr
     {
 
         frame_sync::sptr
-        frame_sync::make(uint32_t center_freq, uint32_t bandwidth, uint8_t sf, bool impl_head, std::vector<uint16_t> sync_word, uint8_t os_factor, uint16_t preamble_len = 8)
+        frame_sync::make(uint32_t center_freq, uint32_t bandwidth, uint8_t sf, bool impl_head, std::vector<uint16_t> sync_word, uint8_t os_factor, uint16_t preamble_len, uint8_t fft_backend, float energy_gate, bool inline_header, uint8_t ldro_mode)
         {
-            return gnuradio::get_initial_sptr(new frame_sync_impl(center_freq, bandwidth, sf, impl_head, sync_word, os_factor, preamble_len));
+            return gnuradio::get_initial_sptr(new frame_sync_impl(center_freq, bandwidth, sf, impl_head, sync_word, os_factor, preamble_len, fft_backend, energy_gate, inline_header, ldro_mode));
         }
 
         /*
          * The private constructor
          */
-        frame_sync_impl::frame_sync_impl(uint32_t center_freq, uint32_t bandwidth, uint8_t sf, bool impl_head, std::vector<uint16_t> sync_word, uint8_t os_factor, uint16_t preamble_len)
+        frame_sync_impl::frame_sync_impl(uint32_t center_freq, uint32_t bandwidth, uint8_t sf, bool impl_head, std::vector<uint16_t> sync_word, uint8_t os_factor, uint16_t preamble_len, uint8_t fft_backend, float energy_gate, bool inline_header, uint8_t ldro_mode)
             : gr::block("frame_sync",
                         gr::io_signature::make(1, 1, sizeof(gr_complex)),
                         gr::io_signature::make2(1, 2, sizeof(gr_complex), sizeof(float)))
@@ -35,6 +36,7 @@ namespace gr
 
             m_sync_words = sync_word;
             m_os_factor = os_factor;
+            m_fft_backend = fft_backend;
             if (preamble_len < 5)
             {
                 std::cerr << RED << " Preamble length should be greater than 5!" << RESET << std::endl;
@@ -47,9 +49,28 @@ namespace gr
             up_symb_to_use = m_n_up_req - 1;
 
             m_sto_frac = 0.0;
-            
+
+            m_energy_gate = energy_gate > 0 ? pow(10, energy_gate / 10) : 0;
+            m_noise_est = 0;
+            m_noise_floor = -1;
+            m_noise_from_est = false;
+            m_gate_open = false;
+            m_gate_detected = false;
+            m_gate_len = 0;
+            m_gate_quiet_cnt = 0;
+            m_gate_init_cnt = 0;
+            m_detect_windows = 0;
+            m_searched_windows = 0;
+            m_false_alarms = 0;
+            m_misses = 0;
+            m_in_offset = 0;
 
             m_impl_head = impl_head;
+            m_inline_header = inline_header;
+            m_ldro_mode = ldro_mode;
+            m_inline_cnt = 0;
+            m_latency_saved_sum = 0;
+            m_latency_cnt = 0;
 
             // Convert given sync word into the two modulated values in preamble
             if (m_sync_words.size() == 1)
@@ -73,6 +94,13 @@ namespace gr
             in_down.resize(m_number_of_bins);
             preamble_raw.resize(m_preamb_len * m_number_of_bins);
             net_id_samp.resize(m_samples_per_symbol * 2.5); // we should be able to move up to one quarter of symbol in each direction
+            // correction vectors of the preamble, for up to 3 additional upchirps
+            CFO_frac_correc_aug.resize(up_symb_to_use * m_number_of_bins);
+            CFO_int_correc.resize((m_n_up_req + 3) * m_number_of_bins);
+            sfo_corr_vect.resize((m_n_up_req + 3) * m_number_of_bins);
+            corr_preamb.resize((m_n_up_req + 3) * m_number_of_bins);
+            net_ids_samp_dec.resize(2 * m_number_of_bins);
+            m_header_symbs.resize(8 * m_number_of_bins);
 
             build_ref_chirps(&m_upchirp[0], &m_downchirp[0], m_sf);
 
@@ -81,10 +109,7 @@ namespace gr
             k_hat = 0;
             preamb_up_vals.resize(m_n_up_req, 0);
             frame_cnt = 0;
-            cfg_gsv = kiss_fft_alloc(m_number_of_bins, 0, 0, 0);
-            
-            cx_in = new kiss_fft_cpx[m_number_of_bins];
-            cx_out = new kiss_fft_cpx[m_number_of_bins];
+            update_fft_plans();
             // register message ports
             message_port_register_in(pmt::mp("frame_info"));
             set_msg_handler(pmt::mp("frame_info"), [this](pmt::pmt_t msg)
@@ -108,8 +133,6 @@ namespace gr
          */
         frame_sync_impl::~frame_sync_impl()
         {
-            free(cfg_gsv);
-
         }
         int frame_sync_impl::my_roundf(float number)
         {
@@ -126,14 +149,10 @@ namespace gr
             int k0;
             float cfo_frac;
             double Y_1, Y0, Y1, u, v, ka, wa, k_residual;
-            std::vector<gr_complex> CFO_frac_correc_aug(up_symb_to_use * m_number_of_bins); ///< CFO frac correction vector
-            std::vector<gr_complex> dechirped(up_symb_to_use * m_number_of_bins);
-            kiss_fft_cpx *cx_in_cfo = new kiss_fft_cpx[2 * up_symb_to_use * m_number_of_bins];
-            kiss_fft_cpx *cx_out_cfo = new kiss_fft_cpx[2 * up_symb_to_use * m_number_of_bins];
+            gr_complex *cx_in_cfo = m_fft_cfo->get_inbuf();
 
             std::vector<float> fft_mag_sq(2 * up_symb_to_use * m_number_of_bins);
-           
-            kiss_fft_cfg cfg_cfo = kiss_fft_alloc(2 * up_symb_to_use * m_number_of_bins, 0, 0, 0);
+
             // create longer downchirp
             std::vector<gr_complex> downchirp_aug(up_symb_to_use * m_number_of_bins);
             for (int i = 0; i < up_symb_to_use; i++)
@@ -142,31 +161,13 @@ namespace gr
             }
 
             // Dechirping
-            volk_32fc_x2_multiply_32fc(&dechirped[0], samples, &downchirp_aug[0], up_symb_to_use * m_number_of_bins);
-            // prepare FFT
-            for (uint32_t i = 0; i < 2 * up_symb_to_use * m_number_of_bins; i++)
-            {
-                if (i < up_symb_to_use * m_number_of_bins)
-                {
-                    cx_in_cfo[i].r = dechirped[i].real();
-                    cx_in_cfo[i].i = dechirped[i].imag();
-                }
-                else
-                { // add padding
-                    cx_in_cfo[i].r = 0;
-                    cx_in_cfo[i].i = 0;
-                }
-            }
+            volk_32fc_x2_multiply_32fc(cx_in_cfo, samples, &downchirp_aug[0], up_symb_to_use * m_number_of_bins);
+            // add padding
+            std::fill(cx_in_cfo + up_symb_to_use * m_number_of_bins, cx_in_cfo + 2 * up_symb_to_use * m_number_of_bins, gr_complex(0, 0));
             // do the FFT
-            kiss_fft(cfg_cfo, cx_in_cfo, cx_out_cfo);
+            m_fft_cfo->execute();
             // Get magnitude
-            for (uint32_t i = 0u; i < 2 * up_symb_to_use * m_number_of_bins; i++)
-            {
-                fft_mag_sq[i] = cx_out_cfo[i].r * cx_out_cfo[i].r + cx_out_cfo[i].i * cx_out_cfo[i].i;
-            }
-            free(cfg_cfo);
-            delete[] cx_in_cfo;
-            delete[] cx_out_cfo;
+            volk_32fc_magnitude_squared_32f(&fft_mag_sq[0], m_fft_cfo->get_outbuf(), 2 * up_symb_to_use * m_number_of_bins);
             // get argmax here
             k0 = std::distance(std::begin(fft_mag_sq), std::max_element(std::begin(fft_mag_sq), std::end(fft_mag_sq)));
 
@@ -183,10 +184,7 @@ namespace gr
             k_residual = fmod((k0 + ka) / 2 / up_symb_to_use, 1);
             cfo_frac = k_residual - (k_residual > 0.5 ? 1 : 0);
             // Correct CFO frac in preamble
-            for (uint32_t n = 0; n < up_symb_to_use * m_number_of_bins; n++)
-            {
-                CFO_frac_correc_aug[n] = gr_expj(-2 * M_PI * (cfo_frac) / m_number_of_bins * n);
-            }
+            build_rotator(&CFO_frac_correc_aug[0], -cfo_frac / m_number_of_bins, up_symb_to_use * m_number_of_bins);
 
             volk_32fc_x2_multiply_32fc(&preamble_upchirps[0], samples, &CFO_frac_correc_aug[0], up_symb_to_use * m_number_of_bins);
 
@@ -196,46 +194,25 @@ namespace gr
         {
             std::vector<int> k0(up_symb_to_use);
             float cfo_frac;
-            std::vector<gr_complex> CFO_frac_correc_aug(up_symb_to_use * m_number_of_bins); ///< CFO frac correction vector
             std::vector<double> k0_mag(up_symb_to_use);
             std::vector<gr_complex> fft_val(up_symb_to_use * m_number_of_bins);
 
-            std::vector<gr_complex> dechirped(m_number_of_bins);
-            kiss_fft_cpx *cx_in_cfo = new kiss_fft_cpx[m_number_of_bins];
-            kiss_fft_cpx *cx_out_cfo = new kiss_fft_cpx[m_number_of_bins];
             std::vector<float> fft_mag_sq(m_number_of_bins);
-            for (size_t i = 0; i < m_number_of_bins; i++)
-            {
-                fft_mag_sq[i] = 0;
-            }
-             
-            kiss_fft_cfg cfg_cfo = kiss_fft_alloc(m_number_of_bins, 0, 0, 0);
+
             for (int i = 0; i < up_symb_to_use; i++)
             {
                 // Dechirping
-                volk_32fc_x2_multiply_32fc(&dechirped[0], &samples[m_number_of_bins * i], &m_downchirp[0], m_number_of_bins);
-                // prepare FFT
-                for (uint32_t j = 0; j < m_number_of_bins; j++)
-                {
-                    cx_in_cfo[j].r = dechirped[j].real();
-                    cx_in_cfo[j].i = dechirped[j].imag();
-                }
+                volk_32fc_x2_multiply_32fc(m_fft->get_inbuf(), &samples[m_number_of_bins * i], &m_downchirp[0], m_number_of_bins);
                 // do the FFT
-                kiss_fft(cfg_cfo, cx_in_cfo, cx_out_cfo);
+                m_fft->execute();
                 // Get magnitude
+                volk_32fc_magnitude_squared_32f(&fft_mag_sq[0], m_fft->get_outbuf(), m_number_of_bins);
+                memcpy(&fft_val[i * m_number_of_bins], m_fft->get_outbuf(), m_number_of_bins * sizeof(gr_complex));
 
-                for (uint32_t j = 0u; j < m_number_of_bins; j++)
-                {
-                    fft_mag_sq[j] = cx_out_cfo[j].r * cx_out_cfo[j].r + cx_out_cfo[j].i * cx_out_cfo[j].i;
-                    fft_val[j + i * m_number_of_bins] = gr_complex(cx_out_cfo[j].r, cx_out_cfo[j].i);
-                }
                 k0[i] = std::distance(std::begin(fft_mag_sq), std::max_element(std::begin(fft_mag_sq), std::end(fft_mag_sq)));
 
                 k0_mag[i] = fft_mag_sq[k0[i]];
             }
-            free(cfg_cfo);
-            delete[] cx_in_cfo;
-            delete[] cx_out_cfo;
             // get argmax
             int idx_max = k0[std::distance(std::begin(k0_mag), std::max_element(std::begin(k0_mag), std::end(k0_mag)))];
             gr_complex four_cum(0.0f, 0.0f);
@@ -245,10 +222,7 @@ namespace gr
             }
             cfo_frac = -std::arg(four_cum) / 2 / M_PI;
             // Correct CFO in preamble
-            for (uint32_t n = 0; n < up_symb_to_use * m_number_of_bins; n++)
-            {
-                CFO_frac_correc_aug[n] = gr_expj(-2 * M_PI * cfo_frac / m_number_of_bins * n);
-            }
+            build_rotator(&CFO_frac_correc_aug[0], -cfo_frac / m_number_of_bins, up_symb_to_use * m_number_of_bins);
             volk_32fc_x2_multiply_32fc(&preamble_upchirps[0], samples, &CFO_frac_correc_aug[0], up_symb_to_use * m_number_of_bins);
             return cfo_frac;
         }
@@ -259,48 +233,25 @@ namespace gr
             double Y_1, Y0, Y1, u, v, ka, wa, k_residual;
             float sto_frac = 0;
 
-            std::vector<gr_complex> dechirped(m_number_of_bins);
-            kiss_fft_cpx *cx_in_sto = new kiss_fft_cpx[2 * m_number_of_bins];
-            kiss_fft_cpx *cx_out_sto = new kiss_fft_cpx[2 * m_number_of_bins];
+            gr_complex *cx_in_sto = m_fft_sto->get_inbuf();
+            gr_complex *cx_out_sto = m_fft_sto->get_outbuf();
 
-            std::vector<float> fft_mag_sq(2 * m_number_of_bins);
-            for (size_t i = 0; i < 2 * m_number_of_bins; i++)
-            {
-                fft_mag_sq[i] = 0;
-            }
-         
-            kiss_fft_cfg cfg_sto = kiss_fft_alloc(2 * m_number_of_bins, 0, 0, 0);
+            std::vector<float> fft_mag_sq(2 * m_number_of_bins, 0);
 
             for (int i = 0; i < up_symb_to_use; i++)
             {
                 // Dechirping
-                volk_32fc_x2_multiply_32fc(&dechirped[0], &preamble_upchirps[m_number_of_bins * i], &m_downchirp[0], m_number_of_bins);
-
-                // prepare FFT
-                for (uint32_t j = 0; j < 2 * m_number_of_bins; j++)
-                {
-                    if (j < m_number_of_bins)
-                    {
-                        cx_in_sto[j].r = dechirped[j].real();
-                        cx_in_sto[j].i = dechirped[j].imag();
-                    }
-                    else
-                    { // add padding
-                        cx_in_sto[j].r = 0;
-                        cx_in_sto[j].i = 0;
-                    }
-                }
+                volk_32fc_x2_multiply_32fc(cx_in_sto, &preamble_upchirps[m_number_of_bins * i], &m_downchirp[0], m_number_of_bins);
+                // add padding
+                std::fill(cx_in_sto + m_number_of_bins, cx_in_sto + 2 * m_number_of_bins, gr_complex(0, 0));
                 // do the FFT
-                kiss_fft(cfg_sto, cx_in_sto, cx_out_sto);
+                m_fft_sto->execute();
                 // Get magnitude
                 for (uint32_t j = 0u; j < 2 * m_number_of_bins; j++)
                 {
-                    fft_mag_sq[j] += cx_out_sto[j].r * cx_out_sto[j].r + cx_out_sto[j].i * cx_out_sto[j].i;
+                    fft_mag_sq[j] += std::norm(cx_out_sto[j]);
                 }
             }
-            free(cfg_sto);
-            delete[] cx_in_sto;
-            delete[] cx_out_sto;
 
             // get argmax here
             k0 = std::distance(std::begin(fft_mag_sq), std::max_element(std::begin(fft_mag_sq), std::end(fft_mag_sq)));
@@ -326,24 +277,17 @@ namespace gr
 
         uint32_t frame_sync_impl::get_symbol_val(const gr_complex *samples, gr_complex *ref_chirp)
         {
-            // update code not use kiss_fft_alloc every time
             double sig_en = 0;
             std::vector<float> fft_mag(m_number_of_bins);
-            volk::vector<gr_complex> dechirped(m_number_of_bins);
-
-            volk_32fc_x2_multiply_32fc(&dechirped[0], samples, ref_chirp, m_number_of_bins);
 
-            for (uint32_t i = 0; i < m_number_of_bins; i++)
-            {
-                cx_in[i].r = dechirped[i].real();
-                cx_in[i].i = dechirped[i].imag();
-            }
-            kiss_fft(cfg_gsv, cx_in, cx_out);
+            volk_32fc_x2_multiply_32fc(m_fft->get_inbuf(), samples, ref_chirp, m_number_of_bins);
+            m_fft->execute();
+            gr_complex *cx_out = m_fft->get_outbuf();
 
             // Get magnitude
             for (uint32_t i = 0u; i < m_number_of_bins; i++)
             {
-                fft_mag[i] = cx_out[i].r * cx_out[i].r + cx_out[i].i * cx_out[i].i;
+                fft_mag[i] = std::norm(cx_out[i]);
                 sig_en += fft_mag[i];
             }
 
@@ -362,34 +306,49 @@ namespace gr
         {
             double tot_en = 0;
             std::vector<float> fft_mag(m_number_of_bins);
-            std::vector<gr_complex> dechirped(m_number_of_bins);
-
-            kiss_fft_cfg cfg = kiss_fft_alloc(m_number_of_bins, 0, 0, 0);
 
             // Multiply with ideal downchirp
-            volk_32fc_x2_multiply_32fc(&dechirped[0], samples, &m_downchirp[0], m_number_of_bins);
-
-            for (uint32_t i = 0; i < m_number_of_bins; i++)
-            {
-                cx_in[i].r = dechirped[i].real();
-                cx_in[i].i = dechirped[i].imag();
-            }
+            volk_32fc_x2_multiply_32fc(m_fft->get_inbuf(), samples, &m_downchirp[0], m_number_of_bins);
             // do the FFT
-            kiss_fft(cfg, cx_in, cx_out);
+            m_fft->execute();
+            gr_complex *cx_out = m_fft->get_outbuf();
 
             // Get magnitude
             for (uint32_t i = 0u; i < m_number_of_bins; i++)
             {
-                fft_mag[i] = cx_out[i].r * cx_out[i].r + cx_out[i].i * cx_out[i].i;
+                fft_mag[i] = std::norm(cx_out[i]);
                 tot_en += fft_mag[i];
             }
-            free(cfg);
 
             int max_idx = std::distance(std::begin(fft_mag), std::max_element(std::begin(fft_mag), std::end(fft_mag)));
             float sig_en = fft_mag[max_idx];
             return 10 * log10(sig_en / (tot_en - sig_en));
         }
 
+        void frame_sync_impl::build_sfo_correc(uint32_t length)
+        {
+            // the phase of sample m of symbol i is -2*pi*(a*m^2 + (b*i+c)*m), a first order recursion on the phasor
+            // increment, itself rotated by the second order difference -2*pi*2a at each sample
+            double clk_off = sfo_hat / m_number_of_bins;
+            double fs = m_bw;
+            double fs_p = m_bw * (1 - clk_off);
+            double a = (m_bw / fs_p * m_bw / fs_p - m_bw / fs * m_bw / fs) / 2 / m_number_of_bins;
+            double b = m_bw / fs_p * m_bw / fs_p - m_bw / fs_p;
+            double c = m_bw / 2 * (1 / fs - 1 / fs_p);
+            const std::complex<double> step_rot = std::polar(1.0, -2 * M_PI * 2 * a);
+            for (uint32_t i = 0; i * m_number_of_bins < length; i++)
+            {
+                std::complex<double> phasor(1.0, 0.0);
+                std::complex<double> step = std::polar(1.0, -2 * M_PI * (a + b * i + c));
+                for (uint32_t m = 0; m < m_number_of_bins && i * m_number_of_bins + m < length; m++)
+                {
+                    sfo_corr_vect[i * m_number_of_bins + m] = gr_complex(phasor);
+                    phasor *= step;
+                    step *= step_rot;
+                }
+            }
+        }
+
         void custom_rotate(std::vector<gr_complex>& vec, size_t positions) {
             std::rotate(vec.begin(), vec.begin() + positions, vec.end());
         }
@@ -400,11 +359,86 @@ namespace gr
 
         
 
+        bool frame_sync_impl::energy_gate(const gr_complex *samples)
+        {
+            m_detect_windows++;
+            if (!m_energy_gate)
+            {
+                m_searched_windows++;
+                return true;
+            }
+            gr_complex dot;
+            volk_32fc_x2_conjugate_dot_prod_32fc(&dot, samples, samples, m_number_of_bins);
+            float energy = dot.real() / m_number_of_bins;
+            if (m_gate_init_cnt < GATE_INIT_WINDOWS && !m_noise_from_est)
+            { // seed the noise floor with the quietest of the first windows, a frame may already be there so they are all searched
+                m_noise_floor = m_noise_floor < 0 ? energy : std::min(m_noise_floor, energy);
+                m_gate_init_cnt++;
+                m_searched_windows++;
+                return true;
+            }
+            bool loud = energy > m_energy_gate * m_noise_floor;
+
+            if (loud)
+            {
+                if (!m_gate_open)
+                {
+                    m_gate_open = true;
+                    m_gate_detected = false;
+                    m_gate_len = 0;
+                }
+                m_gate_quiet_cnt = 0;
+            }
+            else if (m_gate_open && ++m_gate_quiet_cnt > GATE_HANGOVER)
+            {
+                m_gate_open = false;
+                if (symbol_cnt > 1) // the upchirps seen so far are lost
+                    m_misses++;
+                if (!m_gate_detected)
+                    m_false_alarms++;
+            }
+            if (m_gate_open && !m_gate_detected && ++m_gate_len > 4u * m_preamb_len && !m_noise_from_est)
+            { // no preamble in a long run of loud windows, the noise floor rose
+                m_noise_floor = energy;
+                m_gate_open = false;
+                m_false_alarms++;
+            }
+            if (!m_gate_open && !m_noise_from_est)
+            {
+                if (energy * m_energy_gate < m_noise_floor) // the floor was measured on a frame, restart from this quiet window
+                    m_noise_floor = energy;
+                else
+                    m_noise_floor += GATE_FLOOR_ALPHA * (energy - m_noise_floor);
+            }
+
+            // keep searching during the hangover, the detection needs all the upchirps of the run
+            if (m_gate_open)
+                m_searched_windows++;
+            return m_gate_open;
+        }
+
         void frame_sync_impl::noise_est_handler(pmt::pmt_t noise_est)
         {
             m_noise_est = pmt::to_double(noise_est);
+            m_noise_floor = m_noise_est;
+            m_noise_from_est = true;
         }
         void frame_sync_impl::frame_info_handler(pmt::pmt_t frame_info)
+        {
+            if (m_inline_header && !m_impl_head)
+            { // the header has already been decoded by this block, only measure the wait avoided
+                if (m_inline_times.size())
+                {
+                    m_latency_saved_sum += std::chrono::duration<double, std::micro>(std::chrono::steady_clock::now() - m_inline_times.front()).count();
+                    m_latency_cnt++;
+                    m_inline_times.pop_front();
+                }
+                return;
+            }
+            apply_frame_info(frame_info, nitems_written(0));
+        }
+
+        void frame_sync_impl::apply_frame_info(pmt::pmt_t frame_info, uint64_t offset)
         {
             pmt::pmt_t err = pmt::string_to_symbol("error");
 
@@ -435,10 +469,46 @@ namespace gr
                 frame_info = pmt::dict_delete(frame_info, pmt::intern("ldro_mode"));
 
                 frame_info = pmt::dict_add(frame_info, pmt::intern("ldro"), pmt::from_bool(m_ldro));
-                add_item_tag(0, nitems_written(0), pmt::string_to_symbol("frame_info"), frame_info);
+                add_item_tag(0, offset, pmt::string_to_symbol("frame_info"), frame_info);
             }
         }
 
+        void frame_sync_impl::decode_header(uint64_t offset)
+        {
+            // same processing as fft_demod, gray_mapping, deinterleaver and hamming_dec in hard decoding: one block of 8 symbols of sf-2 bits with a coding rate 4/8
+            uint8_t sf_app = m_sf - 2;
+            uint16_t symbols[8];
+            for (int i = 0; i < 8; i++)
+            {
+                volk_32fc_x2_multiply_32fc(&symb_corr[0], &m_header_symbs[i * m_number_of_bins], &CFO_frac_correc[0], m_number_of_bins);
+                uint16_t val = mod((int32_t)get_symbol_val(&symb_corr[0], &m_downchirp[0]) - m_cfo_int - 1, m_number_of_bins) / 4;
+                symbols[i] = val ^ (val >> 1u);
+            }
+            uint8_t codewords[MAX_SF];
+            deinterleave_block(symbols, codewords, sf_app, 8);
+            const uint8_t *hard_table = hamming_dec_table(4);
+            uint8_t header[5];
+            for (int i = 0; i < 5; i++)
+                header[i] = hard_table[codewords[i]];
+
+            int pay_len = (header[0] << 4) + header[1];
+            int head_err = (((header[3] & 1) << 4) + header[4]) != header_checksum(header) || pay_len == 0;
+
+            pmt::pmt_t frame_info = pmt::make_dict();
+            frame_info = pmt::dict_add(frame_info, pmt::intern("cr"), pmt::from_long(header[2] >> 1));
+            frame_info = pmt::dict_add(frame_info, pmt::intern("pay_len"), pmt::from_long(pay_len));
+            frame_info = pmt::dict_add(frame_info, pmt::intern("crc"), pmt::from_long(header[2] & 1));
+            frame_info = pmt::dict_add(frame_info, pmt::intern("ldro_mode"), pmt::from_long(m_ldro_mode));
+            frame_info = pmt::dict_add(frame_info, pmt::intern("err"), pmt::from_long(head_err));
+            apply_frame_info(frame_info, offset);
+
+            // the header_decoder publishes a frame_info message for each header it receives, valid or not
+            m_inline_cnt++;
+            m_inline_times.push_back(std::chrono::steady_clock::now());
+            if (m_inline_times.size() > MAX_PENDING_HEADERS) // frame_info port not connected
+                m_inline_times.pop_front();
+        }
+
         void frame_sync_impl::set_sf(int sf)
         {
             m_sf = sf;
@@ -456,61 +526,33 @@ namespace gr
             in_down.resize(m_number_of_bins);
             preamble_raw.resize(m_preamb_len * m_number_of_bins);
             net_id_samp.resize(m_samples_per_symbol * 2.5); // we should be able to move up to one quarter of symbol in each direction
+            // correction vectors of the preamble, for up to 3 additional upchirps
+            CFO_frac_correc_aug.resize(up_symb_to_use * m_number_of_bins);
+            CFO_int_correc.resize((m_n_up_req + 3) * m_number_of_bins);
+            sfo_corr_vect.resize((m_n_up_req + 3) * m_number_of_bins);
+            corr_preamb.resize((m_n_up_req + 3) * m_number_of_bins);
+            net_ids_samp_dec.resize(2 * m_number_of_bins);
+            m_header_symbs.resize(8 * m_number_of_bins);
             build_ref_chirps(&m_upchirp[0], &m_downchirp[0], m_sf);
+            update_fft_plans();
 
-                
-            cfg_gsv = kiss_fft_alloc(m_number_of_bins, 0, 0, 0);
-            cx_in = new kiss_fft_cpx[m_number_of_bins];
-            cx_out = new kiss_fft_cpx[m_number_of_bins];
             set_output_multiple(m_number_of_bins);
         }
 
-        int frame_sync_impl::general_work(int noutput_items,
-                                          gr_vector_int &ninput_items,
-                                          gr_vector_const_void_star &input_items,
-                                          gr_vector_void_star &output_items)
+        void frame_sync_impl::update_fft_plans()
         {
-            const gr_complex *in = (const gr_complex *)input_items[0]; //store input
-            gr_complex *out = (gr_complex *)output_items[0]; //store output
-            int items_to_output = 0;
-
-            // check if there is enough space in the output buffer
-            if ((uint32_t)noutput_items < m_number_of_bins)
-            {
-                return 0;
-            }
-
-            float *sync_log_out = NULL;
-            if (output_items.size() == 2)
+            // plans of the previous spreading factor go back to the registry when released
+            fft_plan_registry &registry = fft_plan_registry::instance();
+            if (!m_fft || m_fft->size() != m_number_of_bins)
             {
-                sync_log_out = (float *)output_items[1];
-                m_should_log = true;
-            }
-            else
-                m_should_log = false;
-            int nitems_to_process = ninput_items[0];
-
-            std::vector<tag_t> tags;
-            get_tags_in_window(tags, 0, 0, ninput_items[0], pmt::string_to_symbol("new_frame"));
-            if (tags.size())
-            {
-                if (tags[0].offset != nitems_read(0))
-                    nitems_to_process = tags[0].offset - nitems_read(0); // only use symbol until the next frame begin (SF might change)
-
-                else
-                {
-                    if (tags.size() >= 2)
-                        nitems_to_process = tags[1].offset - tags[0].offset;
-
-                    pmt::pmt_t err = pmt::string_to_symbol("error");
-
-                    int sf = pmt::to_long(pmt::dict_ref(tags[0].value, pmt::string_to_symbol("sf"), err));
-                    set_sf(sf);
-
-                    // std::cout<<"\nhamming_cr "<<tags[0].offset<<" - cr: "<<(int)m_cr<<"\n";
-                }
+                m_fft = registry.get(m_number_of_bins, true, m_fft_backend);
+                m_fft_sto = registry.get(2 * m_number_of_bins, true, m_fft_backend);
+                m_fft_cfo = registry.get(2 * up_symb_to_use * m_number_of_bins, true, m_fft_backend);
             }
+        }
 
+        void frame_sync_impl::process_symbol(const gr_complex *in, gr_complex *out, float *sync_log_out, uint64_t out_offset, int &items_to_output, int &log_to_output)
+        {
             for (uint32_t ii = 0; ii < m_number_of_bins; ii++)
                 in_down[ii] = in[(int)(m_os_factor / 2 + m_os_factor * ii - my_roundf(m_sto_frac * m_os_factor))];
 
@@ -518,9 +560,8 @@ namespace gr
             {
             case DETECT:
             {
-                
-                
-                bin_idx_new = get_symbol_val(&in_down[0], &m_downchirp[0]);
+                // windows without a candidate are handled as windows without energy
+                bin_idx_new = energy_gate(&in_down[0]) ? get_symbol_val(&in_down[0], &m_downchirp[0]) : -1;
 
                 if (abs(mod(abs(bin_idx_new - bin_idx) + 1, m_number_of_bins) - 1) <= 1 && bin_idx_new != -1) // look for consecutive reference upchirps(with a margin of ±1)
                 {
@@ -545,6 +586,7 @@ namespace gr
                 {
 
                     additional_upchirps = 0;
+                    m_gate_detected = true;
                     m_state = SYNC;
                     symbol_cnt = 0;
                     cfo_frac_sto_frac_est = false;
@@ -568,10 +610,7 @@ namespace gr
                     m_cfo_frac = estimate_CFO_frac_Bernier(&preamble_raw[m_number_of_bins - k_hat]);
                     m_sto_frac = estimate_STO_frac();
                     // create correction vector
-                    for (uint32_t n = 0; n < m_number_of_bins; n++)
-                    {
-                        CFO_frac_correc[n] = gr_expj(-2 * M_PI * m_cfo_frac / m_number_of_bins * n);
-                    }
+                    build_rotator(&CFO_frac_correc[0], -m_cfo_frac / m_number_of_bins, m_number_of_bins);
                     cfo_frac_sto_frac_est = true;
                 }
                 items_to_consume = m_samples_per_symbol;
@@ -652,28 +691,15 @@ namespace gr
                     //std::move(preamble_upchirps.begin() + mod(m_cfo_int, m_number_of_bins), preamble_upchirps.end(),preamble_upchirps.begin());
                     std::rotate(preamble_upchirps.begin(), preamble_upchirps.begin() + mod(m_cfo_int, m_number_of_bins), preamble_upchirps.end());
 
-                    std::vector<gr_complex> CFO_int_correc;
-                    CFO_int_correc.resize((m_n_up_req + additional_upchirps) * m_number_of_bins);
-                    for (uint32_t n = 0; n < (m_n_up_req + additional_upchirps) * m_number_of_bins; n++)
-                    {
-                        CFO_int_correc[n] = gr_expj(-2 * M_PI * (m_cfo_int) / m_number_of_bins * n);
-                    }
+                    uint32_t n_preamb_samp = (m_n_up_req + additional_upchirps) * m_number_of_bins;
+                    build_rotator(&CFO_int_correc[0], -(double)m_cfo_int / m_number_of_bins, n_preamb_samp);
 
                     volk_32fc_x2_multiply_32fc(&preamble_upchirps[0], &preamble_upchirps[0], &CFO_int_correc[0], up_symb_to_use * m_number_of_bins);
 
                     // correct SFO in the preamble upchirps
 
                     sfo_hat = float((m_cfo_int + m_cfo_frac) * m_bw) / m_center_freq;
-                    double clk_off = sfo_hat / m_number_of_bins;
-                    double fs = m_bw;
-                    double fs_p = m_bw * (1 - clk_off);
-                    int N = m_number_of_bins;
-                    std::vector<gr_complex> sfo_corr_vect;
-                    sfo_corr_vect.resize((m_n_up_req + additional_upchirps) * m_number_of_bins, 0);
-                    for (uint32_t n = 0; n < (m_n_up_req + additional_upchirps) * m_number_of_bins; n++)
-                    {
-                        sfo_corr_vect[n] = gr_expj(-2 * M_PI * (pow(mod(n, N), 2) / 2 / N * (m_bw / fs_p * m_bw / fs_p - m_bw / fs * m_bw / fs) + (std::floor((float)n / N) * (m_bw / fs_p * m_bw / fs_p - m_bw / fs_p) + m_bw / 2 * (1 / fs - 1 / fs_p)) * mod(n, N)));
-                    }
+                    build_sfo_correc(n_preamb_samp);
 
                     volk_32fc_x2_multiply_32fc(&preamble_upchirps[0], &preamble_upchirps[0], &sfo_corr_vect[0], up_symb_to_use * m_number_of_bins);
 
@@ -685,10 +711,8 @@ namespace gr
 
                     // get SNR estimate from preamble
                     // downsample preab_raw
-                    std::vector<gr_complex> corr_preamb;
-                    corr_preamb.resize((m_n_up_req + additional_upchirps) * m_number_of_bins, 0);
                     // apply sto correction
-                    for (uint32_t i = 0; i < (m_n_up_req + additional_upchirps) * m_number_of_bins; i++)
+                    for (uint32_t i = 0; i < n_preamb_samp; i++)
                     {
                         corr_preamb[i] = preamble_raw_up[m_os_factor * (m_number_of_bins - k_hat + i) - int(my_roundf(m_os_factor * m_sto_frac))];
                     }
@@ -700,16 +724,16 @@ namespace gr
 
                     // // Using std::memcpy
                     // std::memcpy(dest_iter3.base(), start_iter3.base(), static_cast<std::size_t>(end_iter3 - start_iter3) * sizeof(std::complex<float>));
-                    std::rotate(corr_preamb.begin(), corr_preamb.begin() + mod(m_cfo_int, m_number_of_bins), corr_preamb.end());
+                    std::rotate(corr_preamb.begin(), corr_preamb.begin() + mod(m_cfo_int, m_number_of_bins), corr_preamb.begin() + n_preamb_samp);
                     // apply cfo correction
-                    volk_32fc_x2_multiply_32fc(&corr_preamb[0], &corr_preamb[0], &CFO_int_correc[0], (m_n_up_req + additional_upchirps) * m_number_of_bins);
+                    volk_32fc_x2_multiply_32fc(&corr_preamb[0], &corr_preamb[0], &CFO_int_correc[0], n_preamb_samp);
                     for (int i = 0; i < (m_n_up_req + additional_upchirps); i++)
                     {
                         volk_32fc_x2_multiply_32fc(&corr_preamb[m_number_of_bins * i], &corr_preamb[m_number_of_bins * i], &CFO_frac_correc[0], m_number_of_bins);
                     }
 
                     // //apply sfo correction
-                    volk_32fc_x2_multiply_32fc(&corr_preamb[0], &corr_preamb[0], &sfo_corr_vect[0], (m_n_up_req + additional_upchirps) * m_number_of_bins);
+                    volk_32fc_x2_multiply_32fc(&corr_preamb[0], &corr_preamb[0], &sfo_corr_vect[0], n_preamb_samp);
 
                     float snr_est = 0;
                     for (int i = 0; i < up_symb_to_use; i++)
@@ -726,8 +750,6 @@ namespace gr
                         m_sto_frac = m_sto_frac + (m_sto_frac > 0 ? -1 : 1);
                     }
                     // decim net id according to new sto_frac and sto int
-                    std::vector<gr_complex> net_ids_samp_dec;
-                    net_ids_samp_dec.resize(2 * m_number_of_bins, 0);
                     // start_off gives the offset in the net_id_samp vector required to be aligned in time (CFOint is equivalent to STOint since upchirp_val was forced to 0)
                     int start_off = (int)m_os_factor / 2 - (my_roundf(m_sto_frac * m_os_factor)) + m_os_factor * (.25 * m_number_of_bins + m_cfo_int);
                     for (uint32_t i = 0; i < m_number_of_bins * 2; i++)
@@ -769,6 +791,8 @@ namespace gr
 
                                         out[int((i - start_off) / m_os_factor)] = additional_symbol_samp[i];
                                     }
+                                    if (m_inline_header)
+                                        memcpy(&m_header_symbs[0], &out[0], m_number_of_bins * sizeof(gr_complex));
                                     items_to_output = m_number_of_bins;
                                     m_state = SFO_COMPENSATION;
                                     symbol_cnt = 1;
@@ -830,10 +854,13 @@ namespace gr
                         frame_info = pmt::dict_add(frame_info, pmt::intern("cfo_frac"), pmt::mp((float)m_cfo_frac));
                         frame_info = pmt::dict_add(frame_info, pmt::intern("sf"), pmt::mp((long)m_sf));
 
-                        add_item_tag(0, nitems_written(0), pmt::string_to_symbol("frame_info"), frame_info);
-
                         m_received_head = false;
                         items_to_consume += m_samples_per_symbol / 4 + m_os_factor * m_cfo_int;
+                        // input sample at which the first header symbol starts (already output if the first network id was missed)
+                        frame_info = pmt::dict_add(frame_info, pmt::intern("sample_offset"),
+                                                   pmt::from_uint64(m_in_offset + items_to_consume - one_symbol_off * m_samples_per_symbol));
+
+                        add_item_tag(0, out_offset, pmt::string_to_symbol("frame_info"), frame_info);
                         symbol_cnt = one_symbol_off;
                         float snr_est2 = 0;
 
@@ -856,7 +883,7 @@ namespace gr
                             sync_log_out[2] = sto_log;
                             sync_log_out[3] = sfo_log;
                             sync_log_out[4] = off_by_one_id;
-                            produce(1, 5);
+                            log_to_output = 5;
                         }
 #ifdef PRINT_INFO
 
@@ -877,6 +904,8 @@ namespace gr
                 {
                     // output downsampled signal (with no STO but with CFO)
                     memcpy(&out[0], &in_down[0], m_number_of_bins * sizeof(gr_complex));
+                    if (m_inline_header && symbol_cnt < 8)
+                        memcpy(&m_header_symbs[symbol_cnt * m_number_of_bins], &in_down[0], m_number_of_bins * sizeof(gr_complex));
                     items_to_consume = m_samples_per_symbol;
 
                     //   update sfo evolution
@@ -890,6 +919,8 @@ namespace gr
 
                     items_to_output = m_number_of_bins;
                     symbol_cnt++;
+                    if (symbol_cnt == 8 && m_inline_header && !m_impl_head && !m_received_head)
+                        decode_header(out_offset + m_number_of_bins);
                 }
                 else if (!m_received_head)
                 { // Wait for the header to be decoded
@@ -913,9 +944,79 @@ namespace gr
                 break;
             }
             }
-            consume_each(items_to_consume);
-       
-            produce(0, items_to_output);
+        }
+
+        int frame_sync_impl::general_work(int noutput_items,
+                                          gr_vector_int &ninput_items,
+                                          gr_vector_const_void_star &input_items,
+                                          gr_vector_void_star &output_items)
+        {
+            const gr_complex *in = (const gr_complex *)input_items[0]; //store input
+            gr_complex *out = (gr_complex *)output_items[0]; //store output
+
+            // check if there is enough space in the output buffer
+            if ((uint32_t)noutput_items < m_number_of_bins)
+            {
+                return 0;
+            }
+
+            float *sync_log_out = NULL;
+            if (output_items.size() == 2)
+            {
+                sync_log_out = (float *)output_items[1];
+                m_should_log = true;
+            }
+            else
+                m_should_log = false;
+            int nitems_to_process = ninput_items[0];
+
+            std::vector<tag_t> tags;
+            get_tags_in_window(tags, 0, 0, ninput_items[0], pmt::string_to_symbol("new_frame"));
+            if (tags.size())
+            {
+                if (tags[0].offset != nitems_read(0))
+                    nitems_to_process = tags[0].offset - nitems_read(0); // only use symbol until the next frame begin (SF might change)
+
+                else
+                {
+                    if (tags.size() >= 2)
+                        nitems_to_process = tags[1].offset - tags[0].offset;
+
+                    pmt::pmt_t err = pmt::string_to_symbol("error");
+
+                    int sf = pmt::to_long(pmt::dict_ref(tags[0].value, pmt::string_to_symbol("sf"), err));
+                    set_sf(sf);
+
+                    // std::cout<<"\nhamming_cr "<<tags[0].offset<<" - cr: "<<(int)m_cr<<"\n";
+                }
+            }
+
+            // process all the complete symbols of the input, until the next frame (its SF might change) or the wait for a header
+            int consumed = 0;
+            int produced = 0;
+            int log_produced = 0;
+            int items_needed = m_os_factor * (m_number_of_bins + 2);
+            do
+            {
+                int items_to_output = 0;
+                int log_to_output = 0;
+                uint8_t prev_state = m_state;
+                int32_t prev_symbol_cnt = symbol_cnt;
+
+                m_in_offset = nitems_read(0) + consumed;
+                process_symbol(&in[consumed], &out[produced], m_should_log ? &sync_log_out[log_produced] : NULL, nitems_written(0) + produced, items_to_output, log_to_output);
+                consumed += items_to_consume;
+                produced += items_to_output;
+                log_produced += log_to_output;
+
+                if (!items_to_consume && !items_to_output && m_state == prev_state && symbol_cnt == prev_symbol_cnt)
+                    break; // waiting for the header
+            } while (consumed < nitems_to_process && ninput_items[0] - consumed >= items_needed && noutput_items - produced >= (int)m_number_of_bins && (!m_should_log || noutput_items - log_produced >= 5));
+
+            consume_each(consumed);
+            produce(0, produced);
+            if (m_should_log)
+                produce(1, log_produced);
             return WORK_CALLED_PRODUCE;
         }
         
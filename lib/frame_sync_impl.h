@@ -7,13 +7,17 @@
 #include <gnuradio/lora_sdr/frame_sync.h>
 #include <iostream>
 #include <fstream>
+#include <deque>
+#include <chrono>
 #include <volk/volk.h>
 #include <gnuradio/lora_sdr/utilities.h>
 #include <gnuradio/io_signature.h>
-extern "C"
-{
-#include "kiss_fft.h"
-}
+#include "fft_plan.h"
+
+#define GATE_HANGOVER 2        // windows below the threshold before the energy gate closes
+#define GATE_INIT_WINDOWS 8    // first windows, all searched, whose minimum energy seeds the noise floor
+#define GATE_FLOOR_ALPHA 0.02f // smoothing of the tracked noise floor
+#define MAX_PENDING_HEADERS 64 // inline decoded headers waiting for their frame_info message
 
 namespace gr
 {
@@ -72,9 +76,10 @@ namespace gr
       uint16_t m_preamb_len; ///< Number of consecutive upchirps in preamble
       uint8_t additional_upchirps; ///< indicate the number of additional upchirps found in preamble (in addition to the minimum required to trigger a detection)
 
-      kiss_fft_cpx *cx_in;  ///<input of the FFT
-      kiss_fft_cpx *cx_out; ///<output of the FFT
-      kiss_fft_cfg cfg_gsv; 
+      uint8_t m_fft_backend;     ///< FFT library used, see fft_backend
+      fft_plan::sptr m_fft;      ///< FFT of one symbol
+      fft_plan::sptr m_fft_sto;  ///< FFT of one symbol zero-padded to twice its length, used for the STO estimation
+      fft_plan::sptr m_fft_cfo;  ///< FFT of the preamble upchirps zero-padded to twice their length, used for the RCTSL CFO estimation
 
       int items_to_consume; ///< Number of items to consume after each iteration of the general_work function
 
@@ -100,11 +105,38 @@ namespace gr
       bool cfo_frac_sto_frac_est;                  ///< indicate that the estimation of CFO_frac and STO_frac has been performed
       std::vector<gr_complex> CFO_frac_correc;     ///< cfo frac correction vector
       std::vector<gr_complex> CFO_SFO_frac_correc; ///< correction vector accounting for cfo and sfo
+      std::vector<gr_complex> CFO_frac_correc_aug; ///< cfo frac correction vector of the upchirps used for the estimation
+      std::vector<gr_complex> CFO_int_correc;      ///< cfo int correction vector of the preamble upchirps
+      std::vector<gr_complex> sfo_corr_vect;       ///< sfo correction vector of the preamble upchirps
+      std::vector<gr_complex> corr_preamb;         ///< preamble upchirps with STO, CFO and SFO corrected
+      std::vector<gr_complex> net_ids_samp_dec;    ///< downsampled network identifiers
 
       std::vector<gr_complex> symb_corr; ///< symbol with CFO frac corrected
       int down_val;                      ///< value of the preamble downchirps
       int net_id_off;                    ///< offset of the network identifier
 
+      float m_energy_gate;        ///< ratio of the window energy over the noise floor above which the preamble search is run (0 to always run it)
+      float m_noise_floor;        ///< noise power per sample, negative before the first estimate
+      bool m_noise_from_est;      ///< the noise floor is given by the noise_est port instead of being tracked
+      bool m_gate_open;           ///< the preamble search is running
+      bool m_gate_detected;       ///< a preamble has been detected since the gate opened
+      uint32_t m_gate_len;        ///< number of windows since the gate opened
+      uint8_t m_gate_quiet_cnt;   ///< number of consecutive windows below the threshold while the gate is open
+      uint8_t m_gate_init_cnt;    ///< number of windows seen to seed the noise floor
+      uint64_t m_detect_windows;  ///< number of windows received in the DETECT state
+      uint64_t m_searched_windows;///< number of windows on which the preamble search was run
+      uint64_t m_false_alarms;    ///< number of gate openings without detection
+      uint64_t m_misses;          ///< number of gate closings during a run of upchirps
+      uint64_t m_in_offset;       ///< absolute index of the first input sample of the window being processed
+
+      bool m_inline_header;               ///< decode the explicit header in this block
+      uint8_t m_ldro_mode;                ///< low datarate optimisation mode, for the inline decoded headers
+      std::vector<gr_complex> m_header_symbs; ///< downsampled symbols of the explicit header
+      std::deque<std::chrono::steady_clock::time_point> m_inline_times; ///< decoding time of the headers whose frame_info message has not been received yet
+      uint64_t m_inline_cnt;              ///< number of headers decoded inline
+      double m_latency_saved_sum;         ///< sum of the measured waits removed, in microseconds
+      uint64_t m_latency_cnt;             ///< number of measured waits
+
       bool m_should_log;   ///< indicate that the sync values should be logged
       float off_by_one_id; ///< Indicate that the network identifiers where off by one and corrected (float used as saved in a float32 bin file)
 #ifdef GRLORA_DEBUG
@@ -155,11 +187,37 @@ namespace gr
           */
       float determine_energy(const gr_complex *samples, int length);
 
+      /**
+          *  \brief  Decide from its energy if the preamble search should be run on a symbol window, and update the noise floor and the gate counters.
+          *
+          *  \param  samples
+          *          The decimated symbol window.
+          */
+      bool energy_gate(const gr_complex *samples);
+
       /**
          *   \brief  Handle the reception of the explicit header information, received from the header_decoder block 
          */
       void frame_info_handler(pmt::pmt_t frame_info);
 
+      /**
+         *   \brief  Set the frame length from the header information and tag the first payload item, or go back to the preamble detection if the header is invalid
+         *
+         *   \param  frame_info
+         *           The header information, as published by the header_decoder.
+         *   \param  offset
+         *           Absolute output offset of the first payload item.
+         */
+      void apply_frame_info(pmt::pmt_t frame_info, uint64_t offset);
+
+      /**
+         *   \brief  Decode the explicit header from the 8 saved header symbols (hard decision) and apply it
+         *
+         *   \param  offset
+         *           Absolute output offset of the first payload item.
+         */
+      void decode_header(uint64_t offset);
+
       /**
           *  \brief  Handles reception of the noise estimate
           */
@@ -168,13 +226,50 @@ namespace gr
           *  \brief  Set new SF received in a tag (used for CRAN)
           */
       void set_sf(int sf);
+      /**
+          *  \brief  Get the FFT plans matching the current spreading factor from the shared registry
+          */
+      void update_fft_plans();
 
       float determine_snr(const gr_complex *samples);
 
+      /**
+          *  \brief  Fill sfo_corr_vect with the correction of the sampling frequency offset sfo_hat over the preamble upchirps
+          *
+          *  \param  length
+          *          The number of samples to correct.
+          */
+      void build_sfo_correc(uint32_t length);
+
+      /**
+          *  \brief  Process one symbol period of the input according to the current state, setting items_to_consume
+          *
+          *  \param  in
+          *          The input samples, starting at the symbol.
+          *  \param  out
+          *          Where to write the output symbol.
+          *  \param  sync_log_out
+          *          Where to write the synchronization log, NULL if not logged.
+          *  \param  out_offset
+          *          Absolute output offset of out, for the frame_info tags.
+          *  \param  items_to_output
+          *          Set to the number of items written to out.
+          *  \param  log_to_output
+          *          Set to the number of items written to sync_log_out.
+          */
+      void process_symbol(const gr_complex *in, gr_complex *out, float *sync_log_out, uint64_t out_offset, int &items_to_output, int &log_to_output);
+
     public:
-      frame_sync_impl(uint32_t center_freq, uint32_t bandwidth, uint8_t sf, bool impl_head, std::vector<uint16_t> sync_word, uint8_t os_factor, uint16_t preamb_len);
+      frame_sync_impl(uint32_t center_freq, uint32_t bandwidth, uint8_t sf, bool impl_head, std::vector<uint16_t> sync_word, uint8_t os_factor, uint16_t preamb_len, uint8_t fft_backend, float energy_gate, bool inline_header, uint8_t ldro_mode);
       ~frame_sync_impl();
 
+      uint64_t detect_windows() const { return m_detect_windows; }
+      uint64_t searched_windows() const { return m_searched_windows; }
+      uint64_t gate_false_alarms() const { return m_false_alarms; }
+      uint64_t gate_misses() const { return m_misses; }
+      uint64_t inline_headers() const { return m_inline_cnt; }
+      double header_latency_saved() const { return m_latency_cnt ? m_latency_saved_sum / m_latency_cnt : 0; }
+
       // Where all the action really happens
       void forecast(int noutput_items, gr_vector_int &ninput_items_required);
 
@@ -11,18 +11,18 @@ namespace gr {
     namespace lora_sdr {
 
         gray_mapping::sptr
-        gray_mapping::make(bool soft_decoding) {
-            return gnuradio::get_initial_sptr(new gray_mapping_impl( soft_decoding));
+        gray_mapping::make(bool soft_decoding, uint8_t soft_format) {
+            return gnuradio::get_initial_sptr(new gray_mapping_impl( soft_decoding, soft_format));
         }
 
         /*
          * The private constructor
          */
-        gray_mapping_impl::gray_mapping_impl(bool soft_decoding)
+        gray_mapping_impl::gray_mapping_impl(bool soft_decoding, uint8_t soft_format)
             : gr::sync_block("gray_mapping",
-                             gr::io_signature::make(1, 1, soft_decoding ? MAX_SF * sizeof(LLR) : sizeof(uint16_t)),
-                             gr::io_signature::make(1, 1, soft_decoding ? MAX_SF * sizeof(LLR) : sizeof(uint16_t))),
-              m_soft_decoding(soft_decoding) {
+                             gr::io_signature::make(1, 1, soft_decoding ? soft_symbol_item_size(soft_format) : sizeof(uint16_t)),
+                             gr::io_signature::make(1, 1, soft_decoding ? soft_symbol_item_size(soft_format) : sizeof(uint16_t))),
+              m_soft_decoding(soft_decoding), m_soft_format(soft_format) {
             set_tag_propagation_policy(TPP_ONE_TO_ONE);
         }
 
@@ -35,9 +35,7 @@ namespace gr {
                                 gr_vector_const_void_star &input_items,
                                 gr_vector_void_star &output_items) {
             const uint16_t *in1 = (const uint16_t *)input_items[0];
-            const LLR *in2 = (const LLR *)input_items[0];
             uint16_t *out1 = (uint16_t *)output_items[0];
-            LLR *out2 = (LLR *)output_items[0];
 
             std::vector<tag_t> tags;
             int nitems_to_process = noutput_items;
@@ -62,13 +60,13 @@ namespace gr {
                 }
             }
 
+            if (m_soft_decoding) {
+                // No gray mapping , it has as been done directly in fft_demod block => block "bypass"
+                memcpy(output_items[0], input_items[0], nitems_to_process * soft_symbol_item_size(m_soft_format));
+                return nitems_to_process;
+            }
             for (int i = 0; i < nitems_to_process; i++) {
-                if (m_soft_decoding) {
-                    // No gray mapping , it has as been done directly in fft_demod block => block "bypass"
-                    memcpy(out2 + i * MAX_SF, in2 + i * MAX_SF, MAX_SF * sizeof(LLR));
-                } else {
-                    out1[i] = (in1[i] ^ (in1[i] >> 1u));  // Gray Demap
-                }
+                out1[i] = (in1[i] ^ (in1[i] >> 1u));  // Gray Demap
 
 #ifdef GRLORA_DEBUG
                 std::cout << std::hex << "0x" << in[i] << " ---> "
@@ -12,9 +12,10 @@ namespace gr {
      private:
       uint8_t m_sf;           ///< Spreading factor
       bool m_soft_decoding;   ///< Hard/Soft decoding
+      uint8_t m_soft_format;  ///< Format of the soft values, see soft_format
 
      public:
-      gray_mapping_impl(bool soft_decoding);
+      gray_mapping_impl(bool soft_decoding, uint8_t soft_format);
       ~gray_mapping_impl();
 
       int work(
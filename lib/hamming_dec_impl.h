@@ -13,9 +13,10 @@ namespace gr {
         uint8_t cr_app; ///< Coding rate use for the block
         bool is_header;  ///< Indicate that it is the first block
         bool m_soft_decoding;   ///< Hard/Soft decoding
+        uint8_t m_soft_format;  ///< Format of the soft values, see soft_format
 
      public:
-      hamming_dec_impl(bool soft_decoding);
+      hamming_dec_impl(bool soft_decoding, uint8_t soft_format);
       ~hamming_dec_impl();
 
       int work(
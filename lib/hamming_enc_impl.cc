@@ -4,6 +4,7 @@
 
 #include <gnuradio/io_signature.h>
 #include "hamming_enc_impl.h"
+#include "bit_kernels.h"
 #include <gnuradio/lora_sdr/utilities.h>
 
 namespace gr
@@ -77,33 +78,12 @@ namespace gr
       }
 
 
-      std::vector<bool> data_bin;
-      bool p0, p1, p2, p3, p4;
       for (int i = 0; i < nitems_to_process; i++)
       {
-#ifdef GRLORA_DEBUG
-        std::cout << std::hex << (int)in_data[i] << "   ";
-#endif
         uint8_t cr_app = (m_cnt < m_sf - 2) ? 4 : m_cr;
-        data_bin = int2bool(in_data[i], 4);
-
-        //the data_bin is msb first
-        if (cr_app != 1)
-        { //need hamming parity bits
-          p0 = data_bin[3] ^ data_bin[2] ^ data_bin[1];
-          p1 = data_bin[2] ^ data_bin[1] ^ data_bin[0];
-          p2 = data_bin[3] ^ data_bin[2] ^ data_bin[0];
-          p3 = data_bin[3] ^ data_bin[1] ^ data_bin[0];
-          //we put the data LSB first and append the parity bits
-          out[i] = (data_bin[3] << 7 | data_bin[2] << 6 | data_bin[1] << 5 | data_bin[0] << 4 | p0 << 3 | p1 << 2 | p2 << 1 | p3) >> (4 - cr_app);
-        }
-        else
-        { // coding rate = 4/5 we add a parity bit
-          p4 = data_bin[0] ^ data_bin[1] ^ data_bin[2] ^ data_bin[3];
-          out[i] = (data_bin[3] << 4 | data_bin[2] << 3 | data_bin[1] << 2 | data_bin[0] << 1 | p4);
-        }
+        out[i] = hamming_enc_table(cr_app)[in_data[i]];
 #ifdef GRLORA_DEBUG
-        std::cout << std::hex << (int)out[i] << std::dec << std::endl;
+        std::cout << std::hex << (int)in_data[i] << "   " << (int)out[i] << std::dec << std::endl;
 #endif
         m_cnt++;
       }
@@ -5,6 +5,7 @@
 
 #include <gnuradio/io_signature.h>
 #include "header_decoder_impl.h"
+#include "bit_kernels.h"
 #include <gnuradio/lora_sdr/utilities.h>
 
 namespace gr
@@ -137,19 +138,14 @@ namespace gr
 
                     header_chk = ((in[3] & 1) << 4) + in[4];
 
-                    //check header Checksum
-                    bool c4 = (in[0] & 0b1000) >> 3 ^ (in[0] & 0b0100) >> 2 ^ (in[0] & 0b0010) >> 1 ^ (in[0] & 0b0001);
-                    bool c3 = (in[0] & 0b1000) >> 3 ^ (in[1] & 0b1000) >> 3 ^ (in[1] & 0b0100) >> 2 ^ (in[1] & 0b0010) >> 1 ^ (in[2] & 0b0001);
-                    bool c2 = (in[0] & 0b0100) >> 2 ^ (in[1] & 0b1000) >> 3 ^ (in[1] & 0b0001) ^ (in[2] & 0b1000) >> 3 ^ (in[2] & 0b0010) >> 1;
-                    bool c1 = (in[0] & 0b0010) >> 1 ^ (in[1] & 0b0100) >> 2 ^ (in[1] & 0b0001) ^ (in[2] & 0b0100) >> 2 ^ (in[2] & 0b0010) >> 1 ^ (in[2] & 0b0001);
-                    bool c0 = (in[0] & 0b0001) ^ (in[1] & 0b0010) >> 1 ^ (in[2] & 0b1000) >> 3 ^ (in[2] & 0b0100) >> 2 ^ (in[2] & 0b0010) >> 1 ^ (in[2] & 0b0001);
                     if(m_print_header){
                         std::cout << "\n--------Header--------" << std::endl;
                         std::cout << "Payload length: " << (int)m_payload_len << std::endl;
                         std::cout << "CRC presence:   " << (int)m_has_crc << std::endl;
                         std::cout << "Coding rate:    " << (int)m_cr << std::endl;
                     }
-                    int head_err = header_chk - ((int)(c4 << 4) + (c3 << 3) + (c2 << 2) + (c1 << 1) + c0);
+                    //check header Checksum
+                    int head_err = header_chk - header_checksum(in);
                     if (head_err||m_payload_len==0)
                     {
                         if(m_print_header && head_err)
@@ -165,7 +161,7 @@ namespace gr
                         if(m_print_header) std::cout << "Header checksum valid!" << std::endl<< std::endl;
 #ifdef GRLORA_DEBUG
                         std::cout << "should have " << (int)header_chk << std::endl;
-                        std::cout << "got: " << (int)(c4 << 4) + (c3 << 3) + (c2 << 2) + (c1 << 1) + c0 << std::endl;
+                        std::cout << "got: " << (int)header_checksum(in) << std::endl;
 #endif
                         noutput_items = nitem_to_process - header_len;
                     }
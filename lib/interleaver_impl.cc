@@ -4,6 +4,7 @@
 
 #include <gnuradio/io_signature.h>
 #include "interleaver_impl.h"
+#include "bit_kernels.h"
 #include <gnuradio/lora_sdr/utilities.h>
 
 namespace gr
@@ -113,67 +114,21 @@ namespace gr
         if(!cw_cnt)
           add_item_tag(0, tags[0]);
 
-        //Create the empty matrices
-        std::vector<std::vector<bool>> cw_bin(sf_app);
-        std::vector<bool> init_bit(m_sf, 0);
-        std::vector<std::vector<bool>> inter_bin(cw_len, init_bit);
+        // codewords of the block, padded with zeros at the end of the frame
+        uint8_t codewords[MAX_SF] = {0};
+        memcpy(codewords, in, nitems_to_process);
+        cw_cnt += sf_app;
 
-        //convert to input codewords to binary vector of vector
-        for (int i = 0; i < sf_app; i++)
-        {
-          if (i >= nitems_to_process){//ninput_items[0])
-            cw_bin[i] = int2bool(0, cw_len);
-
-            // for (bool bit : cw_bin[i]) {
-            //   std::cout << bit << ' ';
-            // } 
-           
-          }
-          else{
-            cw_bin[i] = int2bool(in[i], cw_len);
-
-          }
-          
-          cw_cnt++;
-        }
-        
+        //Do the actual interleaving, for the first bloc we add a parity bit and a zero in the end of the lora symbol(reduced rate)
+        interleave_block(codewords, out, m_sf, sf_app, cw_len, ((int)cw_cnt == m_sf - 2) || m_ldro);
 
 #ifdef GRLORA_DEBUG
         std::cout << "codewords---- " << std::endl;
         for (uint32_t i = 0u; i < sf_app; i++)
-        {
-          for (int j = 0; j < int(cw_len); j++)
-          {
-            std::cout << cw_bin[i][j];
-          }
-          std::cout << " 0x" << std::hex << (int)in[i] << std::dec << std::endl;
-        }
-        std::cout << std::endl;
-#endif
-        //Do the actual interleaving
-        for (int32_t i = 0; i < cw_len; i++)
-        {
-          for (int32_t j = 0; j < int(sf_app); j++)
-          {
-            inter_bin[i][j] = cw_bin[mod((i - j - 1), sf_app)][i];
-          }
-          //For the first bloc we add a parity bit and a zero in the end of the lora symbol(reduced rate)
-          if (((int)cw_cnt == m_sf - 2)||m_ldro)
-            inter_bin[i][sf_app] = accumulate(inter_bin[i].begin(), inter_bin[i].end(), 0) % 2;
-     
-          out[i] = bool2int(inter_bin[i]);
-        }
-
-#ifdef GRLORA_DEBUG
+          std::cout << " 0x" << std::hex << (int)codewords[i] << std::dec << std::endl;
         std::cout << "interleaved------" << std::endl;
         for (uint32_t i = 0u; i < cw_len; i++)
-        {
-          for (int j = 0; j < int(m_sf); j++)
-          {
-            std::cout << inter_bin[i][j];
-          }
           std::cout << " " << out[i] << std::endl;
-        }
         std::cout << std::endl;
 #endif
         consume_each(nitems_to_process > sf_app ? sf_app : nitems_to_process);
@@ -34,13 +34,8 @@ namespace gr
 
             m_inter_frame_padding = frame_zero_padd; // add some empty samples at the end of a frame important for transmission with LimeSDR Mini or simulation
 
-            m_downchirp.resize(m_samples_per_symbol);
-            m_upchirp.resize(m_samples_per_symbol);
-
             frame_end = true;
 
-            build_ref_chirps(&m_upchirp[0], &m_downchirp[0], m_sf,m_os_factor);
-
             //Convert given sync word into the two modulated values in preamble
             if(m_sync_words.size()==1){
                 uint16_t tmp = m_sync_words[0];
@@ -55,6 +50,7 @@ namespace gr
                std::cerr<<RED<<" Preamble length should be greater than 5!"<<RESET<<std::endl;
             }
             m_preamb_len = preamble_len;
+            build_waveforms();
             samp_cnt = -1;
             preamb_samp_cnt = 0;
             frame_cnt = 0;
@@ -68,14 +64,26 @@ namespace gr
             m_number_of_bins = (uint32_t)(1u << m_sf);
             m_os_factor = m_samp_rate / m_bw;
             m_samples_per_symbol = (uint32_t)(m_number_of_bins*m_os_factor);
-            m_downchirp.resize(m_samples_per_symbol);
-            m_upchirp.resize(m_samples_per_symbol);
-
-            build_ref_chirps(&m_upchirp[0], &m_downchirp[0], m_sf,m_os_factor);
-
-            
+            build_waveforms();
         } 
 
+        void modulate_impl::build_waveforms()
+        {
+            m_bank = chirp_bank::get(m_sf, m_os_factor);
+            // preamb_len upchirps, the two sync words, 2.25 downchirps
+            m_preamble.resize((m_preamb_len + 4) * m_samples_per_symbol + m_samples_per_symbol / 4);
+            gr_complex *preamble = &m_preamble[0];
+            for (int i = 0; i < m_preamb_len; i++)
+                memcpy(&preamble[i * m_samples_per_symbol], m_bank->upchirp(), m_samples_per_symbol * sizeof(gr_complex));
+            preamble += m_preamb_len * m_samples_per_symbol;
+            m_bank->symbol(preamble, m_sync_words[0]);
+            m_bank->symbol(preamble + m_samples_per_symbol, m_sync_words[1]);
+            preamble += 2 * m_samples_per_symbol;
+            memcpy(preamble, m_bank->downchirp(), m_samples_per_symbol * sizeof(gr_complex));
+            memcpy(preamble + m_samples_per_symbol, m_bank->downchirp(), m_samples_per_symbol * sizeof(gr_complex));
+            memcpy(preamble + 2 * m_samples_per_symbol, m_bank->downchirp(), m_samples_per_symbol / 4 * sizeof(gr_complex));
+        }
+
         /*
      * Our virtual destructor.
      */
@@ -145,25 +153,12 @@ namespace gr
                 {
                     if (preamb_samp_cnt < (m_preamb_len + 5)*m_samples_per_symbol) //should output preamble part
                     {
-                        if (preamb_samp_cnt < (m_preamb_len*m_samples_per_symbol))
-                        { //upchirps
-                            memcpy(&out[output_offset], &m_upchirp[0], m_samples_per_symbol * sizeof(gr_complex));
-                        }
-                        else if (preamb_samp_cnt == (m_preamb_len*m_samples_per_symbol)) //sync words
-                            build_upchirp(&out[output_offset], m_sync_words[0], m_sf,m_os_factor);
-                        else if (preamb_samp_cnt == (m_preamb_len + 1)*m_samples_per_symbol)
-                            build_upchirp(&out[output_offset], m_sync_words[1], m_sf,m_os_factor);
-                        else if (preamb_samp_cnt < (m_preamb_len + 4)*m_samples_per_symbol) //2.25 downchirps
-                            memcpy(&out[output_offset], &m_downchirp[0], m_samples_per_symbol * sizeof(gr_complex));
-                        else if (preamb_samp_cnt == (m_preamb_len + 4)*m_samples_per_symbol)
-                        {
-                            memcpy(&out[output_offset], &m_downchirp[0], m_samples_per_symbol / 4 * sizeof(gr_complex));
-                            //correct offset dur to quarter of downchirp
-                            output_offset -= 3 * m_samples_per_symbol / 4;
+                        // one symbol of the rendered preamble, the last one being a quarter downchirp
+                        int n_samples = std::min(m_samples_per_symbol, (int)m_preamble.size() - preamb_samp_cnt);
+                        memcpy(&out[output_offset], &m_preamble[preamb_samp_cnt], n_samples * sizeof(gr_complex));
+                        if (n_samples < m_samples_per_symbol)
                             samp_cnt = 0;
-                            
-                        }
-                        output_offset += m_samples_per_symbol;
+                        output_offset += n_samples;
                         preamb_samp_cnt += m_samples_per_symbol;
                     }
                 }
@@ -178,7 +173,7 @@ namespace gr
 
                 for (int i = 0; i < nitems_to_process; i++)
                 {
-                    build_upchirp(&out[output_offset], in[i], m_sf,m_os_factor);
+                    m_bank->symbol(&out[output_offset], in[i]);
                     output_offset += m_samples_per_symbol;
                     samp_cnt += m_samples_per_symbol;
                     
@@ -7,6 +7,7 @@
 #include <fstream>
 
 #include <gnuradio/lora_sdr/utilities.h>
+#include "chirp_bank.h"
 
 // #define GR_LORA_PRINT_INFO
 
@@ -31,8 +32,8 @@ namespace gr {
 
         int m_frame_len;///< leng of the frame in number of items
 
-        std::vector<gr_complex> m_upchirp; ///< reference upchirp
-        std::vector<gr_complex> m_downchirp; ///< reference downchirp
+        std::shared_ptr<const chirp_bank> m_bank; ///< waveforms of the symbols for the current sf and oversampling factor
+        std::vector<gr_complex> m_preamble; ///< preamble upchirps, sync words and 2.25 downchirps, rendered once
 
         uint16_t m_preamb_len; ///< number of upchirps in the preamble
         int32_t samp_cnt; ///< counter of the number of lora samples sent
@@ -42,6 +43,11 @@ namespace gr {
         bool frame_end; ///< indicate that we send a full frame
 
 
+        /**
+         *  \brief  Get the chirp bank of the current sf and render the preamble
+         */
+        void build_waveforms();
+
      public:
       modulate_impl(uint8_t sf, uint32_t samp_rate, uint32_t bw, std::vector<uint16_t> sync_words, uint32_t frame_zero_padd, uint16_t preamb_len);
       ~modulate_impl();
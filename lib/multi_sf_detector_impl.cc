@@ -0,0 +1,214 @@
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <algorithm>
+#include <gnuradio/io_signature.h>
+#include "multi_sf_detector_impl.h"
+
+namespace gr
+{
+    namespace lora_sdr
+    {
+
+        multi_sf_detector::sptr
+        multi_sf_detector::make(uint32_t bandwidth, std::vector<uint8_t> sfs, bool impl_head, uint8_t os_factor, uint16_t preamble_len, uint8_t fft_backend)
+        {
+            return gnuradio::get_initial_sptr(new multi_sf_detector_impl(bandwidth, sfs, impl_head, os_factor, preamble_len, fft_backend));
+        }
+
+        /*
+         * The private constructor
+         */
+        multi_sf_detector_impl::multi_sf_detector_impl(uint32_t bandwidth, std::vector<uint8_t> sfs, bool impl_head, uint8_t os_factor, uint16_t preamble_len, uint8_t fft_backend)
+            : gr::block("multi_sf_detector",
+                        gr::io_signature::make(1, 1, sizeof(gr_complex)),
+                        gr::io_signature::make(sfs.size(), sfs.size(), sizeof(gr_complex)))
+        {
+            m_bw = bandwidth;
+            m_impl_head = impl_head;
+            m_os_factor = os_factor;
+            if (preamble_len < 5)
+            {
+                std::cerr << RED << " Preamble length should be greater than 5!" << RESET << std::endl;
+            }
+            m_preamb_len = preamble_len;
+            m_n_up_req = preamble_len - 3;
+
+            if (sfs.empty())
+                std::cerr << RED << "[multi_sf_detector_impl.cc] No spreading factor given!" << RESET << std::endl;
+            m_sfs.resize(sfs.size());
+            fft_plan_registry &registry = fft_plan_registry::instance();
+            for (size_t i = 0; i < sfs.size(); i++)
+            {
+                sf_state &s = m_sfs[i];
+                s.sf = sfs[i];
+                s.number_of_bins = 1u << s.sf;
+                s.samples_per_symbol = s.number_of_bins * m_os_factor;
+                // payload of 255 bytes with a CRC, coding rate 4/8 and low datarate optimisation
+                s.max_symb_numb = 8 + ceil((double)(2 * 255 - s.sf + 2 + !m_impl_head * 5 + 4) / std::max(s.sf - 2, 1)) * 8;
+                std::vector<gr_complex> upchirp(s.number_of_bins);
+                s.downchirp.resize(s.number_of_bins);
+                build_ref_chirps(&upchirp[0], &s.downchirp[0], s.sf);
+                s.fft_mag_sq.resize(s.number_of_bins);
+                s.fft = registry.get(s.number_of_bins, true, fft_backend);
+
+                s.bin_idx = -1;
+                s.n_up = 0;
+                s.run_start = 0;
+                s.gate_open = false;
+                s.gate_start = 0;
+                s.gate_end = 0;
+                s.out_pos = 0;
+                s.frame_cnt = 0;
+
+                // a detection forwards up to n_up_req+1 symbols of the past at once
+                set_min_output_buffer(i, 2 * (m_n_up_req + 2) * s.samples_per_symbol);
+
+                pmt::pmt_t port = pmt::mp("frame_info" + std::to_string(i));
+                message_port_register_in(port);
+                set_msg_handler(port, [this, i](pmt::pmt_t msg)
+                                { this->frame_info_handler(i, msg); });
+            }
+            m_step = sfs.empty() ? m_os_factor : std::min_element(m_sfs.begin(), m_sfs.end(), [](const sf_state &a, const sf_state &b)
+                                                                  { return a.sf < b.sf; })->samples_per_symbol;
+            m_max_samples_per_symbol = sfs.empty() ? m_os_factor : std::max_element(m_sfs.begin(), m_sfs.end(), [](const sf_state &a, const sf_state &b)
+                                                                                    { return a.sf < b.sf; })->samples_per_symbol;
+            m_lookback = (m_n_up_req + 1) * m_max_samples_per_symbol;
+            set_history(m_lookback + 1);
+            set_tag_propagation_policy(TPP_DONT);
+        }
+
+        /*
+         * Our virtual destructor.
+         */
+        multi_sf_detector_impl::~multi_sf_detector_impl()
+        {
+        }
+
+        void multi_sf_detector_impl::forecast(int noutput_items, gr_vector_int &ninput_items_required)
+        {
+            ninput_items_required[0] = m_step;
+        }
+
+        int32_t multi_sf_detector_impl::get_symbol_val(sf_state &s, const gr_complex *samples)
+        {
+            volk_32fc_x2_multiply_32fc(s.fft->get_inbuf(), samples, &s.downchirp[0], s.number_of_bins);
+            s.fft->execute();
+            volk_32fc_magnitude_squared_32f(&s.fft_mag_sq[0], s.fft->get_outbuf(), s.number_of_bins);
+            std::vector<float>::iterator max_it = std::max_element(s.fft_mag_sq.begin(), s.fft_mag_sq.end());
+            return *max_it > 0 ? std::distance(s.fft_mag_sq.begin(), max_it) : -1;
+        }
+
+        void multi_sf_detector_impl::frame_info_handler(size_t idx, pmt::pmt_t frame_info)
+        {
+            sf_state &s = m_sfs[idx];
+            if (!s.gate_open)
+                return;
+            pmt::pmt_t err = pmt::string_to_symbol("error");
+            if (pmt::to_long(pmt::dict_ref(frame_info, pmt::string_to_symbol("err"), err)))
+            { // invalid header, frame_sync looks for a new preamble
+                s.gate_end = s.out_pos;
+                return;
+            }
+            int cr = pmt::to_long(pmt::dict_ref(frame_info, pmt::string_to_symbol("cr"), err));
+            int pay_len = pmt::to_long(pmt::dict_ref(frame_info, pmt::string_to_symbol("pay_len"), err));
+            int has_crc = pmt::to_long(pmt::dict_ref(frame_info, pmt::string_to_symbol("crc"), err));
+            uint8_t ldro_mode = pmt::to_long(pmt::dict_ref(frame_info, pmt::string_to_symbol("ldro_mode"), err));
+            bool ldro = ldro_mode == AUTO ? (float)s.number_of_bins * 1e3 / m_bw > LDRO_MAX_DURATION_MS : ldro_mode;
+
+            // same frame length as computed by frame_sync, with a margin for the preamble detection and the sampling frequency offset
+            uint32_t symb_numb = 8 + ceil((double)(2 * pay_len - s.sf + 2 + !m_impl_head * 5 + has_crc * 4) / (s.sf - 2 * ldro)) * (4 + cr);
+            s.gate_end = std::max(s.out_pos, s.gate_start + (uint64_t)(m_preamb_len + symb_numb + 8) * s.samples_per_symbol);
+        }
+
+        int multi_sf_detector_impl::general_work(int noutput_items,
+                                                 gr_vector_int &ninput_items,
+                                                 gr_vector_const_void_star &input_items,
+                                                 gr_vector_void_star &output_items)
+        {
+            // in[-m_lookback] is the oldest sample of the history
+            const gr_complex *in = (const gr_complex *)input_items[0] + m_lookback;
+            uint64_t pos = nitems_read(0);
+            int n_steps = ninput_items[0] / m_step;
+
+            // decimate once all the symbol windows ending in this call
+            int64_t dec_first = (int64_t)m_step - m_max_samples_per_symbol;
+            size_t n_dec = (n_steps * m_step - dec_first) / m_os_factor;
+            m_down.resize(n_dec);
+            for (size_t i = 0; i < n_dec; i++)
+                m_down[i] = in[dec_first + m_os_factor / 2 + m_os_factor * i];
+
+            std::vector<int> produced(m_sfs.size(), 0);
+            int step;
+            for (step = 0; step < n_steps; step++)
+            {
+                uint64_t end = pos + (uint64_t)(step + 1) * m_step;
+
+                // only process the step if all the outputs can take what it might forward
+                bool room = true;
+                for (size_t k = 0; k < m_sfs.size(); k++)
+                {
+                    const sf_state &s = m_sfs[k];
+                    uint64_t needed = s.gate_open ? end - s.out_pos : (uint64_t)(m_n_up_req + 2) * s.samples_per_symbol;
+                    if (produced[k] + needed > (uint64_t)noutput_items)
+                        room = false;
+                }
+                if (!room)
+                    break;
+
+                for (size_t k = 0; k < m_sfs.size(); k++)
+                {
+                    sf_state &s = m_sfs[k];
+                    if (end % s.samples_per_symbol == 0)
+                    { // a symbol window of this sf ends
+                        int64_t window_first = (int64_t)(end - pos) - s.samples_per_symbol;
+                        int32_t bin_idx_new = get_symbol_val(s, &m_down[(window_first - dec_first) / m_os_factor]);
+                        if (abs(mod(abs(bin_idx_new - s.bin_idx) + 1, s.number_of_bins) - 1) <= 1 && bin_idx_new != -1) // consecutive upchirps (with a margin of ±1)
+                            s.n_up++;
+                        else
+                        {
+                            s.n_up = 1;
+                            s.run_start = end - s.samples_per_symbol;
+                        }
+                        s.bin_idx = bin_idx_new;
+
+                        if (s.n_up >= m_n_up_req && !s.gate_open)
+                        {
+                            // forward from one symbol before the first upchirp, without repeating samples already forwarded
+                            uint64_t start = s.run_start >= s.samples_per_symbol ? s.run_start - s.samples_per_symbol : 0;
+                            start = std::max(start, pos - std::min(pos, (uint64_t)m_lookback));
+                            s.gate_start = std::max(start, s.out_pos);
+                            s.gate_end = s.gate_start + (uint64_t)(m_preamb_len + s.max_symb_numb + 8) * s.samples_per_symbol;
+                            s.out_pos = s.gate_start;
+                            s.gate_open = true;
+                            s.n_up = 0;
+                            s.frame_cnt++;
+#ifdef PRINT_INFO
+                            std::cout << "[multi_sf_detector_impl.cc] SF" << (int)s.sf << " frame " << s.frame_cnt << " detected at sample " << s.run_start << std::endl;
+#endif
+                        }
+                    }
+                    if (s.gate_open)
+                    {
+                        uint64_t stop = std::min(end, s.gate_end);
+                        if (stop > s.out_pos)
+                        {
+                            memcpy((gr_complex *)output_items[k] + produced[k], &in[(int64_t)(s.out_pos - pos)], (stop - s.out_pos) * sizeof(gr_complex));
+                            produced[k] += stop - s.out_pos;
+                            s.out_pos = stop;
+                        }
+                        if (s.out_pos >= s.gate_end)
+                            s.gate_open = false;
+                    }
+                }
+            }
+
+            consume_each(step * m_step);
+            for (size_t k = 0; k < m_sfs.size(); k++)
+                produce(k, produced[k]);
+            return WORK_CALLED_PRODUCE;
+        }
+
+    } /* namespace lora_sdr */
+} /* namespace gr */
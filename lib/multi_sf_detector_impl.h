@@ -0,0 +1,77 @@
+#ifndef INCLUDED_LORA_SDR_MULTI_SF_DETECTOR_IMPL_H
+#define INCLUDED_LORA_SDR_MULTI_SF_DETECTOR_IMPL_H
+
+#include <gnuradio/lora_sdr/multi_sf_detector.h>
+#include <gnuradio/lora_sdr/utilities.h>
+#include <gnuradio/io_signature.h>
+#include "fft_plan.h"
+
+namespace gr
+{
+  namespace lora_sdr
+  {
+
+    class multi_sf_detector_impl : public multi_sf_detector
+    {
+    private:
+      /**
+       *  \brief  Detection state and forwarding gate of one spreading factor
+       */
+      struct sf_state
+      {
+        uint8_t sf;                          ///< Spreading factor
+        uint32_t number_of_bins;             ///< Number of bins in each lora symbol
+        uint32_t samples_per_symbol;         ///< Number of input samples per lora symbol
+        uint32_t max_symb_numb;              ///< Number of symbols after the preamble of the longest possible frame
+        std::vector<gr_complex> downchirp;   ///< Reference downchirp
+        std::vector<float> fft_mag_sq;       ///< Squared magnitude of the dechirped symbol spectrum
+        fft_plan::sptr fft;                  ///< FFT of one symbol
+
+        int32_t bin_idx;        ///< value of the previous symbol window
+        uint8_t n_up;           ///< number of consecutive windows with the same value (±1)
+        uint64_t run_start;     ///< absolute index of the first of these windows
+
+        bool gate_open;         ///< samples are forwarded to the output
+        uint64_t gate_start;    ///< absolute index of the first forwarded sample of the current frame
+        uint64_t gate_end;      ///< absolute index after the last sample to forward
+        uint64_t out_pos;       ///< absolute index of the next sample to forward
+        uint64_t frame_cnt;     ///< number of frames detected
+      };
+
+      uint32_t m_bw;                    ///< Bandwidth
+      bool m_impl_head;                 ///< use implicit header mode
+      uint8_t m_os_factor;              ///< oversampling factor
+      uint16_t m_preamb_len;            ///< Number of consecutive upchirps in preamble
+      uint8_t m_n_up_req;               ///< number of consecutive upchirps required to trigger a detection
+      uint32_t m_step;                  ///< samples processed per step, the symbol length of the smallest sf
+      uint32_t m_max_samples_per_symbol;///< symbol length of the largest sf
+      uint32_t m_lookback;              ///< past samples kept in the history, to forward the preamble preceding a detection
+      std::vector<sf_state> m_sfs;      ///< state of each spreading factor, in the order of the outputs
+      std::vector<gr_complex> m_down;   ///< decimated input, shared by all the spreading factors
+
+      /**
+       *  \brief  Return the value of a decimated symbol window, or -1 if it contains no energy
+       */
+      int32_t get_symbol_val(sf_state &s, const gr_complex *samples);
+
+      /**
+       *  \brief  Handle the header of the frame forwarded on an output, received from its header_decoder
+       */
+      void frame_info_handler(size_t idx, pmt::pmt_t frame_info);
+
+    public:
+      multi_sf_detector_impl(uint32_t bandwidth, std::vector<uint8_t> sfs, bool impl_head, uint8_t os_factor, uint16_t preamble_len, uint8_t fft_backend);
+      ~multi_sf_detector_impl();
+
+      void forecast(int noutput_items, gr_vector_int &ninput_items_required);
+
+      int general_work(int noutput_items,
+                       gr_vector_int &ninput_items,
+                       gr_vector_const_void_star &input_items,
+                       gr_vector_void_star &output_items);
+    };
+
+  } // namespace lora_sdr
+} // namespace gr
+
+#endif /* INCLUDED_LORA_SDR_MULTI_SF_DETECTOR_IMPL_H */
@@ -61,11 +61,23 @@ namespace gr {
     void payload_id_inc_impl::msg_handler(pmt::pmt_t msg)
       {
         // std::cout << "[mu_detection_impl.cc] Noise estimation received: "<<pmt::to_double(noise_est) << '\n';
-        std::string in_msg = pmt::symbol_to_string(msg);
+        bool is_pdu = pmt::is_pair(msg) && pmt::is_u8vector(pmt::cdr(msg));
+        std::string in_msg;
+        if (is_pdu)
+        {
+          size_t len;
+          const uint8_t *bytes = pmt::u8vector_elements(pmt::cdr(msg), len);
+          in_msg.assign((const char *)bytes, len);
+        }
+        else
+          in_msg = pmt::symbol_to_string(msg);
         // std::string out_msg = removeNumbers(in_msg);
         std::string out_msg = in_msg.substr(0, in_msg.find(":")+2);
         out_msg = out_msg.append(std::to_string(++m_cnt)); 
-        message_port_pub(pmt::intern("msg_out"), pmt::string_to_symbol(out_msg));
+        if (is_pdu) // keep the metadata, the new payload is never interned
+          message_port_pub(pmt::intern("msg_out"), pmt::cons(pmt::car(msg), pmt::init_u8vector(out_msg.length(), (const uint8_t *)out_msg.data())));
+        else
+          message_port_pub(pmt::intern("msg_out"), pmt::string_to_symbol(out_msg));
       }
     int
     payload_id_inc_impl::work(int noutput_items,
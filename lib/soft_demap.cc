@@ -0,0 +1,213 @@
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include "soft_demap.h"
+#include <boost/math/special_functions/bessel.hpp>
+#include <cmath>
+#include <iostream>
+
+namespace gr {
+  namespace lora_sdr {
+
+    namespace {
+      struct gray_partition_tables {
+        std::vector<uint16_t> tables[MAX_SF + 1][2];
+
+        gray_partition_tables()
+        {
+          for (uint8_t sf = MIN_SF; sf <= MAX_SF; sf++)
+          {
+            uint32_t N = 1u << sf;
+            for (int reduced_rate = 0; reduced_rate < 2; reduced_rate++)
+            {
+              uint32_t d = reduced_rate ? 4 : 1;
+              std::vector<uint16_t> &table = tables[sf][reduced_rate];
+              std::vector<uint32_t> bins_cnt(N / d, 0);
+              table.resize(N);
+              for (uint32_t n = 0; n < N; n++)
+              {
+                // LoRa: shift by -1 and use reduce rate if first block (header)
+                uint32_t s = mod(n - 1, N) / d;
+                s = (s ^ (s >> 1u)); // Gray encoding formula
+                table[s * d + bins_cnt[s]++] = n;
+              }
+            }
+          }
+        }
+      };
+
+      const uint32_t LOG_I0_TABLE_MAX = 64;  ///< arguments covered by the table, the asymptotic expansion is used above
+      const uint32_t LOG_I0_TABLE_RES = 64;  ///< table entries per unit
+
+      struct log_i0_table {
+        std::vector<double> values;
+
+        log_i0_table()
+        {
+          values.resize(LOG_I0_TABLE_MAX * LOG_I0_TABLE_RES + 1);
+          for (uint32_t k = 0; k < values.size(); k++)
+            values[k] = std::log(boost::math::cyl_bessel_i(0, (double)k / LOG_I0_TABLE_RES));
+        }
+      };
+
+      /**
+       *  \brief  Asymptotic expansion of log(I0(x)), up to the term in 1/x^3
+       */
+      inline double log_i0_asymptotic(double x)
+      {
+        double r = 1 / (8 * x);
+        return x + std::log((1 + r * (1 + r * (4.5 + r * 37.5))) / std::sqrt(2 * M_PI * x));
+      }
+
+      inline double reduce_max(const double *x, uint32_t len)
+      {
+        double m0(0), m1(0), m2(0), m3(0);
+        uint32_t i = 0;
+        for (; i + 4 <= len; i += 4)
+        {
+          m0 = std::max(m0, x[i]);
+          m1 = std::max(m1, x[i + 1]);
+          m2 = std::max(m2, x[i + 2]);
+          m3 = std::max(m3, x[i + 3]);
+        }
+        for (; i < len; i++)
+          m0 = std::max(m0, x[i]);
+        return std::max(std::max(m0, m1), std::max(m2, m3));
+      }
+
+      inline double reduce_sum(const double *x, uint32_t len)
+      {
+        double s0(0), s1(0), s2(0), s3(0);
+        uint32_t i = 0;
+        for (; i + 4 <= len; i += 4)
+        {
+          s0 += x[i];
+          s1 += x[i + 1];
+          s2 += x[i + 2];
+          s3 += x[i + 3];
+        }
+        for (; i < len; i++)
+          s0 += x[i];
+        return (s0 + s1) + (s2 + s3);
+      }
+    } // namespace
+
+    const std::vector<uint16_t> &gray_partition(uint8_t sf, bool reduced_rate)
+    {
+      static const gray_partition_tables partitions;
+      return partitions.tables[sf][reduced_rate];
+    }
+
+    void log_bessel_i0(const float *x, double *log_i0, uint32_t n, uint8_t kernel)
+    {
+      switch (kernel)
+      {
+      case LOG_I0_POLY:
+        for (uint32_t i = 0; i < n; i++)
+        {
+          double t = x[i] / 3.75;
+          if (t < 1)
+          {
+            t *= t;
+            log_i0[i] = std::log(1 + t * (3.5156229 + t * (3.0899424 + t * (1.2067492 + t * (0.2659732 + t * (0.0360768 + t * 0.0045813))))));
+          }
+          else
+          {
+            t = 1 / t;
+            double p = 0.39894228 + t * (0.01328592 + t * (0.00225319 + t * (-0.00157565 + t * (0.00916281 + t * (-0.02057706 + t * (0.02635537 + t * (-0.01647633 + t * 0.00392377)))))));
+            log_i0[i] = x[i] + std::log(p / std::sqrt((double)x[i]));
+          }
+        }
+        break;
+      case LOG_I0_TABLE:
+      {
+        static const log_i0_table table;
+        const double *values = table.values.data();
+        for (uint32_t i = 0; i < n; i++)
+        {
+          if (x[i] < LOG_I0_TABLE_MAX)
+          {
+            double pos = x[i] * LOG_I0_TABLE_RES;
+            uint32_t k = (uint32_t)pos;
+            log_i0[i] = values[k] + (pos - k) * (values[k + 1] - values[k]);
+          }
+          else
+            log_i0[i] = log_i0_asymptotic(x[i]);
+        }
+        break;
+      }
+      case LOG_I0_ASYMPTOTIC:
+        for (uint32_t i = 0; i < n; i++)
+        {
+          if (x[i] < 2.25)
+          {
+            double q = x[i] * x[i] / 4;  // power series, sum of q^k/(k!)^2
+            log_i0[i] = std::log1p(q * (1 + q * (1. / 4 + q * (1. / 36 + q * (1. / 576 + q / 14400)))));
+          }
+          else
+            log_i0[i] = log_i0_asymptotic(x[i]);
+        }
+        break;
+      default:
+        std::cerr << RED << "Unknown log(I0) kernel " << (int)kernel << ", using boost" << RESET << std::endl;
+        // fall through
+      case LOG_I0_BOOST:
+        for (uint32_t i = 0; i < n; i++)
+          log_i0[i] = x[i] < 700 ? std::log(boost::math::cyl_bessel_i(0, (double)x[i])) : log_i0_asymptotic(x[i]);
+        break;
+      }
+    }
+
+    void compute_LLRs(const double *LLs, uint8_t sf, bool reduced_rate, bool max_log, LLR *LLRs, double *work)
+    {
+      const uint16_t *bins = gray_partition(sf, reduced_rate).data();
+      uint8_t n_bits = reduced_rate ? sf - 2 : sf;
+      uint32_t n_values = 1u << n_bits;
+
+      uint32_t d = reduced_rate ? 4 : 1;
+
+      // log-likelihood of each demapped value
+      if (!reduced_rate)
+        for (uint32_t s = 0; s < n_values; s++)
+          work[s] = LLs[bins[s]];
+      else
+        for (uint32_t s = 0; s < n_values; s++)
+          work[s] = std::max(std::max(LLs[bins[4 * s]], LLs[bins[4 * s + 1]]), std::max(LLs[bins[4 * s + 2]], LLs[bins[4 * s + 3]]));
+
+      // likelihood of each demapped value, normalized by the largest one
+      double *likelihoods = work + n_values;
+      if (!max_log)
+      {
+        double LL_max = *std::max_element(work, work + n_values);
+        for (uint32_t s = 0; s < n_values; s++)
+        {
+          likelihoods[s] = 0;
+          for (uint32_t j = 0; j < d; j++)
+            likelihoods[s] += std::exp(LLs[bins[d * s + j]] - LL_max);
+        }
+      }
+
+      std::fill(LLRs, LLRs + MAX_SF, 0);
+      // from MSB to LSB, the values where the current bit is '1' are the upper half of the work buffers
+      for (int i = n_bits - 1; i >= 0; i--)
+      {
+        uint32_t half = 1u << i;
+        if (max_log)
+          LLRs[sf - 1 - i] = reduce_max(work + half, half) - reduce_max(work, half);
+        else
+        {
+          double sum_X1 = reduce_sum(likelihoods + half, half);
+          double sum_X0 = reduce_sum(likelihoods, half);
+          if (sum_X1 > 0 && sum_X0 > 0)
+            LLRs[sf - 1 - i] = std::log(sum_X1) - std::log(sum_X0);
+          else // one set is negligible, max-log is then exact up to log(2^sf)
+            LLRs[sf - 1 - i] = reduce_max(work + half, half) - reduce_max(work, half);
+          volk_64f_x2_add_64f(likelihoods, likelihoods, likelihoods + half, half);
+        }
+        volk_64f_x2_max_64f(work, work, work + half, half);
+      }
+    }
+
+  } // namespace lora_sdr
+} // namespace gr
@@ -0,0 +1,70 @@
+#ifndef INCLUDED_LORA_SDR_SOFT_DEMAP_H
+#define INCLUDED_LORA_SDR_SOFT_DEMAP_H
+
+#include <gnuradio/lora_sdr/utilities.h>
+#include <vector>
+
+namespace gr {
+  namespace lora_sdr {
+
+    /**
+     *  \brief  Kernels computing log(I0(x)), ordered by decreasing accuracy
+     */
+    enum log_i0_kernel {
+      LOG_I0_BOOST,      ///< boost::math::cyl_bessel_i, asymptotic expansion above 700 where I0 overflows
+      LOG_I0_POLY,       ///< piecewise polynomials of Abramowitz and Stegun 9.8.1-9.8.2, absolute error < 5e-7
+      LOG_I0_TABLE,      ///< linear interpolation in a table below 64, asymptotic expansion above, absolute error < 2e-5
+      LOG_I0_ASYMPTOTIC  ///< power series below 2.25, asymptotic expansion above, absolute error < 5e-3
+    };
+
+    /**
+     *  \brief  Return the FFT bins of a dechirped symbol sorted by Gray demapped symbol value.
+     *          Entry s*d+j is the j-th of the d bins (d = 4 in reduced rate, 1 otherwise) demapped to the value s.
+     *          Tables are computed once for each (sf, reduced rate) pair and shared by the whole process.
+     *
+     *  \param  sf
+     *          spreading factor
+     *  \param  reduced_rate
+     *          use sf-2 bits per symbol (header block or low datarate optimisation)
+     */
+    const std::vector<uint16_t> &gray_partition(uint8_t sf, bool reduced_rate);
+
+    /**
+     *  \brief  Compute log(I0(x)) for n values, where I0 is the modified Bessel function of the first kind of order 0.
+     *          Working in the log domain, the result never overflows.
+     *
+     *  \param  x
+     *          the non-negative arguments
+     *  \param  log_i0
+     *          output
+     *  \param  n
+     *          number of values
+     *  \param  kernel
+     *          approximation used, see log_i0_kernel
+     */
+    void log_bessel_i0(const float *x, double *log_i0, uint32_t n, uint8_t kernel);
+
+    /**
+     *  \brief  Compute the LLRs of the bits of a lora symbol from the likelihood of each FFT bin.
+     *          Each bit is reduced over the two halves of the likelihoods sorted by demapped value, which are then folded together for the next bit,
+     *          so that all the LLRs cost O(2^sf) contiguous operations instead of O(sf*2^sf) scattered ones.
+     *
+     *  \param  LLs
+     *          the 2^sf log-likelihoods of the FFT bins
+     *  \param  sf
+     *          spreading factor
+     *  \param  reduced_rate
+     *          use sf-2 bits per symbol, the two MSB LLRs are then set to 0
+     *  \param  max_log
+     *          use the max-log approximation, otherwise the likelihoods are summed (with log-sum-exp to avoid overflows)
+     *  \param  LLRs
+     *          the MAX_SF output LLRs, [MSB ... LSB] in the sf first entries
+     *  \param  work
+     *          scratch buffer of at least 2^(sf+1) entries
+     */
+    void compute_LLRs(const double *LLs, uint8_t sf, bool reduced_rate, bool max_log, LLR *LLRs, double *work);
+
+  } // namespace lora_sdr
+} // namespace gr
+
+#endif /* INCLUDED_LORA_SDR_SOFT_DEMAP_H */
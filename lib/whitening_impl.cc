@@ -52,7 +52,16 @@ namespace gr
             }
             //  payload_str.push_back(random_string(rand()%253+2));
             // payload_str.push_back(rand()%2?"12345":"abcdefghijklmnop");
-            payload_str.push_back(pmt::symbol_to_string(message));
+            if (pmt::is_pair(message) && pmt::is_u8vector(pmt::cdr(message)))
+            { // PDU: metadata dictionary and payload bytes
+                size_t len;
+                const uint8_t *bytes = pmt::u8vector_elements(pmt::cdr(message), len);
+                payload_str.push_back(std::string((const char *)bytes, len));
+            }
+            else if (pmt::is_symbol(message))
+                payload_str.push_back(pmt::symbol_to_string(message));
+            else
+                std::cout << RED << "Whitening: message is neither a string nor a PDU, dropped" << RESET << std::endl;
             // std::copy(payload_str.begin(), payload_str.end(), std::back_inserter(m_payload));
         }
 
@@ -164,7 +173,8 @@ namespace gr
              
                 add_item_tag(0, nitems_written(0), pmt::string_to_symbol("frame_len"), frame_len);
 
-                add_item_tag(0, nitems_written(0), pmt::string_to_symbol("payload_str"), pmt::string_to_symbol(payload_str.front()));
+                // payload as bytes, a symbol would stay interned for the lifetime of the process
+                add_item_tag(0, nitems_written(0), pmt::string_to_symbol("payload_str"), pmt::init_u8vector(payload_str.front().length(), (const uint8_t *)payload_str.front().data()));
 
                 std::copy(payload_str.front().begin(), payload_str.front().end(), std::back_inserter(m_payload));
 
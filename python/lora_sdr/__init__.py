@@ -22,4 +22,8 @@ except ModuleNotFoundError:
 # import any pure python here
 #
 from .lora_sdr_lora_tx import lora_sdr_lora_tx
-from .lora_sdr_lora_rx import lora_sdr_lora_rx
\ No newline at end of file
+from .lora_sdr_lora_rx import lora_sdr_lora_rx
+from .lora_sdr_lora_rx_multi_sf import lora_sdr_lora_rx_multi_sf
+from .lora_sdr_lora_multi_rx import lora_sdr_lora_multi_rx
+from .offline_decoder import decode_recording
+from .frame_index import scan_recording, save_index, load_index, decode_indexed
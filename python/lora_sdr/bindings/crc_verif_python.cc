@@ -16,7 +16,7 @@
 /* BINDTOOL_GEN_AUTOMATIC(0) */
 /* BINDTOOL_USE_PYGCCXML(0) */
 /* BINDTOOL_HEADER_FILE(crc_verif.h)                                        */
-/* BINDTOOL_HEADER_FILE_HASH(f21d76dec9ed1d7a8019b05dbdcceee7) */
+/* BINDTOOL_HEADER_FILE_HASH(9d568f7e405c5ba85cc1a12cb6454eae) */
 /***********************************************************************************/
 
 #include <pybind11/complex.h>
@@ -37,7 +37,8 @@ void bind_crc_verif(py::module &m) {
       m, "crc_verif", D(crc_verif))
 
       .def(py::init(&crc_verif::make), py::arg("print_rx_msg"),
-           py::arg("output_crc_check"), D(crc_verif, make))
+           py::arg("output_crc_check"), py::arg("pdu") = false,
+           D(crc_verif, make))
 
       ;
 }
@@ -16,7 +16,7 @@
 /* BINDTOOL_GEN_AUTOMATIC(0) */
 /* BINDTOOL_USE_PYGCCXML(0) */
 /* BINDTOOL_HEADER_FILE(deinterleaver.h) */
-/* BINDTOOL_HEADER_FILE_HASH(65d663d2dd00415de5989550a4b1fb3e) */
+/* BINDTOOL_HEADER_FILE_HASH(9586e40ed0d545d2f40e3af30b27500f) */
 /***********************************************************************************/
 
 #include <pybind11/complex.h>
@@ -38,7 +38,7 @@ void bind_deinterleaver(py::module &m) {
                                              D(deinterleaver))
 
       .def(py::init(&deinterleaver::make), py::arg("soft_decoding"),
-           D(deinterleaver, make))
+           py::arg("soft_format") = 0, D(deinterleaver, make))
 
       ;
 }
@@ -0,0 +1,31 @@
+/*
+ * Copyright 2022 Free Software Foundation, Inc.
+ *
+ * This file is part of GNU Radio
+ *
+ * SPDX-License-Identifier: GPL-3.0-or-later
+ *
+ */
+#include "pydoc_macros.h"
+#define D(...) DOC(gr, lora_sdr, __VA_ARGS__)
+/*
+  This file contains placeholders for docstrings for the Python bindings.
+  Do not edit! These were automatically extracted during the binding process
+  and will be overwritten during the build process
+ */
+
+static const char *__doc_gr_lora_sdr_frame_encoder = R"doc()doc";
+
+static const char *__doc_gr_lora_sdr_frame_encoder_frame_encoder_0 = R"doc()doc";
+
+static const char *__doc_gr_lora_sdr_frame_encoder_frame_encoder_1 = R"doc()doc";
+
+static const char *__doc_gr_lora_sdr_frame_encoder_set_cr = R"doc()doc";
+
+static const char *__doc_gr_lora_sdr_frame_encoder_get_cr = R"doc()doc";
+
+static const char *__doc_gr_lora_sdr_frame_encoder_set_sf = R"doc()doc";
+
+static const char *__doc_gr_lora_sdr_frame_encoder_make = R"doc()doc";
+
+static const char *__doc_gr_lora_sdr_frame_encoder_encode = R"doc()doc";
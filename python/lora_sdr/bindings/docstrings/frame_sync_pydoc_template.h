@@ -19,3 +19,15 @@ static const char *__doc_gr_lora_sdr_frame_sync = R"doc()doc";
 static const char *__doc_gr_lora_sdr_frame_sync_frame_sync = R"doc()doc";
 
 static const char *__doc_gr_lora_sdr_frame_sync_make = R"doc()doc";
+
+static const char *__doc_gr_lora_sdr_frame_sync_detect_windows = R"doc()doc";
+
+static const char *__doc_gr_lora_sdr_frame_sync_searched_windows = R"doc()doc";
+
+static const char *__doc_gr_lora_sdr_frame_sync_gate_false_alarms = R"doc()doc";
+
+static const char *__doc_gr_lora_sdr_frame_sync_gate_misses = R"doc()doc";
+
+static const char *__doc_gr_lora_sdr_frame_sync_inline_headers = R"doc()doc";
+
+static const char *__doc_gr_lora_sdr_frame_sync_header_latency_saved = R"doc()doc";
@@ -16,7 +16,7 @@
 /* BINDTOOL_GEN_AUTOMATIC(0) */
 /* BINDTOOL_USE_PYGCCXML(0) */
 /* BINDTOOL_HEADER_FILE(fft_demod.h)                                        */
-/* BINDTOOL_HEADER_FILE_HASH(e1fc6fa289a3f514124b89738f3de4fd) */
+/* BINDTOOL_HEADER_FILE_HASH(018da42f7ce847eb239374e08f5b0931) */
 /***********************************************************************************/
 
 #include <pybind11/complex.h>
@@ -37,7 +37,9 @@ void bind_fft_demod(py::module &m) {
       m, "fft_demod", D(fft_demod))
 
       .def(py::init(&fft_demod::make), py::arg("soft_decoding"),
-           py::arg("max_log_approx"), D(fft_demod, make))
+           py::arg("max_log_approx"), py::arg("fft_backend") = 0,
+           py::arg("log_i0_kernel") = 0, py::arg("soft_format") = 0,
+           D(fft_demod, make))
 
       ;
 }
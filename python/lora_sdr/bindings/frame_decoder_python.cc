@@ -0,0 +1,46 @@
+/*
+ * Copyright 2022 Free Software Foundation, Inc.
+ *
+ * This file is part of GNU Radio
+ *
+ * SPDX-License-Identifier: GPL-3.0-or-later
+ *
+ */
+
+/***********************************************************************************/
+/* This file is automatically generated using bindtool and can be manually
+ * edited  */
+/* The following lines can be configured to regenerate this file during cmake */
+/* If manual edits are made, the following tags should be modified accordingly.
+ */
+/* BINDTOOL_GEN_AUTOMATIC(0) */
+/* BINDTOOL_USE_PYGCCXML(0) */
+/* BINDTOOL_HEADER_FILE(frame_decoder.h)                                      */
+/* BINDTOOL_HEADER_FILE_HASH(c812d706502f031b73c6892b3533e5c2) */
+/***********************************************************************************/
+
+#include <pybind11/complex.h>
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+namespace py = pybind11;
+
+#include <gnuradio/lora_sdr/frame_decoder.h>
+// pydoc.h is automatically generated in the build directory
+#include <frame_decoder_pydoc.h>
+
+void bind_frame_decoder(py::module &m) {
+
+  using frame_decoder = ::gr::lora_sdr::frame_decoder;
+
+  py::class_<frame_decoder, gr::block, gr::basic_block,
+             std::shared_ptr<frame_decoder>>(m, "frame_decoder", D(frame_decoder))
+
+      .def(py::init(&frame_decoder::make), py::arg("impl_head"), py::arg("cr"),
+           py::arg("pay_len"), py::arg("has_crc"), py::arg("ldro_mode"),
+           py::arg("print_header"), py::arg("print_payload"),
+           py::arg("soft_decoding"), py::arg("soft_format") = 0,
+           py::arg("pdu") = false, D(frame_decoder, make))
+
+      ;
+}
@@ -0,0 +1,57 @@
+/*
+ * Copyright 2022 Free Software Foundation, Inc.
+ *
+ * This file is part of GNU Radio
+ *
+ * SPDX-License-Identifier: GPL-3.0-or-later
+ *
+ */
+
+/***********************************************************************************/
+/* This file is automatically generated using bindtool and can be manually
+ * edited  */
+/* The following lines can be configured to regenerate this file during cmake */
+/* If manual edits are made, the following tags should be modified accordingly.
+ */
+/* BINDTOOL_GEN_AUTOMATIC(0) */
+/* BINDTOOL_USE_PYGCCXML(0) */
+/* BINDTOOL_HEADER_FILE(frame_encoder.h)                                      */
+/* BINDTOOL_HEADER_FILE_HASH(1741c3d77e5ffbf99c247514d4a1b30c) */
+/***********************************************************************************/
+
+#include <pybind11/complex.h>
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+namespace py = pybind11;
+
+#include <gnuradio/lora_sdr/frame_encoder.h>
+// pydoc.h is automatically generated in the build directory
+#include <frame_encoder_pydoc.h>
+
+void bind_frame_encoder(py::module &m) {
+
+  using frame_encoder = ::gr::lora_sdr::frame_encoder;
+
+  py::class_<frame_encoder, gr::sync_block, gr::block, gr::basic_block,
+             std::shared_ptr<frame_encoder>>(m, "frame_encoder", D(frame_encoder))
+
+      .def(py::init(&frame_encoder::make), py::arg("sf"), py::arg("cr"),
+           py::arg("has_crc"), py::arg("impl_head"), py::arg("ldro_mode") = 2,
+           py::arg("bw") = 125000, D(frame_encoder, make))
+
+      .def("set_cr", &frame_encoder::set_cr, py::arg("cr"),
+           D(frame_encoder, set_cr))
+
+      .def("get_cr", &frame_encoder::get_cr, D(frame_encoder, get_cr))
+
+      .def("set_sf", &frame_encoder::set_sf, py::arg("sf"),
+           D(frame_encoder, set_sf))
+
+      .def_static("encode", &frame_encoder::encode, py::arg("payload"),
+                  py::arg("sf"), py::arg("cr"), py::arg("has_crc"),
+                  py::arg("impl_head"), py::arg("ldro"),
+                  D(frame_encoder, encode))
+
+      ;
+}
@@ -16,7 +16,7 @@
 /* BINDTOOL_GEN_AUTOMATIC(0) */
 /* BINDTOOL_USE_PYGCCXML(0) */
 /* BINDTOOL_HEADER_FILE(frame_sync.h)                                        */
-/* BINDTOOL_HEADER_FILE_HASH(b4a54a4ca7837d4c1d890b6e75488fba) */
+/* BINDTOOL_HEADER_FILE_HASH(2ad7e784f891f8a5b6566d57a5eb22d3) */
 /***********************************************************************************/
 
 #include <pybind11/complex.h>
@@ -38,8 +38,28 @@ void bind_frame_sync(py::module &m) {
 
       .def(py::init(&frame_sync::make), py::arg("center_freq"),
            py::arg("bandwidth"), py::arg("sf"), py::arg("impl_head"),
-           py::arg("sync_word"), py::arg("os_factor"), py::arg("preamble_len"),
+           py::arg("sync_word"), py::arg("os_factor"), py::arg("preamble_len") = 8,
+           py::arg("fft_backend") = 0, py::arg("energy_gate") = 0,
+           py::arg("inline_header") = false, py::arg("ldro_mode") = 2,
            D(frame_sync, make))
 
+      .def("detect_windows", &frame_sync::detect_windows,
+           D(frame_sync, detect_windows))
+
+      .def("searched_windows", &frame_sync::searched_windows,
+           D(frame_sync, searched_windows))
+
+      .def("gate_false_alarms", &frame_sync::gate_false_alarms,
+           D(frame_sync, gate_false_alarms))
+
+      .def("gate_misses", &frame_sync::gate_misses,
+           D(frame_sync, gate_misses))
+
+      .def("inline_headers", &frame_sync::inline_headers,
+           D(frame_sync, inline_headers))
+
+      .def("header_latency_saved", &frame_sync::header_latency_saved,
+           D(frame_sync, header_latency_saved))
+
       ;
 }
@@ -16,7 +16,7 @@
 /* BINDTOOL_GEN_AUTOMATIC(0) */
 /* BINDTOOL_USE_PYGCCXML(0) */
 /* BINDTOOL_HEADER_FILE(gray_mapping.h) */
-/* BINDTOOL_HEADER_FILE_HASH(42acb0b27196fd81600dab69004410d4) */
+/* BINDTOOL_HEADER_FILE_HASH(52b1cef510e8733a31ae3a762feea600) */
 /***********************************************************************************/
 
 #include <pybind11/complex.h>
@@ -37,7 +37,7 @@ void bind_gray_mapping(py::module &m) {
              std::shared_ptr<gray_mapping>>(m, "gray_mapping", D(gray_mapping))
 
       .def(py::init(&gray_mapping::make), py::arg("soft_decoding"),
-           D(gray_mapping, make))
+           py::arg("soft_format") = 0, D(gray_mapping, make))
 
       ;
 }
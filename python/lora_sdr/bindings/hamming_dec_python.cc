@@ -16,7 +16,7 @@
 /* BINDTOOL_GEN_AUTOMATIC(0) */
 /* BINDTOOL_USE_PYGCCXML(0) */
 /* BINDTOOL_HEADER_FILE(hamming_dec.h)                                        */
-/* BINDTOOL_HEADER_FILE_HASH(05a3b2e4a4df8fc6c5efa22295ecced4) */
+/* BINDTOOL_HEADER_FILE_HASH(180dd38c3270ed0cdaf0d94ea72d9387) */
 /***********************************************************************************/
 
 #include <pybind11/complex.h>
@@ -37,7 +37,7 @@ void bind_hamming_dec(py::module &m) {
              std::shared_ptr<hamming_dec>>(m, "hamming_dec", D(hamming_dec))
 
       .def(py::init(&hamming_dec::make), py::arg("soft_decoding"),
-           D(hamming_dec, make))
+           py::arg("soft_format") = 0, D(hamming_dec, make))
 
       ;
 }
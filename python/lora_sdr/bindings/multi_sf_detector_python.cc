@@ -0,0 +1,45 @@
+/*
+ * Copyright 2022 Free Software Foundation, Inc.
+ *
+ * This file is part of GNU Radio
+ *
+ * SPDX-License-Identifier: GPL-3.0-or-later
+ *
+ */
+
+/***********************************************************************************/
+/* This file is automatically generated using bindtool and can be manually
+ * edited  */
+/* The following lines can be configured to regenerate this file during cmake */
+/* If manual edits are made, the following tags should be modified accordingly.
+ */
+/* BINDTOOL_GEN_AUTOMATIC(0) */
+/* BINDTOOL_USE_PYGCCXML(0) */
+/* BINDTOOL_HEADER_FILE(multi_sf_detector.h)                                        */
+/* BINDTOOL_HEADER_FILE_HASH(ac2e2deeaca1961d479ce2b49068fe49) */
+/***********************************************************************************/
+
+#include <pybind11/complex.h>
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+namespace py = pybind11;
+
+#include <gnuradio/lora_sdr/multi_sf_detector.h>
+// pydoc.h is automatically generated in the build directory
+#include <multi_sf_detector_pydoc.h>
+
+void bind_multi_sf_detector(py::module &m) {
+
+  using multi_sf_detector = ::gr::lora_sdr::multi_sf_detector;
+
+  py::class_<multi_sf_detector, gr::block, gr::basic_block,
+             std::shared_ptr<multi_sf_detector>>(m, "multi_sf_detector", D(multi_sf_detector))
+
+      .def(py::init(&multi_sf_detector::make), py::arg("bandwidth"),
+           py::arg("sfs"), py::arg("impl_head"), py::arg("os_factor"),
+           py::arg("preamble_len") = 8, py::arg("fft_backend") = 0,
+           D(multi_sf_detector, make))
+
+      ;
+}
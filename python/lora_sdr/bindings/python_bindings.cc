@@ -27,6 +27,8 @@ void bind_data_source(py::module& m);
 void bind_deinterleaver(py::module& m);
 void bind_dewhitening(py::module& m);
 void bind_fft_demod(py::module& m);
+void bind_frame_decoder(py::module& m);
+void bind_frame_encoder(py::module& m);
 void bind_frame_sync(py::module& m);
 void bind_gray_demap(py::module& m);
 void bind_gray_mapping(py::module& m);
@@ -36,6 +38,7 @@ void bind_header_decoder(py::module& m);
 void bind_header(py::module& m);
 void bind_interleaver(py::module& m);
 void bind_modulate(py::module& m);
+void bind_multi_sf_detector(py::module& m);
 void bind_payload_id_inc(py::module& m);
 void bind_RH_RF95_header(py::module& m);
 void bind_whitening(py::module& m);
@@ -74,6 +77,8 @@ PYBIND11_MODULE(lora_sdr_python, m)
     bind_deinterleaver(m);
     bind_dewhitening(m);
     bind_fft_demod(m);
+    bind_frame_decoder(m);
+    bind_frame_encoder(m);
     bind_frame_sync(m);
     bind_gray_demap(m);
     bind_gray_mapping(m);
@@ -83,6 +88,7 @@ PYBIND11_MODULE(lora_sdr_python, m)
     bind_header(m);
     bind_interleaver(m);
     bind_modulate(m);
+    bind_multi_sf_detector(m);
     bind_payload_id_inc(m);
     bind_RH_RF95_header(m);
     bind_whitening(m);
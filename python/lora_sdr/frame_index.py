@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# Two-pass processing of complex64 IQ recordings: a preamble scan writing an index of the frames, then the decoding
+# of selected frames of the index only
+
+import argparse
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from .lora import gen_upchirp, gen_downchirp
+from .offline_decoder import plan_chunks, max_frame_symbols, decode_chunk, parse_sync_word
+
+# one entry per detected preamble: first sample of the preamble, spreading factor, CFO in bins (multiply by bw/2^sf
+# for Hz) and SNR in dB as estimated by frame_sync on the preamble upchirps
+INDEX_DTYPE = np.dtype([("sample_offset", "<u8"), ("sf", "u1"), ("cfo", "<f4"), ("snr", "<f4")])
+
+MAX_ADDITIONAL_UPCHIRPS = 3 # upchirps after the detection before giving up on the network identifiers, as in frame_sync
+
+
+def sync_word_to_net_ids(sync_word):
+    """
+    Values of the two network identifier upchirps, for a sync word given as in frame_sync (one byte, or directly the two values)
+    """
+    if len(sync_word) == 1:
+        return [((sync_word[0] & 0xF0) >> 4) << 3, (sync_word[0] & 0x0F) << 3]
+    return list(sync_word[:2])
+
+
+def _dechirp_fft(symbols, ref_chirp):
+    return np.fft.fft(symbols * ref_chirp, axis=-1)
+
+
+def _peak_position(spectrum):
+    """
+    Position of the maximum of a power spectrum in bins, interpolated between its neighbours, in [-N/2, N/2)
+    """
+    N = len(spectrum)
+    k = np.argmax(spectrum)
+    y_1, y0, y1 = np.sqrt(spectrum[[(k - 1) % N, k, (k + 1) % N]])
+    den = y_1 - 2 * y0 + y1
+    k = k + (0.5 * (y_1 - y1) / den if den else 0)
+    return (k + N / 2) % N - N / 2
+
+
+def scan_samples(samples, sf, os_factor, sync_word=[0x12], preamb_len=8):
+    """
+    Find the preambles of one spreading factor in a block of samples, with the detection of frame_sync: n_up_req
+    consecutive symbol windows with the same dechirped value (±1), coarse alignment on the symbol boundaries and
+    check of the network identifiers following the upchirps.
+
+    Returns a list of (preamble start, cfo, snr), the start being the index of the sample in the block (negative if
+    the preamble starts before it).
+    """
+    N = 1 << sf
+    n_up_req = preamb_len - 3
+    net_ids = sync_word_to_net_ids(sync_word)
+    upchirp = gen_upchirp(sf).astype(np.complex64)
+    downchirp = gen_downchirp(sf).astype(np.complex64)
+    x = samples[os_factor // 2::os_factor]
+    n_windows = len(x) // N
+    if n_windows < n_up_req:
+        return []
+
+    # value of all the symbol windows at once, -1 for the windows without energy
+    spectrum = np.abs(_dechirp_fft(x[:n_windows * N].reshape(n_windows, N), downchirp)) ** 2
+    bins = np.argmax(spectrum, axis=1)
+    bins[spectrum.sum(axis=1) == 0] = -1
+    consecutive = (np.abs(np.mod(np.abs(np.diff(bins)) + 1, N) - 1) <= 1) & (bins[1:] != -1) & (bins[:-1] != -1)
+
+    # runs of at least n_up_req windows, the detection happening on the n_up_req-th one
+    edges = np.diff(np.concatenate(([0], consecutive.astype(np.int8), [0])))
+    run_starts = np.nonzero(edges == 1)[0]
+    run_ends = np.nonzero(edges == -1)[0]
+    detections = run_starts[run_ends - run_starts >= n_up_req - 1] + n_up_req - 1
+
+    n = np.arange(N)
+    frames = []
+    for d in detections:
+        k_hat = np.argmax(np.bincount(bins[d - n_up_req + 1:d + 1], minlength=N))
+        # coarse synchronization, the symbol boundaries are shifted by the integer CFO
+        aligned = (d + 1) * N - k_hat
+
+        # sampling instant of the decimation with the strongest upchirps, in place of the fractional STO correction
+        best = None
+        for phase in range(-(os_factor // 2), os_factor - os_factor // 2):
+            first = (aligned - (n_up_req - 1) * N) * os_factor + os_factor // 2 + phase
+            if first < 0:
+                continue
+            up = samples[first:first + (n_up_req - 1) * N * os_factor:os_factor].reshape(n_up_req - 1, N)
+            mag = np.abs(_dechirp_fft(up, downchirp)) ** 2
+            energy = mag.max(axis=1).sum()
+            if best is None or energy > best[0]:
+                best = (energy, phase, up)
+        if best is None:
+            continue
+        _, phase, up = best
+        x = samples[os_factor // 2 + phase::os_factor]
+
+        # fractional CFO from the phase between consecutive upchirps (Bernier)
+        up_fft = _dechirp_fft(up, downchirp)
+        mag = np.abs(up_fft) ** 2
+        idx_max = np.argmax(mag[np.argmax(mag.max(axis=1))])
+        cfo_frac = -np.angle(np.sum(up_fft[:-1, idx_max] * np.conj(up_fft[1:, idx_max]))) / 2 / np.pi
+        cfo_frac_correc = np.exp(-2j * np.pi * cfo_frac * n / N).astype(np.complex64)
+
+        # skip the remaining upchirps, then the network identifiers and the downchirps
+        pos = aligned
+        for _ in range(preamb_len - n_up_req + MAX_ADDITIONAL_UPCHIRPS):
+            if pos + 4 * N > len(x) or np.argmax(np.abs(_dechirp_fft(x[pos:pos + N] * cfo_frac_correc, downchirp))) not in (0, 1, N - 1):
+                break
+            pos += N
+        if pos + 4 * N > len(x):
+            continue # frame cut by the end of the block
+        net_id1, net_id2 = np.argmax(np.abs(_dechirp_fft(x[pos:pos + 2 * N].reshape(2, N) * cfo_frac_correc, downchirp)), axis=1)
+        if abs(net_id1 - net_ids[0]) > 2 or abs(net_id2 - net_ids[1]) > 2:
+            continue
+
+        # the CFO and the time offset move the upchirps and the downchirps in opposite directions
+        mag = np.abs(_dechirp_fft(up * cfo_frac_correc, downchirp)) ** 2
+        up_val = _peak_position(mag.sum(axis=0))
+        down_val = _peak_position(np.abs(_dechirp_fft(x[pos + 3 * N:pos + 4 * N] * cfo_frac_correc, upchirp)) ** 2)
+        cfo_int = int(np.round((up_val + down_val) / 2))
+
+        # SNR on the upchirps synchronized and corrected from the CFO, as logged by frame_sync, at the best sampling instant
+        cfo_correc = np.exp(-2j * np.pi * (cfo_int + cfo_frac) * n / N)
+        snr = None
+        for fine_phase in range(phase - os_factor // 2, phase + os_factor - os_factor // 2):
+            first = (pos + cfo_int - (n_up_req - 1) * N) * os_factor + os_factor // 2 + fine_phase
+            if first < 0:
+                continue
+            mag = np.abs(_dechirp_fft(samples[first:first + (n_up_req - 1) * N * os_factor:os_factor].reshape(n_up_req - 1, N) * cfo_correc, downchirp)) ** 2
+            peak = mag.max(axis=1)
+            fine_snr = np.mean(10 * np.log10(peak / (mag.sum(axis=1) - peak)))
+            if snr is None or fine_snr > snr:
+                snr = fine_snr
+                start = first - (preamb_len - n_up_req + 1) * N * os_factor
+        if snr is None:
+            continue
+        frames.append((start, cfo_int + cfo_frac, snr))
+    return frames
+
+
+def scan_chunk(path, read_start, read_len, sfs, os_factor, sync_word, preamb_len):
+    """
+    Scan the samples [read_start, read_start + read_len) of a recording, returns the index entries of its preambles
+    """
+    samples = np.array(np.memmap(path, dtype=np.complex64, mode='r', offset=read_start * np.dtype(np.complex64).itemsize, shape=(read_len,)))
+    entries = []
+    for sf in sfs:
+        # a preamble starting more than a symbol before the chunk is found by the previous one, unless the recording begins with it
+        entries += [(max(read_start + start, 0), sf, cfo, snr) for start, cfo, snr in scan_samples(samples, sf, os_factor, sync_word, preamb_len)
+                    if start >= -(1 << sf) * os_factor or read_start == 0]
+    return np.array(entries, dtype=INDEX_DTYPE)
+
+
+def scan_recording(path, samp_rate, bw, sfs, sync_word=[0x12], preamb_len=8, chunk_len=1 << 24, n_workers=None, progress=None):
+    """
+    First pass over a complex64 IQ recording: detect the preambles of the spreading factors sfs, without synchronizing
+    nor decoding the frames.
+
+    The recording is memory-mapped and scanned in chunks of chunk_len samples in a pool of n_workers processes (all
+    the cores by default). progress(done, total) is called after each chunk.
+
+    Returns the index, a structured array of INDEX_DTYPE sorted by sample offset.
+    """
+    if chunk_len <= 0:
+        raise ValueError("The chunk length should be positive")
+    if samp_rate % bw:
+        raise ValueError("The sampling rate should be a multiple of the bandwidth")
+    os_factor = int(samp_rate // bw)
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=INDEX_DTYPE)
+    n_samples = len(np.memmap(path, dtype=np.complex64, mode='r'))
+
+    # a chunk finds the preambles starting in it, read up to their downchirps
+    max_samples_per_symbol = (1 << max(sfs)) * os_factor
+    tail = (preamb_len + MAX_ADDITIONAL_UPCHIRPS + 6) * max_samples_per_symbol
+    chunks = plan_chunks(n_samples, chunk_len, 0, tail)
+
+    index = []
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {executor.submit(scan_chunk, path, read_start, read_len, list(sfs), os_factor, list(sync_word), preamb_len): (start, end)
+                   for start, end, read_start, read_len in chunks}
+        for done, future in enumerate(as_completed(futures), 1):
+            start, end = futures[future]
+            entries = future.result()
+            # the offset estimates of a preamble at a chunk border can differ by a few samples between the two chunks,
+            # both keep it and only the first one is kept below
+            samples_per_symbol = (1 << entries["sf"].astype(np.int64)) * os_factor
+            index.append(entries[(entries["sample_offset"] + samples_per_symbol >= start) & (entries["sample_offset"] < end + samples_per_symbol)])
+            if progress:
+                progress(done, len(chunks))
+    index = np.concatenate(index) if index else np.zeros(0, dtype=INDEX_DTYPE)
+    index = index[np.argsort(index["sample_offset"], kind="stable")]
+
+    # one entry per preamble and spreading factor
+    keep = np.ones(len(index), dtype=bool)
+    last = {}
+    for i, entry in enumerate(index):
+        sf = int(entry["sf"])
+        if sf in last and entry["sample_offset"] - index[last[sf]]["sample_offset"] < (1 << sf) * os_factor:
+            keep[i] = False
+        else:
+            last[sf] = i
+    return index[keep]
+
+
+def save_index(path, index, samp_rate, bw, sync_word=[0x12], preamb_len=8):
+    """
+    Write an index with the parameters of its scan (.npz)
+    """
+    np.savez(path, index=index, samp_rate=samp_rate, bw=bw, sync_word=np.array(sync_word), preamb_len=preamb_len)
+
+
+def load_index(path):
+    """
+    Read an index written by save_index. Returns the index and a dictionary of the parameters of its scan.
+    """
+    with np.load(path) as data:
+        params = dict(samp_rate=data["samp_rate"].item(), bw=data["bw"].item(), sync_word=data["sync_word"].tolist(), preamb_len=data["preamb_len"].item())
+        return data["index"], params
+
+
+def decode_indexed(path, index, samp_rate, bw, center_freq=868100000, impl_head=False, cr=1, pay_len=255, has_crc=True, sync_word=[0x12],
+                   soft_decoding=False, soft_format=0, ldro_mode=2, preamb_len=8, max_pay_len=255, n_workers=None, progress=None):
+    """
+    Second pass: decode the frames of the index entries given (e.g. a selection of the index returned by scan_recording),
+    by seeking to their preamble in the recording.
+
+    Returns the frames received, in the order of the entries, as returned by decode_recording with the additional key
+    entry (position of the entry in the given index). The entries whose header is invalid are not returned.
+    """
+    os_factor = int(samp_rate // bw)
+    n_samples = os.path.getsize(path) // np.dtype(np.complex64).itemsize
+    params = dict(samp_rate=samp_rate, bw=bw, center_freq=center_freq, impl_head=impl_head, cr=cr, pay_len=pay_len, has_crc=has_crc,
+                  sync_word=list(sync_word), soft_decoding=soft_decoding, soft_format=soft_format, ldro_mode=ldro_mode, preamb_len=preamb_len)
+
+    frames = {}
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {}
+        for i, entry in enumerate(index):
+            sf = int(entry["sf"])
+            samples_per_symbol = (1 << sf) * os_factor
+            # from one symbol before the preamble to the end of the longest frame
+            read_start = max(int(entry["sample_offset"]) - samples_per_symbol, 0)
+            read_end = int(entry["sample_offset"]) + int(math.ceil(preamb_len + 4.25 + max_frame_symbols(sf, bw, impl_head, cr, has_crc, max_pay_len, ldro_mode) + 2)) * samples_per_symbol
+            read_len = min(read_end, n_samples) - read_start
+            if read_len <= 0:
+                continue
+            futures[executor.submit(decode_chunk, path, read_start, read_len, dict(params, sf=sf))] = i
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            sf = int(index[i]["sf"])
+            samples_per_symbol = (1 << sf) * os_factor
+            header_offset = int(index[i]["sample_offset"]) + (preamb_len + 4.25) * samples_per_symbol
+            # the frame of the entry, a frame following it in the read samples is not kept
+            candidates = [f for f in future.result() if abs(f["sample_offset"] - header_offset) < 2 * samples_per_symbol]
+            if candidates:
+                frames[i] = dict(min(candidates, key=lambda f: abs(f["sample_offset"] - header_offset)), entry=i)
+            if progress:
+                progress(done, len(futures))
+    return [frames[i] for i in sorted(frames)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index the LoRa frames of a complex64 IQ recording (.cfile), then decode selected frames")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan = subparsers.add_parser("scan", help="detect the preambles and write the index")
+    scan.add_argument("recording", help="complex64 IQ file")
+    scan.add_argument("index", help="index file to write (.npz)")
+    scan.add_argument("--samp-rate", type=int, required=True, help="sampling rate of the recording [Hz]")
+    scan.add_argument("--bw", type=int, default=125000, help="LoRa bandwidth [Hz] (default: %(default)s)")
+    scan.add_argument("--sfs", type=lambda v: [int(sf) for sf in v.split(",")], default=[7, 8, 9, 10, 11, 12],
+                      help="comma separated spreading factors to detect (default: 7,8,9,10,11,12)")
+    scan.add_argument("--sync-word", type=parse_sync_word, default=[0x12], help="sync word, or comma separated network identifiers (default: 0x12)")
+    scan.add_argument("--preamb-len", type=int, default=8, help="number of preamble upchirps (default: %(default)s)")
+    scan.add_argument("--chunk-len", type=int, default=1 << 24, help="samples per chunk (default: %(default)s)")
+    scan.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes (default: number of cores)")
+
+    decode = subparsers.add_parser("decode", help="decode the frames of the index matching the selection")
+    decode.add_argument("recording", help="complex64 IQ file")
+    decode.add_argument("index", help="index file written by scan")
+    decode.add_argument("--entries", type=lambda v: [int(i) for i in v.split(",")], default=None, help="comma separated positions in the index")
+    decode.add_argument("--sf", type=int, default=None, help="only the frames of this spreading factor")
+    decode.add_argument("--min-snr", type=float, default=None, help="only the frames received above this SNR [dB]")
+    decode.add_argument("--start", type=float, default=None, help="only the frames after this time [s]")
+    decode.add_argument("--stop", type=float, default=None, help="only the frames before this time [s]")
+    decode.add_argument("--center-freq", type=int, default=868100000, help="RF center frequency [Hz] (default: %(default)s)")
+    decode.add_argument("--impl-head", action="store_true", help="implicit header mode")
+    decode.add_argument("--cr", type=int, default=1, help="coding rate of the implicit header mode (default: %(default)s)")
+    decode.add_argument("--pay-len", type=int, default=255, help="payload length of the implicit header mode (default: %(default)s)")
+    decode.add_argument("--no-crc", action="store_true", help="no payload CRC in implicit header mode")
+    decode.add_argument("--soft-decoding", action="store_true", help="soft-decision decoding")
+    decode.add_argument("--soft-format", type=int, default=0, choices=[0, 1, 2], help="soft values format: 0 double, 1 float, 2 int8 (default: %(default)s)")
+    decode.add_argument("--ldro", type=int, default=2, choices=[0, 1, 2], help="low datarate optimisation: 0 off, 1 on, 2 auto (default: %(default)s)")
+    decode.add_argument("--max-pay-len", type=int, default=255, help="longest payload expected (default: %(default)s)")
+    decode.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes (default: number of cores)")
+    decode.add_argument("-o", "--output", default="-", help="output file of the frames as JSON lines (default: standard output)")
+    args = parser.parse_args(argv)
+
+    def progress(done, total):
+        print("\r{}/{} {}".format(done, total, "chunks scanned" if args.command == "scan" else "frames decoded"),
+              end="\n" if done == total else "", file=sys.stderr, flush=True)
+
+    if args.command == "scan":
+        index = scan_recording(args.recording, args.samp_rate, args.bw, args.sfs, sync_word=args.sync_word, preamb_len=args.preamb_len,
+                               chunk_len=args.chunk_len, n_workers=args.workers, progress=progress)
+        save_index(args.index, index, args.samp_rate, args.bw, args.sync_word, args.preamb_len)
+        print("{} preambles indexed".format(len(index)), file=sys.stderr)
+        return 0
+
+    index, params = load_index(args.index)
+    selected = np.ones(len(index), dtype=bool)
+    if args.entries is not None:
+        selected[:] = False
+        selected[args.entries] = True
+    if args.sf is not None:
+        selected &= index["sf"] == args.sf
+    if args.min_snr is not None:
+        selected &= index["snr"] >= args.min_snr
+    if args.start is not None:
+        selected &= index["sample_offset"] >= args.start * params["samp_rate"]
+    if args.stop is not None:
+        selected &= index["sample_offset"] < args.stop * params["samp_rate"]
+    positions = np.nonzero(selected)[0]
+
+    frames = decode_indexed(args.recording, index[positions], params["samp_rate"], params["bw"], center_freq=args.center_freq, impl_head=args.impl_head,
+                            cr=args.cr, pay_len=args.pay_len, has_crc=not args.no_crc, sync_word=params["sync_word"], soft_decoding=args.soft_decoding,
+                            soft_format=args.soft_format, ldro_mode=args.ldro, preamb_len=params["preamb_len"], max_pay_len=args.max_pay_len,
+                            n_workers=args.workers, progress=progress)
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for frame in frames:
+            # position in the whole index
+            out.write(json.dumps(dict(frame, entry=int(positions[frame["entry"]]), payload=frame["payload"].hex())) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print("{} of {} selected frames decoded".format(len(frames), len(positions)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
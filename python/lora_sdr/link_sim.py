@@ -0,0 +1,478 @@
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# Vectorized link-level simulation of LoRa frames with NumPy. The frames of a batch share their parameters and are
+# processed at once as (frames x symbols x samples) arrays: encoding, modulation, AWGN/CFO/STO/SFO channel,
+# synchronization on the preamble, dechirping with a batched FFT, hard or soft demodulation and decoding. The encoding
+# and the decoding follow the blocks of the module bit for bit, the synchronization follows frame_sync.
+
+import math
+
+import numpy as np
+from .whitening_sequence import code as _whitening_code
+
+WHITENING_SEQ = np.array(_whitening_code, dtype=np.uint8)
+HEADER_NIBBLES = 5
+
+
+def _hamming_encode(data, cr):
+    # reference encoder of hamming_enc, data bits msb first
+    d0, d1, d2, d3 = (data >> 3) & 1, (data >> 2) & 1, (data >> 1) & 1, data & 1
+    if cr != 1:
+        p0 = d3 ^ d2 ^ d1
+        p1 = d2 ^ d1 ^ d0
+        p2 = d3 ^ d2 ^ d0
+        p3 = d3 ^ d1 ^ d0
+        return (d3 << 7 | d2 << 6 | d1 << 5 | d0 << 4 | p0 << 3 | p1 << 2 | p2 << 1 | p3) >> (4 - cr)
+    return d3 << 4 | d2 << 3 | d1 << 2 | d0 << 1 | (d0 ^ d1 ^ d2 ^ d3)
+
+
+def _hamming_decode(x, cr):
+    # reference hard decoder of hamming_dec, only the codes with cr >= 3 correct errors
+    cw_len = cr + 4
+    c = [(x >> (cw_len - 1 - i)) & 1 for i in range(cw_len)]
+    data = c[3] << 3 | c[2] << 2 | c[1] << 1 | c[0]
+    if cr == 4 and not sum(c) % 2:
+        return data
+    if cr >= 3:
+        syndrom = (c[0] ^ c[1] ^ c[2] ^ c[4]) + ((c[1] ^ c[2] ^ c[3] ^ c[5]) << 1) + ((c[0] ^ c[1] ^ c[3] ^ c[6]) << 2)
+        data ^= {5: 0b0001, 7: 0b0010, 3: 0b0100, 6: 0b1000}.get(syndrom, 0)
+    return data
+
+
+HAMMING_ENC = {cr: np.array([_hamming_encode(x, cr) for x in range(16)], dtype=np.uint8) for cr in range(1, 5)}
+HAMMING_DEC = {cr: np.array([_hamming_decode(x, cr) for x in range(1 << (cr + 4))], dtype=np.uint8) for cr in range(1, 5)}
+# soft decoding candidates as in hamming_soft_decode: data nibble and +/-1 sign of each codeword bit (msb first)
+_SOFT_NIBBLES = np.array([(k & 1) << 3 | (k & 2) << 1 | (k & 4) >> 1 | (k & 8) >> 3 for k in range(16)], dtype=np.uint8)
+HAMMING_SIGNS = {cr: np.array([[1.0 if (HAMMING_ENC[cr][nibble] >> (cr + 3 - j)) & 1 else -1.0 for j in range(cr + 4)] for nibble in _SOFT_NIBBLES])
+                 for cr in range(1, 5)}
+
+
+def _crc16_table():
+    table = np.zeros(256, dtype=np.uint16)
+    for x in range(256):
+        crc = x << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021 if crc & 0x8000 else crc << 1) & 0xFFFF
+        table[x] = crc
+    return table
+
+
+CRC16_TABLE = _crc16_table()
+
+
+def crc16(data):
+    """
+    CRC16 (CCITT polynomial, initial value 0) of each row of a (frames, bytes) array
+    """
+    crc = np.zeros(len(data), dtype=np.uint16)
+    for i in range(data.shape[1]):
+        crc = (crc << 8) ^ CRC16_TABLE[(crc >> 8) ^ data[:, i]]
+    return crc
+
+
+def payload_crc(payloads):
+    """
+    CRC appended to the payloads by add_crc: CRC of the N-2 first bytes XORed with the last 2 bytes
+    """
+    F, L = payloads.shape
+    if L < 2:
+        return payloads[:, 0].astype(np.uint16) if L else np.zeros(F, dtype=np.uint16)
+    return crc16(payloads[:, :L - 2]) ^ payloads[:, L - 1] ^ (payloads[:, L - 2].astype(np.uint16) << 8)
+
+
+def header_checksum(header):
+    """
+    5 bit checksum of explicit headers, computed on their first 3 nibbles (the 3 first columns of header)
+    """
+    h0, h1, h2 = (header[..., i].astype(np.uint8) for i in range(3))
+    b = lambda h, i: (h >> i) & 1
+    c4 = b(h0, 3) ^ b(h0, 2) ^ b(h0, 1) ^ b(h0, 0)
+    c3 = b(h0, 3) ^ b(h1, 3) ^ b(h1, 2) ^ b(h1, 1) ^ b(h2, 0)
+    c2 = b(h0, 2) ^ b(h1, 3) ^ b(h1, 0) ^ b(h2, 3) ^ b(h2, 1)
+    c1 = b(h0, 1) ^ b(h1, 2) ^ b(h1, 0) ^ b(h2, 2) ^ b(h2, 1) ^ b(h2, 0)
+    c0 = b(h0, 0) ^ b(h1, 1) ^ b(h2, 3) ^ b(h2, 2) ^ b(h2, 1) ^ b(h2, 0)
+    return c4 << 4 | c3 << 3 | c2 << 2 | c1 << 1 | c0
+
+
+def frame_blocks(pay_len, sf, cr, has_crc=True, impl_head=False, ldro=False):
+    """
+    Number of nibbles of a frame and number of interleaved blocks after the first one (which carries sf-2 nibbles with
+    a coding rate 4/8), each of sf (or sf-2 with ldro) nibbles and cr+4 symbols
+    """
+    n_nibbles = (0 if impl_head else HEADER_NIBBLES) + 2 * pay_len + (4 if has_crc else 0)
+    sf_app = sf - 2 * ldro
+    return n_nibbles, max(math.ceil((n_nibbles - (sf - 2)) / sf_app), 0)
+
+
+def frame_symbols(pay_len, sf, cr, has_crc=True, impl_head=False, ldro=False):
+    """
+    Number of symbols of a frame after its preamble
+    """
+    return 8 + frame_blocks(pay_len, sf, cr, has_crc, impl_head, ldro)[1] * (cr + 4)
+
+
+def _interleave(codewords, sf, sf_app, cw_len, add_parity):
+    # symbol i carries the i-th bit (msb first) of the codewords, shifted by one more codeword at each symbol
+    i = np.arange(cw_len)
+    r = np.arange(sf_app)
+    bits = (codewords[..., :, None] >> (cw_len - 1 - i)) & 1
+    sym_bits = bits[..., (r[:, None] + i) % sf_app, i].astype(np.int64)
+    cols = (sym_bits << r[:, None]).sum(-2)
+    symbols = cols << (sf - sf_app)
+    # reduced rate symbols end with the parity of their bits and a zero
+    if add_parity:
+        symbols |= (sym_bits.sum(-2) & 1) << (sf - sf_app - 1)
+    return symbols
+
+
+def _deinterleave(symbols, sf_app, cw_len):
+    # inverse of _interleave on symbols of sf_app bits, the codewords come out msb first
+    i = np.arange(cw_len)
+    q = np.arange(sf_app)
+    bits = (symbols[..., None, :] >> ((q[:, None] - i) % sf_app)) & 1
+    return (bits << (cw_len - 1 - i)).sum(-1)
+
+
+def encode_frames(payloads, sf, cr, has_crc=True, impl_head=False, ldro=False):
+    """
+    Symbol values of the frames of a (frames, pay_len) array of payload bytes, equal to the output of the chain whitening,
+    header, add_crc, hamming_enc, interleaver and gray_demap (or of frame_encoder). Returns a (frames, symbols) array.
+    """
+    payloads = np.atleast_2d(np.asarray(payloads, dtype=np.uint8))
+    F, L = payloads.shape
+    if L > 255:
+        raise ValueError("payloads longer than 255 bytes")
+
+    # nibbles: explicit header, whitened payload (low nibble first) and CRC
+    nibbles = []
+    if not impl_head:
+        header = np.zeros((F, HEADER_NIBBLES), dtype=np.uint8)
+        header[:, 0] = L >> 4
+        header[:, 1] = L & 0x0F
+        header[:, 2] = (cr << 1) | has_crc
+        chk = header_checksum(header)
+        header[:, 3] = chk >> 4
+        header[:, 4] = chk & 0x0F
+        nibbles.append(header)
+    whitened = payloads ^ WHITENING_SEQ[:L]
+    nibbles.append(np.stack([whitened & 0x0F, whitened >> 4], axis=-1).reshape(F, 2 * L))
+    if has_crc:
+        crc = payload_crc(payloads)
+        nibbles.append(np.stack([(crc >> (4 * k)) & 0x0F for k in range(4)], axis=-1).astype(np.uint8))
+
+    n_nibbles, n_blocks = frame_blocks(L, sf, cr, has_crc, impl_head, ldro)
+    sf_app = sf - 2 * ldro
+    padded = np.zeros((F, sf - 2 + n_blocks * sf_app), dtype=np.uint8)
+    padded[:, :n_nibbles] = np.concatenate(nibbles, axis=1)
+
+    # the first block carries the header in reduced rate with a coding rate 4/8
+    first = _interleave(HAMMING_ENC[4][padded[:, None, :sf - 2]], sf, sf - 2, 8, True)
+    rest = _interleave(HAMMING_ENC[cr][padded[:, sf - 2:].reshape(F, n_blocks, sf_app)], sf, sf_app, cr + 4, ldro)
+    symbols = np.concatenate([first.reshape(F, -1), rest.reshape(F, -1)], axis=1)
+
+    # gray demapping, the inverse of x ^ (x >> 1), and shift of 1
+    for shift in (1, 2, 4, 8):
+        symbols ^= symbols >> shift
+    return (symbols + 1) & ((1 << sf) - 1)
+
+
+def sync_word_to_net_ids(sync_word):
+    """
+    Values of the two network identifier upchirps, for a sync word given as in modulate (one byte, or directly the two values)
+    """
+    if len(sync_word) == 1:
+        return [((sync_word[0] & 0xF0) >> 4) << 3, (sync_word[0] & 0x0F) << 3]
+    return list(sync_word[:2])
+
+
+def _upchirp_phase(m, s, N):
+    # phase in cycles of the upchirp of value s at the chip time m in [0, N), as build_upchirp
+    return m * m / (2 * N) + (s / N - 0.5) * m - (m >= N - s) * m
+
+
+def frame_samples(n_symbols, sf, os_factor=1, preamb_len=8):
+    """
+    Number of samples of a frame of n_symbols symbols after its preamble, without padding
+    """
+    return int((preamb_len + 4.25 + n_symbols) * (1 << sf) * os_factor)
+
+
+def modulate(symbols, sf, os_factor=1, sync_word=[0x12], preamb_len=8, zero_padd=0, sto=0, sfo_ppm=0):
+    """
+    Samples of the frames of a (frames, symbols) array of symbol values, as output by modulate: preamb_len upchirps,
+    the two network identifiers, 2.25 downchirps and the payload symbols, followed by zero_padd zeros.
+
+    The chirps are evaluated at the sampling instants of the receiver, (n - sto) * (1 + sfo_ppm * 1e-6) for the
+    sample n, so that a timing offset of sto samples (possibly fractional) and a sampling frequency offset of
+    sfo_ppm are applied exactly. sto and sfo_ppm are scalars or one value per frame.
+    Returns a (frames, samples) complex64 array.
+    """
+    symbols = np.atleast_2d(symbols)
+    F, S = symbols.shape
+    N = 1 << sf
+    values = np.concatenate([np.zeros((F, preamb_len), dtype=np.int64), np.tile(sync_word_to_net_ids(sync_word), (F, 1)), symbols], axis=1)
+
+    # time of each sample in chips from the beginning of the frame
+    n = np.arange(frame_samples(S, sf, os_factor, preamb_len) + zero_padd)
+    sto = np.reshape(sto, (-1, 1))
+    sfo = np.reshape(sfo_ppm, (-1, 1)) * 1e-6
+    t = (n - sto) * (1 + sfo) / os_factor
+    t = np.broadcast_to(t, (F, len(n)))
+
+    up_end = (preamb_len + 2) * N
+    payload_start = (preamb_len + 4.25) * N
+    in_payload = t >= payload_start
+    tp = np.where(in_payload, t - payload_start, t)
+    k = np.floor(tp / N)
+    m = tp - k * N
+    idx = np.clip(k.astype(np.int64) + in_payload * (preamb_len + 2), 0, values.shape[1] - 1)
+    s = np.take_along_axis(values, idx, axis=1)
+    down = (t >= up_end) & ~in_payload
+    phase = np.where(down, -_upchirp_phase(np.mod(t - up_end, N), 0, N), _upchirp_phase(m, s, N))
+    samples = np.exp(2j * np.pi * np.mod(phase, 1)).astype(np.complex64)
+    samples[(t < 0) | (t >= payload_start + S * N)] = 0
+    return samples
+
+
+def channel(samples, sf, os_factor=1, snr_db=np.inf, cfo=0, rng=None):
+    """
+    Add a carrier frequency offset of cfo bins (multiply by bw/2^sf for Hz) and a white gaussian noise of power
+    10^(-snr_db/10) per sample (the chirps having a unit power), as channel_model in the simulation flowgraphs.
+    snr_db and cfo are scalars or one value per frame.
+    """
+    rng = np.random.default_rng(rng)
+    F, L = samples.shape
+    N = 1 << sf
+    n = np.arange(L)
+    out = samples * np.exp(2j * np.pi * np.mod(np.reshape(cfo, (-1, 1)) * n / (N * os_factor), 1)).astype(np.complex64)
+    sigma = np.sqrt(10 ** (-np.reshape(snr_db, (-1, 1)) / 10) / 2)
+    if np.any(np.isfinite(snr_db)):
+        noise = rng.standard_normal((F, L), dtype=np.float32) + 1j * rng.standard_normal((F, L), dtype=np.float32)
+        out = out + (np.where(np.isfinite(sigma), sigma, 0) * noise).astype(np.complex64)
+    return out.astype(np.complex64)
+
+
+def _windows(samples, starts, step, N):
+    """
+    Gather the windows of N samples taken every step samples from starts ((frames, windows) indices), zero outside of the frames
+    """
+    F, L = samples.shape
+    idx = starts[..., None] + step * np.arange(N)
+    valid = (idx >= 0) & (idx < L)
+    out = np.take_along_axis(samples, np.clip(idx, 0, L - 1).reshape(F, -1), axis=1).reshape(idx.shape)
+    return np.where(valid, out, 0).astype(np.complex64)
+
+
+def _signed(k, N):
+    return (k + N // 2) % N - N // 2
+
+
+def synchronize(samples, sf, n_symbols, os_factor=1, sync_word=[0x12], preamb_len=8, center_freq=None, bw=125000):
+    """
+    Synchronize the frames of a (frames, samples) array starting within a fraction of symbol from their first sample,
+    and return the dechirped power spectra of their n_symbols payload symbols.
+
+    The detection and the estimations follow frame_sync: n_up_req consecutive upchirps with the same value (±1),
+    fractional CFO from the phase between the upchirps (Bernier), sample phase of the decimation, integer CFO and
+    integer STO from the upchirps and the downchirps, check of the network identifiers and, if center_freq is given,
+    SFO derived from the CFO and compensated on each symbol by whole samples.
+
+    Returns a dictionary of arrays: detected (frames,), cfo (in bins), sto (in samples) and spectra, the
+    (frames, n_symbols, 2^sf) power spectra with the integer CFO removed (bin k is the symbol value k).
+    """
+    F, L = samples.shape
+    N = 1 << sf
+    n_up_req = preamb_len - 3
+    upchirp = np.exp(2j * np.pi * _upchirp_phase(np.arange(N), 0, N)).astype(np.complex64)
+    downchirp = np.conj(upchirp)
+    up_starts = np.tile(np.arange(preamb_len) * N * os_factor, (F, 1))
+    inner = slice(1, preamb_len - 1) # upchirps fully inside the preamble for a STO of less than a symbol
+
+    # detection on the upchirps
+    Y = np.fft.fft(_windows(samples, up_starts + os_factor // 2, os_factor, N) * downchirp, axis=-1)
+    power = np.abs(Y) ** 2
+    peaks = np.argmax(power, axis=-1)
+    consecutive = np.abs(_signed(np.diff(peaks, axis=1), N)) <= 1
+    detected = np.lib.stride_tricks.sliding_window_view(consecutive, n_up_req - 1, axis=1).all(-1).any(-1)
+
+    # fractional CFO from the phase of the peak between consecutive upchirps
+    k_hat = np.argmax(power[:, inner].sum(1), axis=-1)
+    peak_vals = np.take_along_axis(Y[:, inner], k_hat[:, None, None], axis=-1)[..., 0]
+    cfo_frac = -np.angle(np.sum(peak_vals[:, :-1] * np.conj(peak_vals[:, 1:]), axis=1)) / (2 * np.pi)
+    n = np.arange(L)
+    samples = samples * np.exp(-2j * np.pi * np.mod(cfo_frac[:, None] * n / (N * os_factor), 1)).astype(np.complex64)
+
+    # sample phase of the decimation maximizing the energy of the upchirps peaks
+    if os_factor > 1:
+        energy = np.stack([np.max(np.abs(np.fft.fft(_windows(samples, up_starts[:, inner] + p, os_factor, N) * downchirp, axis=-1)) ** 2, axis=-1).sum(-1)
+                           for p in range(os_factor)], axis=1)
+        phase = np.argmax(energy, axis=1)
+    else:
+        phase = np.zeros(F, dtype=np.int64)
+
+    # integer CFO and STO: the upchirps are dechirped to cfo-sto, the downchirps to cfo+sto
+    Y_up = np.fft.fft(_windows(samples, up_starts[:, inner] + phase[:, None], os_factor, N) * downchirp, axis=-1)
+    down_starts = ((preamb_len + 2 + np.arange(2)) * N * os_factor)[None, :] + phase[:, None]
+    Y_down = np.fft.fft(_windows(samples, down_starts, os_factor, N) * upchirp, axis=-1)
+    k_up = _signed(np.argmax((np.abs(Y_up) ** 2).sum(1), axis=-1), N)
+    k_down = _signed(np.argmax((np.abs(Y_down) ** 2).sum(1), axis=-1), N)
+    sto_int = np.round((k_down - k_up) / 2).astype(np.int64)
+    cfo_int = k_up + sto_int
+
+    # network identifiers, an offset of 2 is allowed on the first one as in frame_sync
+    id_starts = ((preamb_len + np.arange(2)) * N * os_factor)[None, :] + (phase + os_factor * sto_int)[:, None]
+    Y_id = np.fft.fft(_windows(samples, id_starts, os_factor, N) * downchirp, axis=-1)
+    ids = np.mod(np.argmax(np.abs(Y_id), axis=-1) - cfo_int[:, None], N)
+    net_ids = sync_word_to_net_ids(sync_word)
+    id_off = _signed(ids[:, 0] - net_ids[0], N)
+    detected &= (np.abs(id_off) <= 2) & (np.mod(ids[:, 1] - id_off, N) == net_ids[1])
+
+    # payload symbols, each one shifted by the timing drift from the middle of the upchirps
+    cfo = cfo_int + cfo_frac
+    sfo = cfo * bw / N / center_freq if center_freq else np.zeros(F)
+    symb_time = (preamb_len + 4.25 + np.arange(n_symbols)) * N
+    drift = -sfo[:, None] * (symb_time - preamb_len * N / 2)
+    starts = phase[:, None] + np.round(os_factor * (sto_int[:, None] + symb_time + drift)).astype(np.int64)
+    Y_pay = np.fft.fft(_windows(samples, starts, os_factor, N) * downchirp, axis=-1)
+    bins = np.mod(np.arange(N) + cfo_int[:, None, None], N)
+    spectra = np.take_along_axis(np.abs(Y_pay) ** 2, np.broadcast_to(bins, Y_pay.shape), axis=-1)
+
+    sto = (phase - os_factor // 2) + os_factor * sto_int
+    return dict(detected=detected, cfo=cfo, sto=sto, spectra=spectra.astype(np.float32))
+
+
+def _log_i0(x):
+    # log(I0(x)): power series for small arguments, asymptotic expansion up to 1/x^3 above (LOG_I0_ASYMPTOTIC kernel)
+    x = np.asarray(x, dtype=np.float64)
+    q = x * x / 4
+    small = np.log1p(q * (1 + q * (1. / 4 + q * (1. / 36 + q * (1. / 576 + q / 14400)))))
+    xs = np.maximum(x, 2.25)
+    r = 1 / (8 * xs)
+    large = xs + np.log((1 + r * (1 + r * (4.5 + r * 37.5))) / np.sqrt(2 * np.pi * xs))
+    return np.where(x < 2.25, small, large)
+
+
+def _gray_partition(sf, reduced_rate):
+    # bins ordered by the demapped value they give: shift of -1, reduced rate and Gray encoding, as gray_partition
+    N = 1 << sf
+    s = np.mod(np.arange(N) - 1, N) // (4 if reduced_rate else 1)
+    return np.argsort(s ^ (s >> 1), kind="stable")
+
+
+def hard_values(spectra, sf, reduced_rate):
+    """
+    Demapped values (fft_demod then gray_mapping) of the symbols of power spectra (..., 2^sf)
+    """
+    s = np.mod(np.argmax(spectra, axis=-1) - 1, 1 << sf) // (4 if reduced_rate else 1)
+    return s ^ (s >> 1)
+
+
+def soft_values(spectra, sf, reduced_rate):
+    """
+    Max-log LLRs of the bits of the demapped values (msb first, sf-2 of them in reduced rate) of the symbols of power
+    spectra (..., 2^sf), with the signal and noise powers estimated on each symbol as in fft_demod
+    """
+    N = 1 << sf
+    spectra = spectra.astype(np.float64)
+    idx = np.argmax(spectra, axis=-1)
+    near = np.abs(_signed(np.arange(N) - idx[..., None], N)) <= 1
+    Ps = np.sum(spectra * near, axis=-1) / N
+    Pn = np.sum(spectra * ~near, axis=-1) / (N - 3)
+    LLs = _log_i0(np.sqrt(spectra) * (np.sqrt(Ps * N) / Pn)[..., None])
+
+    n_bits = sf - 2 if reduced_rate else sf
+    work = LLs[..., _gray_partition(sf, reduced_rate)].reshape(LLs.shape[:-1] + (1 << n_bits, -1)).max(-1)
+    values = np.arange(1 << n_bits)
+    LLRs = [work[..., (values >> b) & 1 == 1].max(-1) - work[..., (values >> b) & 1 == 0].max(-1) for b in range(n_bits - 1, -1, -1)]
+    return np.stack(LLRs, axis=-1)
+
+
+def _soft_decode(LLRs, sf_app, cw_len):
+    # deinterleaving of the LLRs of blocks (..., cw_len, sf_app) and maximum likelihood decoding of their codewords
+    i = np.arange(cw_len)
+    q = np.arange(sf_app)
+    cw_LLRs = LLRs[..., i, sf_app - 1 - (q[:, None] - i) % sf_app]
+    scores = cw_LLRs @ HAMMING_SIGNS[cw_len - 4].T
+    return _SOFT_NIBBLES[np.argmax(scores, axis=-1)]
+
+
+def decode_frames(spectra, sf, cr, pay_len, has_crc=True, impl_head=False, ldro=False, soft_decoding=False):
+    """
+    Decode the frames of a batch from the power spectra of their symbols, as fft_demod, gray_mapping, deinterleaver,
+    hamming_dec, header_decoder, dewhitening and crc_verif (or frame_decoder) would.
+
+    All the frames are decoded with the given parameters. A frame whose explicit header is invalid or differs from them
+    is reported with header_valid and crc_valid False, the receiver would have lost it.
+    Returns a dictionary of arrays: payloads (frames, pay_len), header_valid and crc_valid (frames,).
+    """
+    F = spectra.shape[0]
+    n_nibbles, n_blocks = frame_blocks(pay_len, sf, cr, has_crc, impl_head, ldro)
+    sf_app = sf - 2 * ldro
+    cw_len = cr + 4
+    first, rest = spectra[:, :8], spectra[:, 8:8 + n_blocks * cw_len].reshape(F, n_blocks, cw_len, -1)
+    if soft_decoding:
+        nibbles = [_soft_decode(soft_values(first, sf, True), sf - 2, 8),
+                   _soft_decode(soft_values(rest, sf, ldro), sf_app, cw_len).reshape(F, -1)]
+    else:
+        nibbles = [HAMMING_DEC[4][_deinterleave(hard_values(first, sf, True), sf - 2, 8)],
+                   HAMMING_DEC[cr][_deinterleave(hard_values(rest, sf, ldro), sf_app, cw_len)].reshape(F, -1)]
+    nibbles = np.concatenate(nibbles, axis=1)[:, :n_nibbles].astype(np.uint8)
+
+    if impl_head:
+        header_valid = np.ones(F, dtype=bool)
+    else:
+        header, nibbles = nibbles[:, :HEADER_NIBBLES], nibbles[:, HEADER_NIBBLES:]
+        checksum = ((header[:, 3] & 1) << 4) + header[:, 4]
+        header_valid = ((checksum == header_checksum(header)) & ((header[:, 0] << 4) + header[:, 1] == pay_len) &
+                        ((header[:, 2] & 1) == has_crc) & ((header[:, 2] >> 1) == cr))
+
+    # dewhitening of the payload, the CRC is not whitened
+    frame = nibbles[:, 1::2] << 4 | nibbles[:, 0::2]
+    payloads = frame[:, :pay_len] ^ WHITENING_SEQ[:pay_len]
+    if has_crc:
+        crc_valid = header_valid & (payload_crc(payloads) == (frame[:, pay_len].astype(np.uint16) | frame[:, pay_len + 1].astype(np.uint16) << 8))
+    else:
+        crc_valid = np.zeros(F, dtype=bool)
+    return dict(payloads=payloads, header_valid=header_valid, crc_valid=crc_valid)
+
+
+def simulate(payloads, sf, cr, snr_db, os_factor=1, has_crc=True, impl_head=False, ldro=False, soft_decoding=False, cfo=0, sto=0,
+             clk_offset_ppm=0, center_freq=868.1e6, bw=125000, sync_word=[0x12], preamb_len=8, rng=None, batch_size=None):
+    """
+    Send a (frames, pay_len) array of payloads through the channel and decode them, batch_size frames at a time
+    (as many as fit in 2^22 samples by default).
+
+    snr_db is the SNR per sample of the channel, cfo (in bins) and sto (in samples) are added to the offsets due to the
+    clock offset of clk_offset_ppm, which shifts both the carrier and the sampling frequencies as in tx_rx_simulation.
+    snr_db, cfo and sto are scalars or one value per frame.
+
+    Returns a dictionary of per-frame arrays: detected (preamble and network identifiers found), header_valid,
+    crc_valid, payloads (the decoded payloads) and bit_errors (in the decoded payload).
+    """
+    payloads = np.atleast_2d(np.asarray(payloads, dtype=np.uint8))
+    F, pay_len = payloads.shape
+    rng = np.random.default_rng(rng)
+    N = 1 << sf
+    n_symbols = frame_symbols(pay_len, sf, cr, has_crc, impl_head, ldro)
+    zero_padd = N * os_factor
+    if batch_size is None:
+        batch_size = max(1, (1 << 22) // (frame_samples(n_symbols, sf, os_factor, preamb_len) + zero_padd))
+    per_frame = lambda x, s: np.broadcast_to(np.asarray(x, dtype=np.float64), (F,))[s]
+
+    results = []
+    for start in range(0, F, batch_size):
+        s = slice(start, min(start + batch_size, F))
+        symbols = encode_frames(payloads[s], sf, cr, has_crc, impl_head, ldro)
+        samples = modulate(symbols, sf, os_factor, sync_word, preamb_len, zero_padd, sto=per_frame(sto, s), sfo_ppm=clk_offset_ppm)
+        samples = channel(samples, sf, os_factor, per_frame(snr_db, s), per_frame(cfo, s) + center_freq * clk_offset_ppm * 1e-6 * N / bw, rng)
+        sync = synchronize(samples, sf, n_symbols, os_factor, sync_word, preamb_len, center_freq, bw)
+        decoded = decode_frames(sync["spectra"], sf, cr, pay_len, has_crc, impl_head, ldro, soft_decoding)
+        decoded["detected"] = sync["detected"]
+        decoded["header_valid"] &= sync["detected"]
+        decoded["crc_valid"] &= sync["detected"]
+        decoded["bit_errors"] = np.unpackbits(decoded["payloads"] ^ payloads[s], axis=1).sum(1)
+        results.append(decoded)
+    return {key: np.concatenate([r[key] for r in results]) for key in results[0]}
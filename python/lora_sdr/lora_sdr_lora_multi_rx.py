@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# GNU Radio Python Flow Graph
+# Title: lora_sdr_lora_multi_rx
+# GNU Radio version: 3.10.3.0
+
+from gnuradio import gr
+from gnuradio import blocks
+from gnuradio import filter
+from gnuradio.filter import firdes
+from gnuradio.fft import window
+import pmt
+from .lora_sdr_lora_rx_multi_sf import lora_sdr_lora_rx_multi_sf
+
+class channel_tagger(gr.basic_block):
+    """
+    Add the index and the center frequency of a channel to the metadata of the PDUs received on it.
+    """
+    def __init__(self, channel, center_freq):
+        gr.basic_block.__init__(self, name="channel_tagger", in_sig=None, out_sig=None)
+        self.channel = pmt.from_long(channel)
+        self.center_freq = pmt.from_double(center_freq)
+        self.message_port_register_in(pmt.intern("in"))
+        self.message_port_register_out(pmt.intern("out"))
+        self.set_msg_handler(pmt.intern("in"), self.handle_msg)
+
+    def handle_msg(self, msg):
+        meta = pmt.car(msg)
+        meta = pmt.dict_add(meta, pmt.intern("channel"), self.channel)
+        meta = pmt.dict_add(meta, pmt.intern("center_freq"), self.center_freq)
+        self.message_port_pub(pmt.intern("out"), pmt.cons(meta, pmt.cdr(msg)))
+
+class lora_sdr_lora_multi_rx(gr.hier_block2):
+    def __init__(self, center_freq=868000000, samp_rate=2000000, chan_spacing=250000, channels=[867875000, 868125000], bw=125000, sfs=[7,8,9,10,11,12], cr=1, has_crc=True, impl_head=False, pay_len=255, sync_word=[0x12], soft_decoding=False, soft_format=0, ldro_mode=2, print_rx=[True,True], oversample_rate=1):
+        gr.hier_block2.__init__(
+            self, "lora_sdr_lora_multi_rx",
+                gr.io_signature(1, 1, gr.sizeof_gr_complex*1),
+                gr.io_signature(0, 0, 0),
+        )
+        self.message_port_register_hier_out("out")
+
+
+        ##################################################
+        # Parameters
+        ##################################################
+        self.center_freq = center_freq
+        self.samp_rate = samp_rate
+        self.chan_spacing = chan_spacing
+        self.channels = list(channels)
+        self.bw = bw
+        self.sfs = list(sfs)
+        self.cr = cr
+        self.has_crc = has_crc
+        self.impl_head = impl_head
+        self.pay_len = pay_len
+        self.sync_word = sync_word
+        self.soft_decoding = soft_decoding
+        self.soft_format = soft_format
+        self.print_rx = print_rx
+        self.oversample_rate = oversample_rate
+
+        # the band is split in num_chans channels of chan_spacing, output k of the channelizer being centered on center_freq + k*chan_spacing (modulo samp_rate)
+        if samp_rate % chan_spacing:
+            raise ValueError("The sampling rate should be a multiple of the channel spacing")
+        self.num_chans = int(samp_rate // chan_spacing)
+        chan_rate = chan_spacing * oversample_rate
+        if chan_rate % bw:
+            raise ValueError("The channel spacing times the oversampling rate should be a multiple of the bandwidth")
+        self.channel_map = []
+        for freq in self.channels:
+            k = round((freq - center_freq) / chan_spacing)
+            # with an even number of channels, +num_chans/2 and -num_chans/2 are the same output of the channelizer, only the latter is on the grid
+            if freq - center_freq != k * chan_spacing or not -(self.num_chans // 2) <= k < (self.num_chans + 1) // 2:
+                raise ValueError("The channel {} Hz is not on the channel grid of the captured band".format(freq))
+            self.channel_map.append(int(k % self.num_chans))
+
+
+        ##################################################
+        # Blocks
+        ##################################################
+        # prototype filter passing the lora signal, with its stopband before the edge of the channel
+        self.taps = firdes.low_pass(1.0, samp_rate, (bw + chan_spacing) / 4, (chan_spacing - bw) / 2 if chan_spacing > bw else bw / 10, window.WIN_BLACKMAN_HARRIS)
+        self.blocks_stream_to_streams_0 = blocks.stream_to_streams(gr.sizeof_gr_complex*1, self.num_chans)
+        self.pfb_channelizer_0 = filter.pfb_channelizer_ccf(self.num_chans, self.taps, oversample_rate)
+        self.pfb_channelizer_0.set_channel_map(self.channel_map)
+        self.rx = []
+        self.taggers = []
+        for i, freq in enumerate(self.channels):
+            self.rx.append(lora_sdr_lora_rx_multi_sf(center_freq=freq, bw=bw, cr=cr, has_crc=has_crc, impl_head=impl_head, pay_len=pay_len, samp_rate=chan_rate,
+                                                     sfs=self.sfs, sync_word=sync_word, soft_decoding=soft_decoding, soft_format=soft_format, ldro_mode=ldro_mode,
+                                                     print_rx=print_rx, pdu=True))
+            self.taggers.append(channel_tagger(i, freq))
+
+
+        ##################################################
+        # Connections
+        ##################################################
+        self.connect((self, 0), (self.blocks_stream_to_streams_0, 0))
+        for k in range(self.num_chans):
+            self.connect((self.blocks_stream_to_streams_0, k), (self.pfb_channelizer_0, k))
+        for i in range(len(self.channels)):
+            self.connect((self.pfb_channelizer_0, i), (self.rx[i], 0))
+            self.msg_connect((self.rx[i], 'out'), (self.taggers[i], 'in'))
+            self.msg_connect((self.taggers[i], 'out'), (self, 'out'))
+
+
+    def get_center_freq(self):
+        return self.center_freq
+
+    def get_samp_rate(self):
+        return self.samp_rate
+
+    def get_chan_spacing(self):
+        return self.chan_spacing
+
+    def get_channels(self):
+        return self.channels
+
+    def get_bw(self):
+        return self.bw
+
+    def get_sfs(self):
+        return self.sfs
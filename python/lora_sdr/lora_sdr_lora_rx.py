@@ -16,7 +16,7 @@ import signal
 from . import lora_sdr_python as lora_sdr
 
 class lora_sdr_lora_rx(gr.hier_block2):
-    def __init__(self, center_freq=868100000, bw=125000, cr=1, has_crc=True, impl_head=False, pay_len=255, samp_rate=250000, sf=7,sync_word=[0x12], soft_decoding=False, ldro_mode=2, print_rx=[True,True]):
+    def __init__(self, center_freq=868100000, bw=125000, cr=1, has_crc=True, impl_head=False, pay_len=255, samp_rate=250000, sf=7,sync_word=[0x12], soft_decoding=False, soft_format=0, ldro_mode=2, print_rx=[True,True], pdu=False, fused_decoder=False):
         gr.hier_block2.__init__(
             self, "lora_sdr_lora_rx",
                 gr.io_signature(1, 1, gr.sizeof_gr_complex*1),
@@ -36,38 +36,51 @@ class lora_sdr_lora_rx(gr.hier_block2):
         self.samp_rate = samp_rate
         self.sf = sf
         self.soft_decoding = soft_decoding
+        self.soft_format = soft_format
+        self.pdu = pdu
         self.print_header = print_rx[0]
         self.print_payload = print_rx[1]
         self.center_freq = center_freq
         self.sync_word = sync_word
+        self.fused_decoder = fused_decoder
 
 
         ##################################################
         # Blocks
         ##################################################
-        self.lora_sdr_header_decoder_0 = lora_sdr.header_decoder(impl_head, cr, pay_len, has_crc,ldro_mode ,self.print_header)
-        self.lora_sdr_hamming_dec_0 = lora_sdr.hamming_dec(soft_decoding)
-        self.lora_sdr_gray_mapping_0 = lora_sdr.gray_mapping(soft_decoding)
         self.lora_sdr_frame_sync_0 = lora_sdr.frame_sync(center_freq, bw, sf, impl_head, sync_word,int(samp_rate/bw),8)
-        self.lora_sdr_fft_demod_0 = lora_sdr.fft_demod( soft_decoding, True)
-        self.lora_sdr_dewhitening_0 = lora_sdr.dewhitening()
-        self.lora_sdr_deinterleaver_0 = lora_sdr.deinterleaver(soft_decoding)
-        self.lora_sdr_crc_verif_0 = lora_sdr.crc_verif( self.print_payload, False)
+        self.lora_sdr_fft_demod_0 = lora_sdr.fft_demod( soft_decoding, True, 0, 0, soft_format)
+        if fused_decoder:
+            # gray mapping to CRC verification in one block
+            self.lora_sdr_frame_decoder_0 = lora_sdr.frame_decoder(impl_head, cr, pay_len, has_crc, ldro_mode, self.print_header, self.print_payload, soft_decoding, soft_format, pdu)
+        else:
+            self.lora_sdr_header_decoder_0 = lora_sdr.header_decoder(impl_head, cr, pay_len, has_crc,ldro_mode ,self.print_header)
+            self.lora_sdr_hamming_dec_0 = lora_sdr.hamming_dec(soft_decoding, soft_format)
+            self.lora_sdr_gray_mapping_0 = lora_sdr.gray_mapping(soft_decoding, soft_format)
+            self.lora_sdr_dewhitening_0 = lora_sdr.dewhitening()
+            self.lora_sdr_deinterleaver_0 = lora_sdr.deinterleaver(soft_decoding, soft_format)
+            self.lora_sdr_crc_verif_0 = lora_sdr.crc_verif( self.print_payload, False, pdu)
 
 
         ##################################################
         # Connections
         ##################################################
-        self.msg_connect((self.lora_sdr_crc_verif_0, 'msg'), (self, 'out'))
-        self.msg_connect((self.lora_sdr_header_decoder_0, 'frame_info'), (self.lora_sdr_frame_sync_0, 'frame_info'))
-        self.connect((self.lora_sdr_crc_verif_0, 0), (self, 0))
-        self.connect((self.lora_sdr_deinterleaver_0, 0), (self.lora_sdr_hamming_dec_0, 0))
-        self.connect((self.lora_sdr_dewhitening_0, 0), (self.lora_sdr_crc_verif_0, 0))
-        self.connect((self.lora_sdr_fft_demod_0, 0), (self.lora_sdr_gray_mapping_0, 0))
+        if fused_decoder:
+            self.msg_connect((self.lora_sdr_frame_decoder_0, 'msg'), (self, 'out'))
+            self.msg_connect((self.lora_sdr_frame_decoder_0, 'frame_info'), (self.lora_sdr_frame_sync_0, 'frame_info'))
+            self.connect((self.lora_sdr_frame_decoder_0, 0), (self, 0))
+            self.connect((self.lora_sdr_fft_demod_0, 0), (self.lora_sdr_frame_decoder_0, 0))
+        else:
+            self.msg_connect((self.lora_sdr_crc_verif_0, 'msg'), (self, 'out'))
+            self.msg_connect((self.lora_sdr_header_decoder_0, 'frame_info'), (self.lora_sdr_frame_sync_0, 'frame_info'))
+            self.connect((self.lora_sdr_crc_verif_0, 0), (self, 0))
+            self.connect((self.lora_sdr_deinterleaver_0, 0), (self.lora_sdr_hamming_dec_0, 0))
+            self.connect((self.lora_sdr_dewhitening_0, 0), (self.lora_sdr_crc_verif_0, 0))
+            self.connect((self.lora_sdr_fft_demod_0, 0), (self.lora_sdr_gray_mapping_0, 0))
+            self.connect((self.lora_sdr_gray_mapping_0, 0), (self.lora_sdr_deinterleaver_0, 0))
+            self.connect((self.lora_sdr_hamming_dec_0, 0), (self.lora_sdr_header_decoder_0, 0))
+            self.connect((self.lora_sdr_header_decoder_0, 0), (self.lora_sdr_dewhitening_0, 0))
         self.connect((self.lora_sdr_frame_sync_0, 0), (self.lora_sdr_fft_demod_0, 0))
-        self.connect((self.lora_sdr_gray_mapping_0, 0), (self.lora_sdr_deinterleaver_0, 0))
-        self.connect((self.lora_sdr_hamming_dec_0, 0), (self.lora_sdr_header_decoder_0, 0))
-        self.connect((self.lora_sdr_header_decoder_0, 0), (self.lora_sdr_dewhitening_0, 0))
         self.connect((self, 0), (self.lora_sdr_frame_sync_0, 0))
 
 
@@ -119,3 +132,11 @@ class lora_sdr_lora_rx(gr.hier_block2):
     def set_soft_decoding(self, soft_decoding):
         self.soft_decoding = soft_decoding
 
+    def get_soft_format(self):
+        return self.soft_format
+
+    def get_pdu(self):
+        return self.pdu
+
+    def get_fused_decoder(self):
+        return self.fused_decoder
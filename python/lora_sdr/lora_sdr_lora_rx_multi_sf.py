@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# GNU Radio Python Flow Graph
+# Title: lora_sdr_lora_rx_multi_sf
+# GNU Radio version: 3.10.3.0
+
+from gnuradio import gr
+from . import lora_sdr_python as lora_sdr
+
+class lora_sdr_lora_rx_multi_sf(gr.hier_block2):
+    def __init__(self, center_freq=868100000, bw=125000, cr=1, has_crc=True, impl_head=False, pay_len=255, samp_rate=500000, sfs=[7,8,9,10,11,12], sync_word=[0x12], soft_decoding=False, soft_format=0, ldro_mode=2, print_rx=[True,True], pdu=False):
+        gr.hier_block2.__init__(
+            self, "lora_sdr_lora_rx_multi_sf",
+                gr.io_signature(1, 1, gr.sizeof_gr_complex*1),
+                gr.io_signature(0, 0, 0),
+        )
+        self.message_port_register_hier_out("out")
+
+
+        ##################################################
+        # Parameters
+        ##################################################
+        self.bw = bw
+        self.cr = cr
+        self.has_crc = has_crc
+        self.impl_head = impl_head
+        self.pay_len = pay_len
+        self.samp_rate = samp_rate
+        self.sfs = list(sfs)
+        self.soft_decoding = soft_decoding
+        self.soft_format = soft_format
+        self.pdu = pdu
+        self.print_header = print_rx[0]
+        self.print_payload = print_rx[1]
+        self.center_freq = center_freq
+        self.sync_word = sync_word
+
+
+        ##################################################
+        # Blocks
+        ##################################################
+        # preamble detection of all the spreading factors on the shared input
+        self.lora_sdr_multi_sf_detector_0 = lora_sdr.multi_sf_detector(bw, self.sfs, impl_head, int(samp_rate/bw), 8)
+        # one synchronization and decoding chain per spreading factor, only fed with the frames detected for it
+        self.chains = []
+        for sf in self.sfs:
+            chain = {}
+            chain['frame_sync'] = lora_sdr.frame_sync(center_freq, bw, sf, impl_head, sync_word, int(samp_rate/bw), 8)
+            chain['fft_demod'] = lora_sdr.fft_demod(soft_decoding, True, 0, 0, soft_format)
+            chain['gray_mapping'] = lora_sdr.gray_mapping(soft_decoding, soft_format)
+            chain['deinterleaver'] = lora_sdr.deinterleaver(soft_decoding, soft_format)
+            chain['hamming_dec'] = lora_sdr.hamming_dec(soft_decoding, soft_format)
+            chain['header_decoder'] = lora_sdr.header_decoder(impl_head, cr, pay_len, has_crc, ldro_mode, self.print_header)
+            chain['dewhitening'] = lora_sdr.dewhitening()
+            chain['crc_verif'] = lora_sdr.crc_verif(self.print_payload, False, pdu)
+            self.chains.append(chain)
+
+
+        ##################################################
+        # Connections
+        ##################################################
+        self.connect((self, 0), (self.lora_sdr_multi_sf_detector_0, 0))
+        for i, chain in enumerate(self.chains):
+            self.connect((self.lora_sdr_multi_sf_detector_0, i), (chain['frame_sync'], 0))
+            self.connect(chain['frame_sync'], chain['fft_demod'], chain['gray_mapping'], chain['deinterleaver'],
+                         chain['hamming_dec'], chain['header_decoder'], chain['dewhitening'], chain['crc_verif'])
+            self.msg_connect((chain['header_decoder'], 'frame_info'), (chain['frame_sync'], 'frame_info'))
+            self.msg_connect((chain['header_decoder'], 'frame_info'), (self.lora_sdr_multi_sf_detector_0, 'frame_info{}'.format(i)))
+            self.msg_connect((chain['crc_verif'], 'msg'), (self, 'out'))
+
+
+    def get_bw(self):
+        return self.bw
+
+    def get_cr(self):
+        return self.cr
+
+    def get_has_crc(self):
+        return self.has_crc
+
+    def get_impl_head(self):
+        return self.impl_head
+
+    def get_pay_len(self):
+        return self.pay_len
+
+    def get_samp_rate(self):
+        return self.samp_rate
+
+    def get_sfs(self):
+        return self.sfs
+
+    def get_soft_decoding(self):
+        return self.soft_decoding
+
+    def get_soft_format(self):
+        return self.soft_format
+
+    def get_pdu(self):
+        return self.pdu
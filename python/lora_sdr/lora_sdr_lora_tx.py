@@ -16,7 +16,7 @@ import signal
 from . import lora_sdr_python as lora_sdr
 
 class lora_sdr_lora_tx(gr.hier_block2):
-    def __init__(self, bw=125000, cr=1, has_crc=True, impl_head=False, samp_rate=250000, sf=7, ldro_mode=2, frame_zero_padd=2**7, ):
+    def __init__(self, bw=125000, cr=1, has_crc=True, impl_head=False, samp_rate=250000, sf=7, ldro_mode=2, frame_zero_padd=2**7, fused_encoder=False):
         gr.hier_block2.__init__(
             self, "lora_sdr_lora_tx",
                 gr.io_signature(0, 0, 0),
@@ -34,30 +34,39 @@ class lora_sdr_lora_tx(gr.hier_block2):
         self.samp_rate = samp_rate
         self.sf = sf
         self.frame_zero_padd = frame_zero_padd
+        self.fused_encoder = fused_encoder
 
         ##################################################
         # Blocks
         ##################################################
-        self.lora_sdr_whitening_0 = lora_sdr.whitening(False,False,',','packet_len')
         self.lora_sdr_modulate_0 = lora_sdr.modulate(sf, samp_rate, bw, [8,16],frame_zero_padd,8)
-        self.lora_sdr_interleaver_0 = lora_sdr.interleaver(cr, sf, ldro_mode, bw)
-        self.lora_sdr_header_0 = lora_sdr.header(impl_head, has_crc, cr)
-        self.lora_sdr_hamming_enc_0 = lora_sdr.hamming_enc(cr, sf)
-        self.lora_sdr_gray_demap_0 = lora_sdr.gray_demap(sf)
-        self.lora_sdr_add_crc_0 = lora_sdr.add_crc(has_crc)
+        if fused_encoder:
+            # whitening to gray demapping in one block
+            self.lora_sdr_frame_encoder_0 = lora_sdr.frame_encoder(sf, cr, has_crc, impl_head, ldro_mode, bw)
+        else:
+            self.lora_sdr_whitening_0 = lora_sdr.whitening(False,False,',','packet_len')
+            self.lora_sdr_interleaver_0 = lora_sdr.interleaver(cr, sf, ldro_mode, bw)
+            self.lora_sdr_header_0 = lora_sdr.header(impl_head, has_crc, cr)
+            self.lora_sdr_hamming_enc_0 = lora_sdr.hamming_enc(cr, sf)
+            self.lora_sdr_gray_demap_0 = lora_sdr.gray_demap(sf)
+            self.lora_sdr_add_crc_0 = lora_sdr.add_crc(has_crc)
 
 
         ##################################################
         # Connections
         ##################################################
-        self.msg_connect((self, 'in'), (self.lora_sdr_whitening_0, 'msg'))
-        self.connect((self.lora_sdr_add_crc_0, 0), (self.lora_sdr_hamming_enc_0, 0))
-        self.connect((self.lora_sdr_gray_demap_0, 0), (self.lora_sdr_modulate_0, 0))
-        self.connect((self.lora_sdr_hamming_enc_0, 0), (self.lora_sdr_interleaver_0, 0))
-        self.connect((self.lora_sdr_header_0, 0), (self.lora_sdr_add_crc_0, 0))
-        self.connect((self.lora_sdr_interleaver_0, 0), (self.lora_sdr_gray_demap_0, 0))
+        if fused_encoder:
+            self.msg_connect((self, 'in'), (self.lora_sdr_frame_encoder_0, 'msg'))
+            self.connect((self.lora_sdr_frame_encoder_0, 0), (self.lora_sdr_modulate_0, 0))
+        else:
+            self.msg_connect((self, 'in'), (self.lora_sdr_whitening_0, 'msg'))
+            self.connect((self.lora_sdr_add_crc_0, 0), (self.lora_sdr_hamming_enc_0, 0))
+            self.connect((self.lora_sdr_gray_demap_0, 0), (self.lora_sdr_modulate_0, 0))
+            self.connect((self.lora_sdr_hamming_enc_0, 0), (self.lora_sdr_interleaver_0, 0))
+            self.connect((self.lora_sdr_header_0, 0), (self.lora_sdr_add_crc_0, 0))
+            self.connect((self.lora_sdr_interleaver_0, 0), (self.lora_sdr_gray_demap_0, 0))
+            self.connect((self.lora_sdr_whitening_0, 0), (self.lora_sdr_header_0, 0))
         self.connect((self.lora_sdr_modulate_0, 0), (self, 0))
-        self.connect((self.lora_sdr_whitening_0, 0), (self.lora_sdr_header_0, 0))
 
 
     def get_bw(self):
@@ -71,9 +80,12 @@ class lora_sdr_lora_tx(gr.hier_block2):
 
     def set_cr(self, cr):
         self.cr = cr
-        self.lora_sdr_hamming_enc_0.set_cr(self.cr)
-        self.lora_sdr_header_0.set_cr(self.cr)
-        self.lora_sdr_interleaver_0.set_cr(self.cr)
+        if self.fused_encoder:
+            self.lora_sdr_frame_encoder_0.set_cr(self.cr)
+        else:
+            self.lora_sdr_hamming_enc_0.set_cr(self.cr)
+            self.lora_sdr_header_0.set_cr(self.cr)
+            self.lora_sdr_interleaver_0.set_cr(self.cr)
 
     def get_has_crc(self):
         return self.has_crc
@@ -98,8 +110,11 @@ class lora_sdr_lora_tx(gr.hier_block2):
 
     def set_sf(self, sf):
         self.sf = sf
-        self.lora_sdr_gray_demap_0.set_sf(self.sf)
-        self.lora_sdr_hamming_enc_0.set_sf(self.sf)
-        self.lora_sdr_interleaver_0.set_sf(self.sf)
+        if self.fused_encoder:
+            self.lora_sdr_frame_encoder_0.set_sf(self.sf)
+        else:
+            self.lora_sdr_gray_demap_0.set_sf(self.sf)
+            self.lora_sdr_hamming_enc_0.set_sf(self.sf)
+            self.lora_sdr_interleaver_0.set_sf(self.sf)
         self.lora_sdr_modulate_0.set_sf(self.sf)
 
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# Offline decoding of complex64 IQ recordings (.cfile), split in overlapping chunks decoded in parallel
+
+import argparse
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pmt
+from gnuradio import gr
+from gnuradio import blocks
+from . import lora_sdr_python as lora_sdr
+
+LDRO_MAX_DURATION_MS = 16 # same rule as the blocks in ldro_mode 2 (auto)
+
+
+def max_frame_symbols(sf, bw, impl_head=False, cr=1, has_crc=True, max_pay_len=255, ldro_mode=2):
+    """
+    Number of symbols of the longest frame after the preamble (header and payload). With an explicit header,
+    the coding rate and the CRC presence are only known from the header, the worst case is used.
+    """
+    if ldro_mode == 2:
+        ldro = (1 << sf) * 1e3 / bw > LDRO_MAX_DURATION_MS
+    else:
+        ldro = bool(ldro_mode)
+    if not impl_head:
+        cr = 4
+        has_crc = True
+    return 8 + math.ceil((2 * max_pay_len - sf + 2 + (0 if impl_head else 5) + (4 if has_crc else 0)) / (sf - 2 * ldro)) * (4 + cr)
+
+
+def plan_chunks(n_samples, chunk_len, lead, tail):
+    """
+    Split [0, n_samples) in chunks owning chunk_len samples each. A chunk reads from lead samples before to tail
+    samples after the samples it owns, so that the frames whose header starts in it are entirely received.
+    Returns a list of (owned_start, owned_end, read_start, read_len).
+    """
+    chunks = []
+    for start in range(0, n_samples, chunk_len):
+        end = min(start + chunk_len, n_samples)
+        read_start = max(start - lead, 0)
+        read_end = min(end + tail, n_samples)
+        chunks.append((start, end, read_start, read_end - read_start))
+    return chunks
+
+
+def decode_chunk(path, read_start, read_len, params):
+    """
+    Decode the samples [read_start, read_start + read_len) of a recording with frame_sync, fft_demod and
+    frame_decoder. Returns the received frames, with their sample_offset in the whole recording.
+    """
+    tb = gr.top_block()
+    source = blocks.file_source(gr.sizeof_gr_complex, path, False, read_start, read_len)
+    frame_sync = lora_sdr.frame_sync(int(params["center_freq"]), int(params["bw"]), params["sf"], params["impl_head"], params["sync_word"],
+                                     int(params["samp_rate"] / params["bw"]), params["preamb_len"])
+    fft_demod = lora_sdr.fft_demod(params["soft_decoding"], True, 0, 0, params["soft_format"])
+    frame_decoder = lora_sdr.frame_decoder(params["impl_head"], params["cr"], params["pay_len"], params["has_crc"], params["ldro_mode"],
+                                           False, False, params["soft_decoding"], params["soft_format"], True)
+    msg_debug = blocks.message_debug()
+    tb.connect(source, frame_sync, fft_demod, frame_decoder)
+    tb.msg_connect((frame_decoder, 'frame_info'), (frame_sync, 'frame_info'))
+    tb.msg_connect((frame_decoder, 'msg'), (msg_debug, 'store'))
+    tb.run()
+
+    frames = []
+    for i in range(msg_debug.num_messages()):
+        pdu = msg_debug.get_message(i)
+        meta = pmt.car(pdu)
+        offset = pmt.dict_ref(meta, pmt.intern("sample_offset"), pmt.PMT_NIL)
+        if pmt.is_null(offset):
+            continue
+        has_crc = bool(pmt.to_long(pmt.dict_ref(meta, pmt.intern("crc"), pmt.from_long(0))))
+        sample_offset = read_start + pmt.to_uint64(offset)
+        frames.append({
+            "sample_offset": sample_offset,
+            "time": sample_offset / params["samp_rate"],
+            "sf": params["sf"],
+            "cr": pmt.to_long(pmt.dict_ref(meta, pmt.intern("cr"), pmt.from_long(0))),
+            "pay_len": pmt.to_long(pmt.dict_ref(meta, pmt.intern("pay_len"), pmt.from_long(0))),
+            "has_crc": has_crc,
+            # without CRC, the payload can not be checked
+            "crc_valid": pmt.to_bool(pmt.dict_ref(meta, pmt.intern("crc_valid"), pmt.PMT_F)) if has_crc else None,
+            "payload": bytes(pmt.u8vector_elements(pmt.cdr(pdu))),
+        })
+    return frames
+
+
+def merge_frames(frames, min_distance):
+    """
+    Sort the frames by sample offset and keep one of the frames received less than min_distance samples apart
+    (the same frame decoded by two chunks), preferring a valid CRC.
+    """
+    merged = []
+    for frame in sorted(frames, key=lambda f: f["sample_offset"]):
+        if merged and frame["sample_offset"] - merged[-1]["sample_offset"] < min_distance:
+            if frame["crc_valid"] and not merged[-1]["crc_valid"]:
+                merged[-1] = frame
+            continue
+        merged.append(frame)
+    return merged
+
+
+def decode_recording(path, samp_rate, bw, sf, center_freq=868100000, impl_head=False, cr=1, pay_len=255, has_crc=True, sync_word=[0x12],
+                     soft_decoding=False, soft_format=0, ldro_mode=2, preamb_len=8, max_pay_len=255, chunk_len=1 << 24, n_workers=None, progress=None):
+    """
+    Decode the frames of a complex64 IQ recording.
+
+    The recording is split in chunks of chunk_len samples, each read with the preamble of the frames starting in it
+    and up to the end of the longest frame of max_pay_len bytes. The chunks are decoded in a pool of n_workers processes
+    (all the cores by default), and their frames merged by sample offset. progress(done, total) is called after
+    each decoded chunk.
+
+    Returns the list of the received frames, as dictionaries with the keys sample_offset (input sample where the
+    header starts), time (in seconds), sf, cr, pay_len, has_crc, crc_valid (None without CRC) and payload (bytes).
+    """
+    if chunk_len <= 0:
+        raise ValueError("The chunk length should be positive")
+    if samp_rate % bw:
+        raise ValueError("The sampling rate should be a multiple of the bandwidth")
+    n_samples = os.path.getsize(path) // np.dtype(np.complex64).itemsize
+    if n_samples == 0:
+        return []
+
+    samples_per_symbol = (1 << sf) * int(samp_rate // bw)
+    # preamble, network identifiers and downchirps before the header, and the longest frame after it
+    lead = int(math.ceil(preamb_len + 4.25 + 2)) * samples_per_symbol
+    tail = (max_frame_symbols(sf, bw, impl_head, cr, has_crc, max_pay_len, ldro_mode) + 2) * samples_per_symbol
+    params = dict(samp_rate=samp_rate, bw=bw, sf=sf, center_freq=center_freq, impl_head=impl_head, cr=cr, pay_len=pay_len, has_crc=has_crc,
+                  sync_word=list(sync_word), soft_decoding=soft_decoding, soft_format=soft_format, ldro_mode=ldro_mode, preamb_len=preamb_len)
+    chunks = plan_chunks(n_samples, chunk_len, lead, tail)
+
+    frames = []
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {executor.submit(decode_chunk, path, read_start, read_len, params): (start, end)
+                   for start, end, read_start, read_len in chunks}
+        for done, future in enumerate(as_completed(futures), 1):
+            start, end = futures[future]
+            # the offset estimates of a frame at a chunk border can differ by a few samples between the two chunks,
+            # both keep it and the merge removes the copy
+            frames += [f for f in future.result() if start - samples_per_symbol <= f["sample_offset"] < end + samples_per_symbol]
+            if progress:
+                progress(done, len(chunks))
+    return merge_frames(frames, samples_per_symbol)
+
+
+def parse_sync_word(value):
+    return [int(v, 0) for v in value.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decode the LoRa frames of a complex64 IQ recording (.cfile) on all the cores")
+    parser.add_argument("recording", help="complex64 IQ file")
+    parser.add_argument("--samp-rate", type=int, required=True, help="sampling rate of the recording [Hz]")
+    parser.add_argument("--bw", type=int, default=125000, help="LoRa bandwidth [Hz] (default: %(default)s)")
+    parser.add_argument("--sf", type=int, required=True, help="spreading factor")
+    parser.add_argument("--center-freq", type=int, default=868100000, help="RF center frequency [Hz] (default: %(default)s)")
+    parser.add_argument("--impl-head", action="store_true", help="implicit header mode")
+    parser.add_argument("--cr", type=int, default=1, help="coding rate of the implicit header mode (default: %(default)s)")
+    parser.add_argument("--pay-len", type=int, default=255, help="payload length of the implicit header mode (default: %(default)s)")
+    parser.add_argument("--no-crc", action="store_true", help="no payload CRC in implicit header mode")
+    parser.add_argument("--sync-word", type=parse_sync_word, default=[0x12], help="sync word, or comma separated network identifiers (default: 0x12)")
+    parser.add_argument("--soft-decoding", action="store_true", help="soft-decision decoding")
+    parser.add_argument("--soft-format", type=int, default=0, choices=[0, 1, 2], help="soft values format: 0 double, 1 float, 2 int8 (default: %(default)s)")
+    parser.add_argument("--ldro", type=int, default=2, choices=[0, 1, 2], help="low datarate optimisation: 0 off, 1 on, 2 auto (default: %(default)s)")
+    parser.add_argument("--preamb-len", type=int, default=8, help="number of preamble upchirps (default: %(default)s)")
+    parser.add_argument("--max-pay-len", type=int, default=255, help="longest payload expected, sets the chunk overlap (default: %(default)s)")
+    parser.add_argument("--chunk-len", type=int, default=1 << 24, help="samples per chunk (default: %(default)s)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes (default: number of cores)")
+    parser.add_argument("--format", choices=["jsonl", "text"], default="jsonl", help="output format (default: %(default)s)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: standard output)")
+    args = parser.parse_args(argv)
+
+    def progress(done, total):
+        print("\r{}/{} chunks decoded".format(done, total), end="\n" if done == total else "", file=sys.stderr, flush=True)
+
+    frames = decode_recording(args.recording, args.samp_rate, args.bw, args.sf, center_freq=args.center_freq, impl_head=args.impl_head, cr=args.cr,
+                              pay_len=args.pay_len, has_crc=not args.no_crc, sync_word=args.sync_word, soft_decoding=args.soft_decoding,
+                              soft_format=args.soft_format, ldro_mode=args.ldro, preamb_len=args.preamb_len, max_pay_len=args.max_pay_len,
+                              chunk_len=args.chunk_len, n_workers=args.workers, progress=progress)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for frame in frames:
+            if args.format == "jsonl":
+                out.write(json.dumps(dict(frame, payload=frame["payload"].hex())) + "\n")
+            else:
+                crc = "" if frame["crc_valid"] is None else (" CRC valid" if frame["crc_valid"] else " CRC invalid")
+                out.write("{:.6f} s (sample {}): {} bytes, CR 4/{}{}: {}\n".format(frame["time"], frame["sample_offset"], frame["pay_len"], frame["cr"] + 4,
+                                                                                   crc, frame["payload"].decode("ascii", errors="replace")))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print("{} frames decoded".format(len(frames)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
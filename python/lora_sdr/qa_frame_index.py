@@ -0,0 +1,105 @@
+##############################################################################
+# File: qa_frame_index.py
+#
+# Description: This is a test code for the two-pass processing of IQ
+#              recordings: a preamble scan writing an index of the frames,
+#              then the decoding of selected frames of the index
+#
+# Function: test_001_scan
+#   Description: write the frames of ref_tx_sf7_cr2.bin and ref_tx_sf9_cr2.bin
+#                in qa_ref/qa_ref_tx to a recording, separated by silences and
+#                with a CFO, scan it with chunks shorter than a frame, and
+#                check the position, spreading factor and CFO of the index
+#                entries, and that the index is read back from its file
+#
+# Function: test_002_selective_decode
+#   Description: decode the SF9 frames of the index only, and compare them to
+#                the reference file example_tx_source.txt in data/GRC_default
+#                folder
+##############################################################################
+
+
+from gnuradio import gr, gr_unittest
+import numpy as np
+import os
+import sys
+import tempfile
+
+try:
+    import gnuradio.lora_sdr as lora_sdr
+
+except ImportError:
+    import os
+    import sys
+    dirname, filename = os.path.split(os.path.abspath(__file__))
+    sys.path.append(os.path.join(dirname, "bindings"))
+
+from gnuradio.lora_sdr.frame_index import scan_recording, save_index, load_index, decode_indexed
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+class qa_frame_index(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.samp_rate = 500000
+        self.bw = 125000
+        self.os_factor = self.samp_rate // self.bw
+        fd, self.recording = tempfile.mkstemp(suffix=".cfile")
+        os.close(fd)
+        fd, self.index_file = tempfile.mkstemp(suffix=".npz")
+        os.close(fd)
+
+        # frames of both spreading factors separated by silences, some of them with a CFO (in bins)
+        frames = [(3000, 7, 0), (17000, 9, 0), (40000, 7, 3.3), (9000, 9, -2.6), (12345, 7, 0.4)]
+        recording = []
+        self.frames = []
+        pos = 0
+        for gap, sf, cfo in frames:
+            samples = np.fromfile(os.path.join(script_dir, "qa_ref/qa_ref_tx/ref_tx_sf{}_cr2.bin".format(sf)), dtype=np.complex64)
+            n = np.arange(len(samples))
+            recording += [np.zeros(gap, dtype=np.complex64), (samples * np.exp(2j * np.pi * cfo * n / (1 << sf) / self.os_factor)).astype(np.complex64)]
+            self.frames.append((pos + gap, sf, cfo))
+            pos += gap + len(samples)
+        np.concatenate(recording).tofile(self.recording)
+
+    def tearDown(self):
+        os.remove(self.recording)
+        os.remove(self.index_file)
+
+    def test_001_scan(self):
+        index = scan_recording(self.recording, self.samp_rate, self.bw, [7, 8, 9], chunk_len=30000, n_workers=2)
+
+        self.assertEqual(len(index), len(self.frames))
+        for entry, (start, sf, cfo) in zip(index, self.frames):
+            self.assertEqual(entry["sf"], sf)
+            # within a sample of the decimated signal
+            self.assertLessEqual(abs(int(entry["sample_offset"]) - start), self.os_factor)
+            self.assertAlmostEqual(entry["cfo"], cfo, delta=0.05)
+
+        save_index(self.index_file, index, self.samp_rate, self.bw)
+        loaded, params = load_index(self.index_file)
+        self.assertEqual(params["samp_rate"], self.samp_rate)
+        self.assertEqual(params["bw"], self.bw)
+        self.assertEqual(loaded.tolist(), index.tolist())
+
+    def test_002_selective_decode(self):
+
+        # Load ref files
+        ref_path = os.path.join(script_dir, "../../data/GRC_default/example_tx_source.txt")
+        with open(ref_path, "rb") as f3:
+            binary_data = f3.read()
+        ref_data = binary_data[:-1]
+
+        index = scan_recording(self.recording, self.samp_rate, self.bw, [7, 9], n_workers=2)
+        selection = index[index["sf"] == 9]
+        frames = decode_indexed(self.recording, selection, self.samp_rate, self.bw, max_pay_len=len(ref_data), n_workers=2)
+
+        self.assertEqual([frame["entry"] for frame in frames], list(range(len(selection))))
+        for frame in frames:
+            self.assertEqual(frame["sf"], 9)
+            self.assertEqual(frame["payload"], ref_data)
+            self.assertTrue(frame["crc_valid"])
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_frame_index)
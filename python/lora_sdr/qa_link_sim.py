@@ -0,0 +1,102 @@
+##############################################################################
+# File: qa_link_sim.py
+#
+# Description: This is a test code for the vectorized NumPy link-level
+#              simulator
+#
+# Function: test_001_encode
+#   Description: encode the payload of example_tx_source.txt in
+#                data/GRC_default folder and compare the symbols to the
+#                reference files in qa_ref/qa_ref_tx_no_mod
+#
+# Function: test_002_modulate
+#   Description: modulate the encoded symbols and compare the samples to the
+#                reference files in qa_ref/qa_ref_tx
+#
+# Function: test_003_decode_ref
+#   Description: synchronize and decode the reference files in
+#                qa_ref/qa_ref_tx with hard and soft decoding, and compare
+#                the payloads to the reference file
+#
+# Function: test_004_channel
+#   Description: simulate random frames with CFO, STO and clock offset at a
+#                high SNR, where all of them must be received, and at a very
+#                low SNR, where none of them may be
+##############################################################################
+
+
+from gnuradio import gr, gr_unittest
+import numpy as np
+import os
+import sys
+
+try:
+    import gnuradio.lora_sdr as lora_sdr
+
+except ImportError:
+    import os
+    import sys
+    dirname, filename = os.path.split(os.path.abspath(__file__))
+    sys.path.append(os.path.join(dirname, "bindings"))
+
+from gnuradio.lora_sdr.link_sim import encode_frames, modulate, synchronize, decode_frames, frame_symbols, simulate
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+class qa_link_sim(gr_unittest.TestCase):
+
+    def setUp(self):
+        # Load ref files
+        ref_path = os.path.join(script_dir, "../../data/GRC_default/example_tx_source.txt")
+        with open(ref_path, "rb") as f3:
+            binary_data = f3.read()
+        self.ref_data = np.frombuffer(binary_data[:-1], dtype=np.uint8)
+        self.os_factor = 4
+
+    def test_001_encode(self):
+        for sf in range(7, 13):
+            for cr in range(2, 5):
+                ref = np.fromfile(os.path.join(script_dir, "qa_ref/qa_ref_tx_no_mod/ref_tx_sf{}_cr{}.bin".format(sf, cr)), dtype=np.int32)
+                symbols = encode_frames(self.ref_data, sf, cr)
+                self.assertEqual(symbols[0].tolist(), ref.tolist())
+
+    def test_002_modulate(self):
+        for sf in range(7, 11):
+            for cr in range(2, 5):
+                ref = np.fromfile(os.path.join(script_dir, "qa_ref/qa_ref_tx/ref_tx_sf{}_cr{}.bin".format(sf, cr)), dtype=np.complex64)
+                samples = modulate(encode_frames(self.ref_data, sf, cr), sf, self.os_factor, zero_padd=20 * (1 << sf) * self.os_factor)
+                self.assertEqual(samples.shape, (1, len(ref)))
+                # the reference chirps are computed in single precision
+                self.assertLess(np.max(np.abs(samples[0] - ref)), 1e-3)
+
+    def test_003_decode_ref(self):
+        for sf in range(7, 11):
+            for cr in range(2, 5):
+                ref = np.fromfile(os.path.join(script_dir, "qa_ref/qa_ref_tx/ref_tx_sf{}_cr{}.bin".format(sf, cr)), dtype=np.complex64)
+                sync = synchronize(ref[None], sf, frame_symbols(len(self.ref_data), sf, cr), self.os_factor, center_freq=868.1e6)
+                self.assertTrue(sync["detected"][0])
+                for soft_decoding in (False, True):
+                    frames = decode_frames(sync["spectra"], sf, cr, len(self.ref_data), soft_decoding=soft_decoding)
+                    self.assertTrue(frames["header_valid"][0])
+                    self.assertTrue(frames["crc_valid"][0])
+                    self.assertEqual(frames["payloads"][0].tobytes(), self.ref_data.tobytes())
+
+    def test_004_channel(self):
+        rng = np.random.default_rng(1)
+        payloads = rng.integers(0, 256, (50, 16), dtype=np.uint8)
+        for sf, ldro in ((7, False), (9, True)):
+            for soft_decoding in (False, True):
+                # integer and quarter sample timing offsets, the decimation phase being searched
+                frames = simulate(payloads, sf, 2, 5, self.os_factor, ldro=ldro, soft_decoding=soft_decoding, cfo=rng.uniform(-10, 10, len(payloads)),
+                                  sto=rng.integers(0, 8 * self.os_factor, len(payloads)) + 0.25, clk_offset_ppm=10, rng=2)
+                self.assertTrue(frames["detected"].all())
+                self.assertTrue(frames["crc_valid"].all())
+                self.assertEqual(frames["payloads"].tolist(), payloads.tolist())
+                self.assertEqual(frames["bit_errors"].sum(), 0)
+
+                frames = simulate(payloads, sf, 2, -60, self.os_factor, ldro=ldro, soft_decoding=soft_decoding, rng=3)
+                self.assertFalse(frames["crc_valid"].any())
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_link_sim)
@@ -0,0 +1,120 @@
+##############################################################################
+# File: qa_multi_rx.py
+#
+# Description: This is a test code for the wideband multi-channel receiver.
+#              It consists of a polyphase channelizer followed by a multi-SF
+#              receiver per channel
+#
+# Function: test_001_two_channels
+#   Description: upsample ref_tx_sf7_cr2.bin and ref_tx_sf9_cr2.bin in
+#                qa_ref/qa_ref_tx to the wideband sampling rate, shift them
+#                to two channels of the band and add them. Check that the
+#                frame of each channel is decoded, tagged with its channel,
+#                and equal to the reference file example_tx_source.txt in
+#                data/GRC_default folder
+#
+# Function: test_002_channel_grid
+#   Description: check that the channels off the grid or above the band are
+#                rejected, the edge channel of the band being only accepted
+#                below the center frequency
+##############################################################################
+
+
+from gnuradio import gr, gr_unittest
+from gnuradio import blocks
+import pmt
+import numpy as np
+import os
+import sys
+
+try:
+    import gnuradio.lora_sdr as lora_sdr
+
+except ImportError:
+    import os
+    import sys
+    dirname, filename = os.path.split(os.path.abspath(__file__))
+    sys.path.append(os.path.join(dirname, "bindings"))
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+class qa_multi_rx(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.tb = gr.top_block()
+
+    def tearDown(self):
+        self.tb = None
+
+    def test_001_two_channels(self):
+
+        cr = 2
+        bw = 125000
+        ref_samp_rate = 500000
+        samp_rate = 2000000
+        center_freq = 868000000
+        chan_spacing = 250000
+        channels = [868250000, 867500000]
+        sfs = [7, 9]
+
+        # bring each reference frame to the wideband sampling rate, on its channel
+        interp = samp_rate // ref_samp_rate
+        wideband = []
+        for sf, freq in zip(sfs, channels):
+            x = np.fromfile(os.path.join(script_dir, "qa_ref/qa_ref_tx/ref_tx_sf{}_cr{}.bin".format(sf, cr)), dtype=np.complex64)
+            n = len(x)
+            spectrum = np.fft.fft(x)
+            spectrum = np.concatenate([spectrum[:n//2], np.zeros((interp-1)*n), spectrum[n//2:]])
+            y = np.fft.ifft(spectrum) * interp
+            wideband.append(y * np.exp(2j*np.pi*(freq-center_freq)/samp_rate*np.arange(len(y))))
+        samples = np.zeros(max(len(y) for y in wideband), dtype=np.complex64)
+        for y in wideband:
+            samples[:len(y)] += y.astype(np.complex64)
+
+        # Load ref files
+        ref_path = os.path.join(script_dir, "../../data/GRC_default/example_tx_source.txt")
+        with open(ref_path, "rb") as f3:
+            binary_data = f3.read()
+        ref_data = [binary_data[i] for i in range(0, len(binary_data)-1)]
+
+        # initialize the blocks
+        vector_source = blocks.vector_source_c(samples.tolist(), False)
+        multi_rx = lora_sdr.lora_sdr_lora_multi_rx(center_freq=center_freq, samp_rate=samp_rate, chan_spacing=chan_spacing, channels=channels, bw=bw,
+                                                   sfs=sfs, print_rx=[False, False])
+        msg_debug = blocks.message_debug()
+
+        # connect the blocks
+        self.tb.connect(vector_source, multi_rx)
+        self.tb.msg_connect((multi_rx, 'out'), (msg_debug, 'store'))
+        self.tb.run()
+
+        self.assertEqual(msg_debug.num_messages(), len(channels))
+        received = set()
+        for i in range(msg_debug.num_messages()):
+            pdu = msg_debug.get_message(i)
+            meta = pmt.car(pdu)
+            channel = pmt.to_long(pmt.dict_ref(meta, pmt.intern("channel"), pmt.PMT_NIL))
+            self.assertEqual(pmt.to_double(pmt.dict_ref(meta, pmt.intern("center_freq"), pmt.PMT_NIL)), channels[channel])
+            self.assertTrue(pmt.to_bool(pmt.dict_ref(meta, pmt.intern("crc_valid"), pmt.PMT_F)))
+            self.assertEqual(list(pmt.u8vector_elements(pmt.cdr(pdu))), ref_data)
+            received.add(channel)
+        self.assertEqual(received, set(range(len(channels))))
+
+    def test_002_channel_grid(self):
+
+        center_freq = 868000000
+        samp_rate = 2000000
+        chan_spacing = 250000
+
+        # +samp_rate/2 and -samp_rate/2 are the same output of the channelizer
+        multi_rx = lora_sdr.lora_sdr_lora_multi_rx(center_freq=center_freq, samp_rate=samp_rate, chan_spacing=chan_spacing, channels=[center_freq - samp_rate // 2],
+                                                   sfs=[7], print_rx=[False, False])
+        self.assertEqual(multi_rx.channel_map, [4])
+        for freq in (center_freq + samp_rate // 2, center_freq + chan_spacing // 2, center_freq - samp_rate // 2 - chan_spacing):
+            with self.assertRaises(ValueError):
+                lora_sdr.lora_sdr_lora_multi_rx(center_freq=center_freq, samp_rate=samp_rate, chan_spacing=chan_spacing, channels=[freq],
+                                                sfs=[7], print_rx=[False, False])
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_multi_rx)
@@ -0,0 +1,77 @@
+##############################################################################
+# File: qa_multi_sf_rx.py
+#
+# Description: This is a test code for the multi-SF receiver. It consists of
+#              multi_sf_detector followed by one receiver chain per
+#              spreading factor
+#
+# Function: test_001_two_sfs
+#   Description: input the frames of ref_tx_sf7_cr2.bin and ref_tx_sf9_cr2.bin
+#                in qa_ref/qa_ref_tx one after the other in a single stream,
+#                and check that both are decoded and equal to the reference
+#                file example_tx_source.txt in data/GRC_default folder
+##############################################################################
+
+
+from gnuradio import gr, gr_unittest
+from gnuradio import blocks
+import pmt
+import numpy as np
+import os
+import sys
+
+try:
+    import gnuradio.lora_sdr as lora_sdr
+
+except ImportError:
+    import os
+    import sys
+    dirname, filename = os.path.split(os.path.abspath(__file__))
+    sys.path.append(os.path.join(dirname, "bindings"))
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+class qa_multi_sf_rx(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.tb = gr.top_block()
+
+    def tearDown(self):
+        self.tb = None
+
+    def test_001_two_sfs(self):
+
+        sfs = [7, 9]
+        cr = 2
+        samp_rate = 500000
+        bw = 125000
+
+        # frames of both spreading factors on the same stream
+        samples = np.concatenate([np.fromfile(os.path.join(script_dir, "qa_ref/qa_ref_tx/ref_tx_sf{}_cr{}.bin".format(sf, cr)), dtype=np.complex64) for sf in sfs])
+
+        # Load ref files
+        ref_path = os.path.join(script_dir, "../../data/GRC_default/example_tx_source.txt")
+        with open(ref_path, "rb") as f3:
+            binary_data = f3.read()
+        ref_data = [binary_data[i] for i in range(0, len(binary_data)-1)]
+
+        # initialize the blocks
+        vector_source = blocks.vector_source_c(samples.tolist(), False)
+        lora_rx = lora_sdr.lora_sdr_lora_rx_multi_sf(bw=bw, cr=1, has_crc=True, impl_head=False, pay_len=255, samp_rate=samp_rate, sfs=sfs,
+                                                     soft_decoding=False, ldro_mode=2, print_rx=[False, False], pdu=True)
+        msg_debug = blocks.message_debug()
+
+        # connect the blocks
+        self.tb.connect(vector_source, lora_rx)
+        self.tb.msg_connect((lora_rx, 'out'), (msg_debug, 'store'))
+        self.tb.run()
+
+        self.assertEqual(msg_debug.num_messages(), len(sfs))
+        for i in range(msg_debug.num_messages()):
+            pdu = msg_debug.get_message(i)
+            self.assertTrue(pmt.to_bool(pmt.dict_ref(pmt.car(pdu), pmt.intern("crc_valid"), pmt.PMT_F)))
+            self.assertEqual(list(pmt.u8vector_elements(pmt.cdr(pdu))), ref_data)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_multi_sf_rx)
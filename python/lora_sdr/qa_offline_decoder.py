@@ -0,0 +1,93 @@
+##############################################################################
+# File: qa_offline_decoder.py
+#
+# Description: This is a test code for the offline decoder of IQ recordings.
+#              It decodes a recording split in overlapping chunks in a
+#              process pool and merges the frames received by the chunks
+#
+# Function: test_001_chunked_recording
+#   Description: write the frame of ref_tx_sf7_cr2.bin in qa_ref/qa_ref_tx
+#                several times, separated by silences, to a recording
+#                file, decode it with chunks shorter than a frame, and check
+#                that each frame is received once, at its position in the
+#                recording, and equal to the reference file
+#                example_tx_source.txt in data/GRC_default folder
+##############################################################################
+
+
+from gnuradio import gr, gr_unittest
+import numpy as np
+import os
+import sys
+import tempfile
+
+try:
+    import gnuradio.lora_sdr as lora_sdr
+
+except ImportError:
+    import os
+    import sys
+    dirname, filename = os.path.split(os.path.abspath(__file__))
+    sys.path.append(os.path.join(dirname, "bindings"))
+
+from gnuradio.lora_sdr.offline_decoder import decode_recording
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+class qa_offline_decoder(gr_unittest.TestCase):
+
+    def setUp(self):
+        fd, self.recording = tempfile.mkstemp(suffix=".cfile")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.recording)
+
+    def test_001_chunked_recording(self):
+
+        sf = 7
+        cr = 2
+        samp_rate = 500000
+        bw = 125000
+        preamb_len = 8
+        samples_per_symbol = (1 << sf) * samp_rate // bw
+
+        frame = np.fromfile(os.path.join(script_dir, "qa_ref/qa_ref_tx/ref_tx_sf{}_cr{}.bin".format(sf, cr)), dtype=np.complex64)
+
+        # Load ref files
+        ref_path = os.path.join(script_dir, "../../data/GRC_default/example_tx_source.txt")
+        with open(ref_path, "rb") as f3:
+            binary_data = f3.read()
+        ref_data = binary_data[:-1]
+
+        # frames separated by silences of different lengths
+        gaps = [3000, 17000, 40000, 9000]
+        recording = []
+        frame_starts = []
+        pos = 0
+        for gap in gaps:
+            recording += [np.zeros(gap, dtype=np.complex64), frame]
+            frame_starts.append(pos + gap)
+            pos += gap + len(frame)
+        np.concatenate(recording).tofile(self.recording)
+
+        # chunks shorter than a frame, all frames cross a chunk border
+        frames = decode_recording(self.recording, samp_rate, bw, sf, preamb_len=preamb_len, max_pay_len=len(ref_data), chunk_len=20000, n_workers=2)
+
+        self.assertEqual(len(frames), len(gaps))
+        for frame_info, start in zip(frames, frame_starts):
+            self.assertEqual(frame_info["payload"], ref_data)
+            self.assertTrue(frame_info["crc_valid"])
+            self.assertEqual(frame_info["cr"], cr)
+            # the header follows the preamble, network identifiers and downchirps
+            self.assertLess(abs(frame_info["sample_offset"] - (start + (preamb_len + 4.25) * samples_per_symbol)), samples_per_symbol)
+
+        # same frames when decoding the recording in one chunk
+        single = decode_recording(self.recording, samp_rate, bw, sf, preamb_len=preamb_len, chunk_len=len(np.fromfile(self.recording, dtype=np.complex64)), n_workers=1)
+        self.assertEqual([f["payload"] for f in single], [f["payload"] for f in frames])
+        for f_single, f_chunk in zip(single, frames):
+            self.assertLess(abs(f_single["sample_offset"] - f_chunk["sample_offset"]), samples_per_symbol)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_offline_decoder)
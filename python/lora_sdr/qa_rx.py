@@ -11,6 +11,42 @@
 #                the output of receiver ref_tx_sf_cr.bin in qa_ref/qa_ref_tx. sf = 7, cr = 2
 #                and compare output with reference file 
 #                example_tx_source.txt in data/GRC_default folder
+#
+# Function: test_002_soft_formats
+#   Description: decode the same input with soft-decision decoding, for each
+#                format of the soft values (double, float and int8), and
+#                compare the output with the same reference file
+#
+# Function: test_003_pdu_output
+#   Description: check that crc_verif in PDU mode publishes each payload as a
+#                pair of the frame info dictionary and a u8vector of the bytes
+#                output on the stream
+#
+# Function: test_004_energy_gate
+#   Description: decode the same input in gaussian noise 10 dB below it with
+#                the energy gate of frame_sync enabled, the frame coming
+#                after 100 windows of noise, or first then again after the
+#                noise so that the noise floor is not seeded on the frame,
+#                compare the output with the same reference file and check
+#                that the preamble search was not run on the noise windows
+#
+# Function: test_005_consecutive_frames
+#   Description: decode the same input repeated three times in one stream,
+#                so that the frames are processed by the same calls of
+#                frame_sync, and check the output and the frame_info tags
+#                of each frame
+#
+# Function: test_006_inline_header
+#   Description: decode the same repeated input with the header decoded
+#                inline by frame_sync, and check the output and that the
+#                payload tags match the ones placed from the header_decoder
+#                messages
+#
+# Function: test_007_frame_decoder
+#   Description: decode the same repeated input with the fused frame_decoder
+#                in place of the blocks gray_mapping to crc_verif, in hard
+#                decoding and in soft decoding with each format, and check
+#                the output stream and the PDUs
 ##############################################################################
 
 
@@ -37,12 +73,63 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 
 class qa_rx(gr_unittest.TestCase):
 
+    # parameters of the reference frame ref_tx_sf7_cr2.bin in qa_ref/qa_ref_tx
+    sf = 7
+    cr = 2
+    samp_rate = 500000
+    bw = 125000
+    center_freq = 868.1e6
+    preamb_len = 8
+    pay_len = 25
+    ldro = False
+    impl_head = False
+    has_crc = True
+
     def setUp(self):
         self.tb = gr.top_block()
 
     def tearDown(self):
         self.tb = None
 
+    def _ref_data(self):
+        """
+        Payload of the reference frame, example_tx_source.txt in data/GRC_default without its final comma
+        """
+        with open(os.path.join(script_dir, "../../data/GRC_default/example_tx_source.txt"), "rb") as f:
+            return list(f.read()[:-1])
+
+    def _ref_samples(self, n_frames=1):
+        """
+        Samples of the reference frame, repeated n_frames times
+        """
+        input_file_path = os.path.join(script_dir, "qa_ref/qa_ref_tx/ref_tx_sf{}_cr{}.bin".format(self.sf, self.cr))
+        return np.tile(np.fromfile(input_file_path, dtype=np.complex64), n_frames)
+
+    def _rx_chain(self, tb, samples, soft_decoding=False, soft_format=0, pdu=False, fused=False, **frame_sync_args):
+        """
+        Connect in tb the receiver of the samples: frame_sync (with frame_sync_args, e.g. energy_gate), fft_demod, then
+        gray_mapping to crc_verif, or the fused frame_decoder, and a byte vector sink.
+        Returns the blocks frame_sync, decoder (crc_verif or frame_decoder) and sink.
+        """
+        source = blocks.vector_source_c(samples.tolist(), False)
+        frame_sync = lora_sdr.frame_sync(int(self.center_freq), self.bw, self.sf, self.impl_head, [18], int(self.samp_rate/self.bw), self.preamb_len, **frame_sync_args)
+        fft_demod = lora_sdr.fft_demod(soft_decoding, False, 0, 0, soft_format)
+        sink = blocks.vector_sink_b(1, 1024)
+        if fused:
+            decoder = lora_sdr.frame_decoder(self.impl_head, self.cr, self.pay_len, self.has_crc, self.ldro, False, False, soft_decoding, soft_format, pdu)
+            tb.msg_connect((decoder, 'frame_info'), (frame_sync, 'frame_info'))
+            tb.connect(source, frame_sync, fft_demod, decoder, sink)
+        else:
+            gray_mapping = lora_sdr.gray_mapping(soft_decoding, soft_format)
+            deinterleaver = lora_sdr.deinterleaver(soft_decoding, soft_format)
+            hamming_dec = lora_sdr.hamming_dec(soft_decoding, soft_format)
+            header_decoder = lora_sdr.header_decoder(self.impl_head, self.cr, self.pay_len, self.has_crc, self.ldro, False)
+            dewhitening = lora_sdr.dewhitening()
+            decoder = lora_sdr.crc_verif(False, False, pdu)
+            tb.msg_connect((header_decoder, 'frame_info'), (frame_sync, 'frame_info'))
+            tb.connect(source, frame_sync, fft_demod, gray_mapping, deinterleaver, hamming_dec, header_decoder, dewhitening, decoder, sink)
+        return frame_sync, decoder, sink
+
     def test_001_functional_test(self):
 
         soft_decoding = False
@@ -99,7 +186,122 @@ class qa_rx(gr_unittest.TestCase):
         grouped_integers = [int.from_bytes(group, byteorder="big") for group in grouped_data]
 
         self.assertEqual(grouped_integers, result_data)
-    
+
+    def test_002_soft_formats(self):
+        ref_data = self._ref_data()
+
+        for soft_format in range(3):
+            tb = gr.top_block()
+            _, _, sink = self._rx_chain(tb, self._ref_samples(), soft_decoding=True, soft_format=soft_format)
+            tb.run()
+
+            self.assertEqual(ref_data, list(sink.data()), "soft format {}".format(soft_format))
+
+    def test_003_pdu_output(self):
+        _, crc_verif, sink = self._rx_chain(self.tb, self._ref_samples(), pdu=True)
+        msg_debug = blocks.message_debug()
+        self.tb.msg_connect((crc_verif, 'msg'), (msg_debug, 'store'))
+        self.tb.run()
+
+        self.assertGreater(msg_debug.num_messages(), 0)
+        payloads = []
+        for i in range(msg_debug.num_messages()):
+            pdu = msg_debug.get_message(i)
+            self.assertTrue(pmt.is_pair(pdu))
+            meta = pmt.car(pdu)
+            self.assertTrue(pmt.is_dict(meta))
+            self.assertEqual(pmt.to_long(pmt.dict_ref(meta, pmt.intern("pay_len"), pmt.PMT_NIL)), self.pay_len)
+            self.assertTrue(pmt.to_bool(pmt.dict_ref(meta, pmt.intern("crc_valid"), pmt.PMT_F)))
+            self.assertTrue(pmt.is_u8vector(pmt.cdr(pdu)))
+            payloads += pmt.u8vector_elements(pmt.cdr(pdu))
+
+        self.assertEqual(payloads, list(sink.data()))
+
+    def test_004_energy_gate(self):
+        noise_power = 0.1
+        n_noise_windows = 100
+        n_init_windows = 8 # windows searched to seed the noise floor
+        ref_data = self._ref_data()
+        frame = self._ref_samples()
+        gap = np.zeros(n_noise_windows * (2**self.sf) * int(self.samp_rate/self.bw), dtype=np.complex64)
+        rng = np.random.default_rng(1)
+
+        # frame after the noise, and first frame on which the noise floor must not stay
+        for layout in ([gap, frame], [frame, gap, frame]):
+            samples = np.concatenate(layout)
+            samples = (samples + np.sqrt(noise_power / 2) * (rng.standard_normal(len(samples)) + 1j * rng.standard_normal(len(samples)))).astype(np.complex64)
+            n_frames = len(layout) - 1
+
+            tb = gr.top_block()
+            frame_sync, _, sink = self._rx_chain(tb, samples, energy_gate=3.0)
+            tb.run()
+
+            self.assertEqual(ref_data * n_frames, list(sink.data()))
+            self.assertGreaterEqual(frame_sync.detect_windows() - frame_sync.searched_windows(), n_noise_windows - n_init_windows)
+            self.assertEqual(frame_sync.gate_false_alarms(), 0)
+            self.assertEqual(frame_sync.gate_misses(), 0)
+
+    def test_005_consecutive_frames(self):
+        n_frames = 3
+        frame_sync, _, sink = self._rx_chain(self.tb, self._ref_samples(n_frames))
+        sync_sink = blocks.vector_sink_c(1, 1024)
+        self.tb.connect(frame_sync, sync_sink)
+        self.tb.run()
+
+        self.assertEqual(self._ref_data() * n_frames, list(sink.data()))
+        # one tag on the header and one on the payload of each frame, on symbol boundaries
+        tags = [t for t in sync_sink.tags() if pmt.symbol_to_string(t.key) == "frame_info"]
+        headers = [t for t in tags if pmt.to_bool(pmt.dict_ref(t.value, pmt.intern("is_header"), pmt.PMT_F))]
+        self.assertEqual(len(headers), n_frames)
+        self.assertEqual(len(tags), 2 * n_frames)
+        for t in tags:
+            self.assertEqual(t.offset % (2**self.sf), 0)
+
+    def test_006_inline_header(self):
+        n_frames = 3
+        frame_sync, _, sink = self._rx_chain(self.tb, self._ref_samples(n_frames), inline_header=True, ldro_mode=self.ldro)
+        sync_sink = blocks.vector_sink_c(1, 1024)
+        self.tb.connect(frame_sync, sync_sink)
+        self.tb.run()
+
+        self.assertEqual(self._ref_data() * n_frames, list(sink.data()))
+        self.assertEqual(frame_sync.inline_headers(), n_frames)
+        self.assertGreaterEqual(frame_sync.header_latency_saved(), 0)
+        # the payload tag of each frame follows the 8 symbols of its header
+        tags = [t for t in sync_sink.tags() if pmt.symbol_to_string(t.key) == "frame_info"]
+        self.assertEqual(len(tags), 2 * n_frames)
+        for header, payload in zip(tags[0::2], tags[1::2]):
+            self.assertTrue(pmt.to_bool(pmt.dict_ref(header.value, pmt.intern("is_header"), pmt.PMT_F)))
+            self.assertFalse(pmt.to_bool(pmt.dict_ref(payload.value, pmt.intern("is_header"), pmt.PMT_T)))
+            self.assertEqual(payload.offset - header.offset, 8 * 2**self.sf)
+            self.assertEqual(pmt.to_long(pmt.dict_ref(payload.value, pmt.intern("pay_len"), pmt.PMT_NIL)), self.pay_len)
+            self.assertEqual(pmt.to_long(pmt.dict_ref(payload.value, pmt.intern("cr"), pmt.PMT_NIL)), self.cr)
+            self.assertEqual(pmt.to_long(pmt.dict_ref(payload.value, pmt.intern("crc"), pmt.PMT_NIL)), int(self.has_crc))
+
+    def test_007_frame_decoder(self):
+        n_frames = 3
+        ref_data = self._ref_data()
+
+        # hard decoding, then soft decoding with each format
+        for soft_decoding, soft_format in [(False, 0), (True, 0), (True, 1), (True, 2)]:
+            tb = gr.top_block()
+            _, frame_decoder, sink = self._rx_chain(tb, self._ref_samples(n_frames), soft_decoding, soft_format, pdu=True, fused=True)
+            msg_debug = blocks.message_debug()
+            tb.msg_connect((frame_decoder, 'msg'), (msg_debug, 'store'))
+            tb.run()
+
+            self.assertEqual(ref_data * n_frames, list(sink.data()), "soft format {}".format(soft_format) if soft_decoding else "hard")
+            self.assertEqual(msg_debug.num_messages(), n_frames)
+            tags = [t for t in sink.tags() if pmt.symbol_to_string(t.key) == "frame_info"]
+            self.assertEqual([t.offset for t in tags], [i * self.pay_len for i in range(n_frames)])
+            for i in range(n_frames):
+                pdu = msg_debug.get_message(i)
+                meta = pmt.car(pdu)
+                self.assertEqual(pmt.to_long(pmt.dict_ref(meta, pmt.intern("pay_len"), pmt.PMT_NIL)), self.pay_len)
+                self.assertEqual(pmt.to_long(pmt.dict_ref(meta, pmt.intern("cr"), pmt.PMT_NIL)), self.cr)
+                self.assertTrue(pmt.to_bool(pmt.dict_ref(meta, pmt.intern("crc_valid"), pmt.PMT_F)))
+                self.assertEqual(list(pmt.u8vector_elements(pmt.cdr(pdu))), ref_data)
+
 
 if __name__ == '__main__':
     gr_unittest.run(qa_rx)
@@ -13,6 +13,11 @@
 #                exampe_tx_source and compare output with reference file 
 #                ref_tx_sf_cr.bin in qa_ref/qa_ref_tx folder
 #
+# Function: test_002_frame_encoder
+#   Description: encode the same payload, received as a message, with the
+#                fused frame_encoder block and compare its output and
+#                frame_len tag with the same reference files, for sf 7 to 12
+#
 ##############################################################################
 
 from gnuradio import gr, gr_unittest
@@ -91,6 +96,37 @@ class qa_tx_no_mod(gr_unittest.TestCase):
 
         self.assertEqual(result_data, list(ref_data))
 
+    def test_002_frame_encoder(self):
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        input_path = os.path.join(script_dir, "../../data/GRC_default/example_tx_source.txt")
+        with open(input_path, "rb") as f:
+            payload = f.read().split(b',')[0]
+
+        ldro = False
+        impl_head = False
+        has_crc = True
+        cr = 2
+
+        for sf in range(7, 13):
+            relative_ref_path = "qa_ref/qa_ref_tx_no_mod/ref_tx_sf"+str(sf)+"_cr"+str(cr)+".bin"
+            ref_data = list(np.fromfile(os.path.join(script_dir, relative_ref_path), dtype=np.int32))
+
+            self.assertEqual(list(lora_sdr.frame_encoder.encode(list(payload), sf, cr, has_crc, impl_head, ldro)), ref_data)
+
+            tb = gr.top_block()
+            frame_encoder = lora_sdr.frame_encoder(sf, cr, has_crc, impl_head, ldro, 125000)
+            head = blocks.head(gr.sizeof_int, len(ref_data))
+            blocks_vector_sink_x_0 = blocks.vector_sink_i(1, 1024)
+            tb.connect(frame_encoder, head, blocks_vector_sink_x_0)
+            frame_encoder.to_basic_block()._post(pmt.intern("msg"), pmt.cons(pmt.make_dict(), pmt.init_u8vector(len(payload), list(payload))))
+            tb.run()
+
+            self.assertEqual(blocks_vector_sink_x_0.data(), ref_data)
+            tags = [t for t in blocks_vector_sink_x_0.tags() if pmt.symbol_to_string(t.key) == "frame_len"]
+            self.assertEqual(len(tags), 1)
+            self.assertEqual(tags[0].offset, 0)
+            self.assertEqual(pmt.to_long(tags[0].value), len(ref_data))
+
            
 if __name__ == '__main__':
     gr_unittest.run(qa_tx_no_mod)
\ No newline at end of file